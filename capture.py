@@ -0,0 +1,293 @@
+"""
+Frame capture helpers for the real-time detection views
+Each source (camera index, video file, stream URL, frame directory or a
+recorded session) is read on its own thread. Sources can be replayed at
+real-time speed, at maximum speed (every frame, no drops) or one frame at a
+time, and live sessions can be recorded to disk for later replay.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+REPLAY_MODES = ("live", "realtime", "max", "step")
+SESSION_FILE = "session.json"
+
+def parse_source(source):
+    """'0' -> camera index 0; anything else (file path, rtsp://...) is passed through"""
+    if isinstance(source, int):
+        return source
+    source = str(source).strip()
+    return int(source) if source.isdigit() else source
+
+def source_name(source):
+    source = parse_source(source)
+    if isinstance(source, int):
+        return f"Camera {source}"
+    return str(source).rstrip("/").split("/")[-1].split("\\")[-1] or str(source)
+
+class VideoSource:
+    """Camera, video file or stream URL through cv2.VideoCapture"""
+
+    def __init__(self, source):
+        self.source = parse_source(source)
+        self.is_live = isinstance(self.source, int) or "://" in str(self.source)
+        self.cap = cv2.VideoCapture(self.source)
+        self.opened = self.cap.isOpened()
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_times = None  # per-frame seconds from the start, when known (recorded sessions)
+
+    def read(self):
+        return self.cap.read()
+
+    def rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        self.cap.release()
+
+class FrameDirectorySource:
+    """Sorted image files in a directory, e.g. the movToPng.py output"""
+
+    is_live = False
+    frame_times = None
+
+    def __init__(self, directory, fps=30.0):
+        self.files = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        self.opened = bool(self.files)
+        self.fps = fps
+        self._index = 0
+
+    def read(self):
+        while self._index < len(self.files):
+            frame = cv2.imread(str(self.files[self._index]))
+            self._index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def rewind(self):
+        self._index = 0
+
+    def release(self):
+        pass
+
+def open_source(source):
+    """Pick the frame source for a camera index, URL, video file, frame directory or recorded session"""
+    source = parse_source(source)
+    if isinstance(source, str) and Path(source).is_dir():
+        session_file = Path(source) / SESSION_FILE
+        if session_file.exists():
+            session = json.loads(session_file.read_text())
+            frames = VideoSource(Path(source) / session["frames_file"])
+            frames.fps = session.get("fps") or frames.fps
+            detections = Path(source) / "detections.jsonl"
+            if detections.exists():
+                with open(detections) as f:
+                    frames.frame_times = [json.loads(line)["time_s"] for line in f if line.strip()]
+            return frames
+        return FrameDirectorySource(source)
+    return VideoSource(source)
+
+class CaptureThread(threading.Thread):
+    """Reads frames from one source on a background thread
+
+    Modes:
+        live      keep only the newest frame (cameras, streams)
+        realtime  pace files to their frame rate (recorded sessions to their
+                  frame timestamps), keep only the newest frame
+        max       no pacing and no drops: the next frame is read once the
+                  consumer calls ack() for the previous one
+        step      like max, but the next frame is read only on step()
+
+    In live/realtime mode, files loop at the end when loop_files is set, so a
+    file can stand in for a live camera when testing.
+    """
+
+    def __init__(self, source, mode=None, loop_files=True):
+        super().__init__(name=f"capture-{source}", daemon=True)
+        self.frame_source = open_source(source)
+        self.source = parse_source(source)
+        self.name_for_display = source_name(self.source)
+        self.opened = self.frame_source.opened
+        self.fps = self.frame_source.fps
+
+        if mode is None:
+            mode = "live" if self.frame_source.is_live else "realtime"
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode {mode!r}, expected one of {REPLAY_MODES}")
+        self.mode = mode
+        self.loop_files = loop_files and mode in ("live", "realtime")
+        self.finished = False
+
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._timestamp = 0.0
+        self._stop_event = threading.Event()
+        self._advance = threading.Event()
+        self._advance.set()  # First frame is always read
+
+    def read_latest(self):
+        """Return (seq, frame, timestamp); seq increases with every new frame"""
+        with self._lock:
+            return self._seq, self._frame, self._timestamp
+
+    def ack(self, seq):
+        """Consumer finished frame seq; in max mode this releases the next frame"""
+        if self.mode == "max" and seq == self._seq:
+            self._advance.set()
+
+    def step(self):
+        """Read one more frame in step mode"""
+        if self.mode == "step":
+            self._advance.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._advance.set()
+
+    def run(self):
+        paced = self.mode == "realtime" and not self.frame_source.is_live
+        frame_interval = 1.0 / self.fps if paced and self.fps > 0 else 0.0
+        frame_times = self.frame_source.frame_times if paced else None
+        lossless = self.mode in ("max", "step")
+        next_due = time.perf_counter()
+        position = -1  # index in the file of the frame just read
+
+        while not self._stop_event.is_set():
+            if lossless:
+                self._advance.wait()
+                if self._stop_event.is_set():
+                    break
+                self._advance.clear()
+
+            ret, frame = self.frame_source.read()
+            if not ret:
+                if not self.frame_source.is_live:
+                    if self.loop_files:
+                        self.frame_source.rewind()
+                        position = -1
+                        continue
+                    self.finished = True
+                    break
+                # Live sources may drop a frame; back off briefly instead of spinning
+                if lossless:
+                    self._advance.set()
+                if self._stop_event.wait(0.05):
+                    break
+                continue
+
+            with self._lock:
+                self._frame = frame
+                self._seq += 1
+                self._timestamp = time.time()
+            position += 1
+
+            if frame_interval:
+                interval = frame_interval
+                if frame_times and position + 1 < len(frame_times):
+                    interval = max(frame_times[position + 1] - frame_times[position], 0.0)
+                next_due += interval
+                delay = next_due - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    next_due = time.perf_counter()
+
+        self.frame_source.release()
+
+class SessionRecorder:
+    """Records raw frames plus per-frame detections for deterministic replay
+
+    Layout of the session directory:
+        session.json     source, fps, frame size, codec
+        frames.mkv       frames, FFV1 lossless (MJPG .avi if FFV1 is unavailable)
+        detections.jsonl one line per frame: {"frame", "time_s", "boxes": [[x1, y1, x2, y2, conf, cls], ...]}
+                         plus "stage" when given ("classifier" = detector skipped, boxes not computed)
+
+    Only the frames the consumer processed are recorded, so the recording rate
+    is the processing rate, not the camera's. fps is measured from the frame
+    timestamps (the writer opens once a short sample is in), and realtime replay
+    paces each frame by its time_s. The detection lines use the same schema as
+    src/test.py's jsonl output, and open_source(session_dir) replays the frames.
+    """
+
+    RATE_SAMPLE_FRAMES = 30
+    RATE_SAMPLE_SECONDS = 2.0
+
+    def __init__(self, directory, source):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.source = str(source)
+        self.fps = None
+        self.writer = None
+        self.frames = 0
+        self._start = None
+        self._last_time = 0.0
+        self._pending = []  # frames held back until the recording rate is known
+        self._session = None
+        self._detections = open(self.directory / "detections.jsonl", "w")
+
+    def measured_fps(self):
+        """Frames per second of the recording so far (None before two frames)"""
+        if self.frames < 2 or self._last_time <= 0:
+            return None
+        return (self.frames - 1) / self._last_time
+
+    def _open_writer(self):
+        self.fps = self.measured_fps() or 1.0
+        height, width = self._pending[0].shape[:2]
+        for frames_file, codec in (("frames.mkv", "FFV1"), ("frames.avi", "MJPG")):
+            writer = cv2.VideoWriter(str(self.directory / frames_file), cv2.VideoWriter_fourcc(*codec),
+                                     self.fps, (width, height))
+            if writer.isOpened():
+                break
+        self.writer = writer
+        for frame in self._pending:
+            writer.write(frame)
+        self._pending = []
+        self._session = {"source": self.source, "fps": round(self.fps, 3), "width": width, "height": height,
+                         "frames_file": frames_file, "codec": codec,
+                         "started": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self._write_session()
+
+    def _write_session(self):
+        (self.directory / SESSION_FILE).write_text(json.dumps(self._session, indent=2))
+
+    def write(self, frame, boxes, timestamp=None, stage=None):
+        """Append one raw BGR frame and its [x1, y1, x2, y2, conf] boxes (and the deciding stage)"""
+        now = timestamp or time.time()
+        if self._start is None:
+            self._start = now
+        self._last_time = round(now - self._start, 4)
+        record = {"frame": self.frames,
+                  "time_s": self._last_time,
+                  "boxes": [list(box) + [0] for box in boxes]}
+        if stage is not None:
+            record["stage"] = stage
+        self._detections.write(json.dumps(record) + "\n")
+        self.frames += 1
+
+        if self.writer is not None:
+            self.writer.write(frame)
+            return
+        self._pending.append(frame)
+        if len(self._pending) >= self.RATE_SAMPLE_FRAMES or self._last_time >= self.RATE_SAMPLE_SECONDS:
+            self._open_writer()
+
+    def close(self):
+        if self.writer is None and self._pending:
+            self._open_writer()
+        if self.writer is not None:
+            self.writer.release()
+            # Rate over the whole session; the container keeps the sampled one
+            fps = self.measured_fps()
+            if fps:
+                self._session["fps"] = round(fps, 3)
+                self._write_session()
+        self._detections.close()
@@ -0,0 +1,157 @@
+"""
+Two-stage RS board presence cascade
+A tiny classifier (trained by src/trainPresence.py) answers "board present?"
+on a downscaled frame; the full detector only runs when the classifier is
+unsure, or when it says "present" and the caller needs box coordinates.
+
+Usage (benchmark against detector-only): python cascade.py [--images dataset/images/test] [--video FILE]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from instrumentation import StageTimers
+
+DEFAULT_CLASSIFIER = "model/presence.pt"
+# Written by src/evalPresence.py
+DEFAULT_THRESHOLDS = "model/presence_thresholds.json"
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+def presence_input(frame, imgsz=128):
+    """Squash a frame to imgsz x imgsz; training images are prepared the same way, so nothing is cropped off"""
+    return cv2.resize(frame, (imgsz, imgsz), interpolation=cv2.INTER_AREA)
+
+def load_thresholds(path=DEFAULT_THRESHOLDS, low=0.1, high=0.9):
+    """(low, high) presence probabilities outside which the classifier is trusted"""
+    try:
+        data = json.loads(Path(path).read_text())
+        return data["low"], data["high"]
+    except (OSError, ValueError, KeyError):
+        return low, high
+
+class PresenceCascade:
+    """Classifier gate in front of the detector
+
+    Calling the cascade returns (present, detector_result_or_None, p_present, stage)
+    where stage is "classifier" when the detector was skipped.
+    """
+
+    def __init__(self, classifier_path=DEFAULT_CLASSIFIER, detector=None, detector_path="model/best.pt",
+                 thresholds=None, imgsz=128, conf=0.25, timers=None):
+        self.classifier = YOLO(classifier_path)
+        self.detector = detector or YOLO(detector_path)
+        self.low, self.high = thresholds or load_thresholds()
+        self.imgsz = imgsz
+        self.conf = conf
+        self.timers = timers or StageTimers(enabled=False)
+        names = self.classifier.names
+        self.present_index = next(i for i, name in names.items() if name == "present")
+
+    def presence(self, frame):
+        """Probability that the board is in frame"""
+        with self.timers.stage("classifier"):
+            result = self.classifier.predict(presence_input(frame, self.imgsz), imgsz=self.imgsz,
+                                             verbose=False, device='cpu')[0]
+        return float(result.probs.data[self.present_index])
+
+    def detect(self, frame):
+        with self.timers.stage("detector"):
+            return self.detector(frame, conf=self.conf, verbose=False, device='cpu')[0]
+
+    def __call__(self, frame, need_boxes=False):
+        p_present = self.presence(frame)
+        if p_present <= self.low:
+            return False, None, p_present, "classifier"
+        if p_present >= self.high and not need_boxes:
+            return True, None, p_present, "classifier"
+        result = self.detect(frame)
+        present = result.boxes is not None and len(result.boxes) > 0
+        return present, result, p_present, "detector"
+
+def load_frames(image_dir, video_path=None, max_images=None, max_video_frames=300):
+    """(frame, label) pairs: test images with presence from their label files, then unlabelled video frames"""
+    frames = []
+    if image_dir and Path(image_dir).exists():
+        labels_dir = Path(image_dir).parents[1] / "labels" / Path(image_dir).name
+        images = sorted(p for p in Path(image_dir).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        for image in images[:max_images]:
+            frame = cv2.imread(str(image))
+            if frame is None:
+                continue
+            label = labels_dir / (image.stem + ".txt")
+            frames.append((frame, label.exists() and label.read_text().strip() != ""))
+    if video_path:
+        cap = cv2.VideoCapture(str(video_path))
+        for _ in range(max_video_frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append((frame, None))
+        cap.release()
+    return frames
+
+def benchmark(cascade, frames, need_boxes=False):
+    """CPU time and agreement of detector-only against the cascade on the same frames"""
+    detector_present, cascade_present, stages = [], [], []
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for frame, _ in frames:
+        result = cascade.detect(frame)
+        detector_present.append(result.boxes is not None and len(result.boxes) > 0)
+    detector_cpu, detector_wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for frame, _ in frames:
+        present, _, _, stage = cascade(frame, need_boxes)
+        cascade_present.append(present)
+        stages.append(stage)
+    cascade_cpu, cascade_wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    labelled = [(label, d, c) for (_, label), d, c in zip(frames, detector_present, cascade_present) if label is not None]
+    report = {
+        "frames": len(frames),
+        "detector_cpu_ms_per_frame": 1000 * detector_cpu / len(frames),
+        "cascade_cpu_ms_per_frame": 1000 * cascade_cpu / len(frames),
+        "cpu_saved_pct": 100 * (1 - cascade_cpu / detector_cpu) if detector_cpu > 0 else 0.0,
+        "detector_wall_ms_per_frame": 1000 * detector_wall / len(frames),
+        "cascade_wall_ms_per_frame": 1000 * cascade_wall / len(frames),
+        "detector_skipped_pct": 100 * stages.count("classifier") / len(frames),
+        "agreement_with_detector_pct": 100 * float(np.mean(np.array(detector_present) == np.array(cascade_present))),
+    }
+    if labelled:
+        labels, detector, cascade_ = (np.array(column) for column in zip(*labelled))
+        report["detector_accuracy_pct"] = 100 * float(np.mean(detector == labels))
+        report["cascade_accuracy_pct"] = 100 * float(np.mean(cascade_ == labels))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the presence cascade against detector-only inference")
+    parser.add_argument("--images", default="dataset/images/test", help="Labelled images (default: dataset/images/test)")
+    parser.add_argument("--video", help="Also use the first frames of this video (unlabelled)")
+    parser.add_argument("--classifier", default=DEFAULT_CLASSIFIER, help=f"Presence classifier (default: {DEFAULT_CLASSIFIER})")
+    parser.add_argument("--model", default="model/best.pt", help="Detector weights (default: model/best.pt)")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS, help=f"Thresholds file (default: {DEFAULT_THRESHOLDS})")
+    parser.add_argument("--imgsz", type=int, default=128, help="Classifier input size (default: 128)")
+    parser.add_argument("--max-images", type=int, help="Use only the first N images")
+    parser.add_argument("--need-boxes", action="store_true", help="Run the detector on every frame the classifier calls present")
+    args = parser.parse_args()
+
+    cascade = PresenceCascade(args.classifier, detector_path=args.model,
+                              thresholds=load_thresholds(args.thresholds), imgsz=args.imgsz)
+    frames = load_frames(args.images, args.video, args.max_images)
+    if not frames:
+        raise FileNotFoundError(f"No frames found in {args.images}" + (f" or {args.video}" if args.video else ""))
+
+    # Warm up both models so their initialisation is not timed
+    cascade.presence(frames[0][0])
+    cascade.detect(frames[0][0])
+    report = benchmark(cascade, frames, args.need_boxes)
+    print(f"Thresholds: low {cascade.low:.3f}, high {cascade.high:.3f}")
+    for key, value in report.items():
+        print(f"{key:<30}{value:>10.1f}" if isinstance(value, float) else f"{key:<30}{value:>10}")
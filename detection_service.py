@@ -0,0 +1,394 @@
+"""
+Headless RS board detection service
+Runs the camera + YOLO pipeline once and fans the latest detection state out
+to any number of readers: in-process subscribers, HTTP polling clients and
+Server-Sent Events subscribers.
+
+Usage: python detection_service.py [--source 0] [--host 127.0.0.1] [--port 8765]
+                                   [--replay-mode realtime|max|step] [--record DIR]
+                                   [--cascade [CLASSIFIER]] [--cascade-boxes]
+
+--source also accepts a video file, a frame directory or a recorded session
+directory. With --replay-mode max and a finite source the service processes
+every frame as fast as it can, prints timing and exits, which makes it a
+camera-free benchmark of the real-time path.
+
+--cascade puts the presence classifier from cascade.py in front of the
+detector; the state's "stage" says which model decided each frame.
+
+State (GET /state, /events, DetectionService.latest()):
+    seq, timestamp, source, fps
+    rs_board_detected  whether the board is in the frame
+    boxes              [[x1, y1, x2, y2, conf], ...] from the detector
+    stage              "detector": the detector ran and boxes are its output
+                       (empty means no board); "classifier": the cascade was
+                       confident and skipped the detector, so boxes is empty
+                       even when rs_board_detected is true
+    boxes_checked      stage == "detector"
+    timing_ms          mean ms per stage; "inference" is the whole model
+                       step in both modes, with "classifier"/"detector"
+                       as its parts under --cascade
+
+Endpoints:
+    GET /state      latest detection state as JSON
+    GET /frame.jpg  latest raw frame as JPEG; ?seq=N asks for the frame of state N
+                    (404 once it has left the short history), X-Seq names the frame sent
+    GET /events     text/event-stream with one event per new state
+    GET /health     {"ok": true}
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from capture import CaptureThread, SessionRecorder, REPLAY_MODES
+from instrumentation import StageTimers
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+FRAME_HISTORY = 8  # recent frames kept so remote clients get the frame matching the state they hold
+
+class DetectionService:
+    """Single inference loop whose results are shared by all readers
+
+    Publishing is O(1) regardless of the number of readers: the newest state
+    replaces the previous one and waiting readers are woken through one
+    condition variable. Readers that fall behind simply skip to the newest
+    state. JPEG encoding is done at most once per frame, on first request.
+    The last few frames are kept by seq so a reader can fetch the frame its
+    (possibly no longer newest) state was computed on.
+    """
+
+    def __init__(self, source=0, model_path="model/best.pt", conf=0.25, mode=None, record_dir=None,
+                 cascade_path=None, cascade_boxes=False):
+        self.source = source
+        self.model = YOLO(model_path)
+        self.conf = conf
+        self.timers = StageTimers(enabled=True)
+
+        # Optional presence classifier in front of the detector; boxes are then only
+        # produced when the classifier is unsure, unless cascade_boxes asks for them
+        self.cascade = None
+        self.cascade_boxes = cascade_boxes
+        if cascade_path:
+            from cascade import PresenceCascade
+            self.cascade = PresenceCascade(cascade_path, detector=self.model, conf=conf, timers=self.timers)
+
+        # Files loop in real-time replay; max/step replays end with the source
+        self._capture = CaptureThread(source, mode=mode)
+        self.mode = self._capture.mode
+        self._recorder = SessionRecorder(record_dir, source) if record_dir else None
+        self._cond = threading.Condition()
+        self._state = {"seq": 0, "timestamp": 0.0, "rs_board_detected": False, "boxes": [],
+                       "stage": None, "boxes_checked": False, "source": str(source), "fps": 0.0,
+                       "timing_ms": {}}
+        self._frame = None
+        self._frames = deque(maxlen=FRAME_HISTORY)  # (seq, frame), oldest first
+        self._jpeg = None
+        self._jpeg_seq = -1
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="detection-service", daemon=True)
+
+    def start(self):
+        self._capture.start()
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop the loop and wait for it, so an active recording is finalised before the caller exits"""
+        self._stop_event.set()
+        self._capture.stop()
+        with self._cond:
+            self._cond.notify_all()
+        # The loop is a daemon thread; without the join, exiting could cut off SessionRecorder.close()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print(f"Warning: detection loop did not stop within {timeout:.0f}s; recording may be incomplete")
+
+    @property
+    def stopped(self):
+        """True once stop() was called"""
+        return self._stop_event.is_set()
+
+    @property
+    def finished(self):
+        """True once a finite source has been fully processed"""
+        return self._capture.finished and not self._thread.is_alive()
+
+    def step(self):
+        """Process one more frame when replaying in step mode"""
+        self._capture.step()
+
+    def latest(self):
+        """Return (state, frame) for the newest processed frame"""
+        with self._cond:
+            return self._state, self._frame
+
+    def wait_for_update(self, last_seq, timeout=None):
+        """Block until a state newer than last_seq exists; returns it (or the current one on timeout)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._state["seq"] > last_seq or self._stop_event.is_set(), timeout)
+            return self._state
+
+    def latest_jpeg(self, seq=None, quality=80):
+        """Return (seq, JPEG bytes) of the newest frame, or of frame seq while it is in the history
+
+        (None, None) when there is no such frame.
+        """
+        with self._cond:
+            if seq is None:
+                seq, frame = self._state["seq"], self._frame
+            else:
+                frame = next((f for s, f in self._frames if s == seq), None)
+            if frame is None:
+                return None, None
+            if self._jpeg_seq == seq:
+                return seq, self._jpeg
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        jpeg = buffer.tobytes() if ok else None
+        with self._cond:
+            if seq >= self._jpeg_seq:
+                self._jpeg, self._jpeg_seq = jpeg, seq
+        return seq, jpeg
+
+    def _run(self):
+        last_capture_seq = 0
+        seq = 0
+        while not self._stop_event.is_set():
+            capture_seq, frame, timestamp = self._capture.read_latest()
+            if frame is None or capture_seq == last_capture_seq:
+                if self._capture.finished:
+                    break
+                self._stop_event.wait(0.005)
+                continue
+            last_capture_seq = capture_seq
+
+            self.timers.begin_frame()
+            stage = "detector"
+            # "inference" covers the whole model step, so timings compare with and without the cascade
+            with self.timers.stage("inference"):
+                if self.cascade is not None:
+                    detected, result, _, stage = self.cascade(frame, need_boxes=self.cascade_boxes)
+                    results = [result] if result is not None else []
+                else:
+                    results = self.model(frame, conf=self.conf, verbose=False, device='cpu')
+            self.timers.end_frame()
+
+            boxes = []
+            if len(results) > 0 and results[0].boxes is not None and len(results[0].boxes):
+                xyxy = results[0].boxes.xyxy.cpu().numpy()
+                confs = results[0].boxes.conf.cpu().numpy()
+                boxes = [[round(float(x1), 1), round(float(y1), 1), round(float(x2), 1), round(float(y2), 1),
+                          round(float(c), 4)] for (x1, y1, x2, y2), c in zip(xyxy, confs)]
+            if self.cascade is None:
+                detected = bool(boxes)
+
+            seq += 1
+            state = {
+                "seq": seq,
+                "timestamp": timestamp,
+                "rs_board_detected": detected,
+                "boxes": boxes,
+                "stage": stage,
+                "boxes_checked": stage == "detector",
+                "source": str(self.source),
+                "fps": round(self.timers.fps(), 2),
+                "timing_ms": {name: round(stat["mean"], 2) for name, stat in self.timers.stats().items()},
+            }
+            with self._cond:
+                self._state = state
+                self._frame = frame
+                self._frames.append((seq, frame))
+                self._cond.notify_all()
+
+            if self._recorder is not None:
+                self._recorder.write(frame, boxes, timestamp, stage)
+            self._capture.ack(capture_seq)
+
+        self._capture.stop()
+        if self._recorder is not None:
+            self._recorder.close()
+        with self._cond:
+            self._cond.notify_all()
+
+class RemoteDetectionClient:
+    """Reads a DetectionService over HTTP with the same latest()/stop() interface
+
+    A background thread follows /events and fetches /frame.jpg?seq= for each
+    new state, so the GUI thread never waits on the network and boxes are
+    always drawn on the frame they were detected in. A state whose frame has
+    already left the service's history is skipped; the next one catches up.
+    """
+
+    def __init__(self, url=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", fetch_frames=True):
+        self.url = url.rstrip("/")
+        self.fetch_frames = fetch_frames
+        self._lock = threading.Lock()
+        self._state = {"seq": 0, "rs_board_detected": False, "boxes": [], "fps": 0.0, "timing_ms": {}}
+        self._frame = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="detection-client", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def latest(self):
+        with self._lock:
+            return self._state, self._frame
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                with urllib.request.urlopen(f"{self.url}/events", timeout=10) as response:
+                    for line in response:
+                        if self._stop_event.is_set():
+                            return
+                        line = line.decode("utf-8").strip()
+                        if line.startswith("data:"):
+                            self._update(json.loads(line[5:]))
+                # The service closed the stream (it is stopping); try again later
+                self._stop_event.wait(1.0)
+            except (OSError, ValueError) as e:
+                print(f"Detection service unavailable ({e}), retrying...")
+                self._stop_event.wait(1.0)
+
+    def _update(self, state):
+        frame = None
+        if self.fetch_frames:
+            try:
+                with urllib.request.urlopen(f"{self.url}/frame.jpg?seq={state['seq']}", timeout=5) as response:
+                    frame_seq = int(response.headers.get("X-Seq", -1))
+                    data = np.frombuffer(response.read(), dtype=np.uint8)
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    return  # Fell too far behind; keep the last matching pair
+                raise
+            if frame_seq != state["seq"]:
+                return
+            frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            if frame is None:
+                return
+        with self._lock:
+            self._state = state
+            if frame is not None:
+                self._frame = frame
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass  # One log line per request would dominate at frame rate
+
+        def _send(self, status, content_type, body, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            if path == "/state":
+                state, _ = service.latest()
+                self._send(200, "application/json", json.dumps(state).encode())
+            elif path == "/frame.jpg":
+                params = parse_qs(query)
+                try:
+                    wanted = int(params["seq"][0]) if "seq" in params else None
+                except ValueError:
+                    self._send(400, "text/plain", b"seq must be an integer")
+                    return
+                seq, jpeg = service.latest_jpeg(wanted)
+                if jpeg is None:
+                    if wanted is None:
+                        self._send(503, "text/plain", b"no frame yet")
+                    else:
+                        self._send(404, "text/plain", b"frame no longer available")
+                else:
+                    self._send(200, "image/jpeg", jpeg, {"X-Seq": str(seq)})
+            elif path == "/events":
+                self._stream_events()
+            elif path == "/health":
+                self._send(200, "application/json", b'{"ok": true}')
+            else:
+                self._send(404, "text/plain", b"not found")
+
+        def _stream_events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            last_seq = 0
+            try:
+                while True:
+                    state = service.wait_for_update(last_seq, timeout=15)
+                    if state["seq"] > last_seq:
+                        last_seq = state["seq"]
+                        self.wfile.write(f"data: {json.dumps(state)}\n\n".encode())
+                    elif service.stopped:
+                        break  # wait_for_update no longer blocks; end the stream instead of spinning
+                    else:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Start the HTTP API on a background thread; returns the server"""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="detection-http", daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless RS board detection service")
+    parser.add_argument("--source", default="0", help="Camera index, video file or stream URL (default: 0)")
+    parser.add_argument("--model", default="model/best.pt", help="Detector weights (default: model/best.pt)")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold (default: 0.25)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--replay-mode", choices=REPLAY_MODES[1:],
+                        help="Replay speed for file, directory or session sources (default: realtime)")
+    parser.add_argument("--record", help="Record raw frames and detections to this session directory")
+    parser.add_argument("--cascade", nargs="?", const="model/presence.pt",
+                        help="Gate the detector with a presence classifier (default weights: model/presence.pt)")
+    parser.add_argument("--cascade-boxes", action="store_true",
+                        help="With --cascade, still run the detector whenever the board is present, for boxes")
+    args = parser.parse_args()
+
+    service = DetectionService(args.source, args.model, args.conf, mode=args.replay_mode,
+                               record_dir=args.record, cascade_path=args.cascade,
+                               cascade_boxes=args.cascade_boxes).start()
+    server = serve(service, args.host, args.port)
+    print(f"Detection service on http://{args.host}:{args.port} (source {args.source}, mode {service.mode})")
+    try:
+        while not service.finished:
+            time.sleep(0.5)
+        state, _ = service.latest()
+        print(f"Source finished after {state['seq']} frames")
+        for line in service.timers.summary_lines():
+            print(line)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        service.stop()
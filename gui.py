@@ -1,26 +1,36 @@
 import sys
+import math
+import argparse
 import random
 from pathlib import Path
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
     QLabel, QTabWidget, QPushButton, QComboBox, QSlider,
     QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QGraphicsItem, QGraphicsColorizeEffect,
-    QMessageBox, QHBoxLayout
+    QMessageBox, QHBoxLayout, QCheckBox, QFileDialog, QGridLayout, QProgressBar
 )
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QMovie
-from PyQt5.QtCore import Qt, QPointF, QUrl, QSize
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-from PyQt5.QtMultimediaWidgets import QVideoWidget
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QMovie, QColor
+from PyQt5.QtCore import Qt, QPointF, pyqtSignal, QObject, QRunnable, QThreadPool
 import os
+import json
 from ultralytics import YOLO
 import tempfile
+import threading
 import cv2
+import numpy as np
 from PyQt5.QtCore import QTimer, Qt
 import time
+from instrumentation import StageTimers
+from capture import CaptureThread, REPLAY_MODES
+from detection_service import DetectionService, RemoteDetectionClient, serve
+from scripts.video_frames import KeyframeVideoReader
 
 IMG_DIR = Path(r".\videos\imgs")
-# VID_DIR = Path(r".\videos\vids_mp4")
-VID_DIR = Path(r".\videos\vids_avi")
+# Original compressed recordings; OpenCV decodes them directly
+VID_DIR = Path(r".\videos\vids")
+VIDEO_EXTENSIONS = {".mov", ".mp4", ".avi", ".mkv"}
+# Per-frame detections written by src/test.py (<video stem>_detections.jsonl)
+DETECTIONS_DIR = Path(r".\detections")
 MOSQUITO_PATH = Path(r".\resources\mosquito.png")
 TEAMMATES_DIR = Path(r".\resources\teammates")
 EXPORT_DIR = Path(r".\tmp")
@@ -82,6 +92,82 @@ class DraggablePixmapItem(QGraphicsPixmapItem):
             return QPointF(x, y)
         return super().itemChange(change, value)
 
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+def load_detector(model_path):
+    """YOLO model for model_path, loaded once and shared"""
+    with _detectors_lock:
+        model = _detectors.get(model_path)
+        if model is None:
+            model = _detectors[model_path] = YOLO(model_path)
+        return model
+
+def qimage_to_rgb(image):
+    """QImage -> RGB numpy array (copied, so the QImage can be released)"""
+    image = image.convertToFormat(QImage.Format_RGB888)
+    width, height = image.width(), image.height()
+    ptr = image.constBits()
+    ptr.setsize(image.byteCount())
+    rows = np.frombuffer(ptr, np.uint8).reshape(height, image.bytesPerLine())
+    return rows[:, :width * 3].reshape(height, width, 3).copy()
+
+class DetectionSignals(QObject):
+    progress = pyqtSignal(int, str)                # request id, stage
+    finished = pyqtSignal(int, object, str, dict)  # request id, annotated RGB frame, summary, stage ms
+    failed = pyqtSignal(int, str)
+
+class DetectionTask(QRunnable):
+    """Runs one ImageTab detection off the GUI thread
+
+    Cancellation is checked between stages; a prediction already running
+    finishes, but its result is dropped.
+    """
+
+    def __init__(self, request_id, image, model_path):
+        super().__init__()
+        self.request_id = request_id
+        self.image = image
+        self.model_path = model_path
+        self.signals = DetectionSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _stage(self, name, timings, fn, *args):
+        """Run one stage unless cancelled; returns None when cancelled"""
+        if self.cancel_event.is_set():
+            return None
+        self.signals.progress.emit(self.request_id, name)
+        start = time.perf_counter()
+        value = fn(*args)
+        timings[name] = (time.perf_counter() - start) * 1000
+        return value
+
+    def run(self):
+        timings = {}
+        try:
+            frame = self._stage("convert", timings, qimage_to_rgb, self.image)
+            if frame is None:
+                return
+            model = self._stage("load_model", timings, load_detector, self.model_path)
+            if model is None:
+                return
+            # ultralytics expects BGR arrays
+            results = self._stage("predict", timings, lambda: model.predict(np.ascontiguousarray(frame[..., ::-1]), verbose=False))
+            if results is None or self.cancel_event.is_set():
+                return
+
+            result = results[0]
+            annotated = result.plot()[..., ::-1].copy()  # plot() draws in BGR
+            count = len(result.boxes) if result.boxes is not None else 0
+            summary = f"{count} RS board detection(s)"
+            if count:
+                summary += f", best conf {float(result.boxes.conf.max()):.2f}"
+            self.signals.finished.emit(self.request_id, annotated, summary, timings)
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
 
 class ImageTab(QWidget):
     def __init__(self):
@@ -134,6 +220,11 @@ class ImageTab(QWidget):
         self.run_button.clicked.connect(self.run_detection)
         controls_layout.addWidget(self.run_button)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # Busy indicator; stages are shown in the metadata label
+        self.progress_bar.setVisible(False)
+        controls_layout.addWidget(self.progress_bar)
+
         top_layout = QHBoxLayout()
         top_layout.addWidget(self.view, stretch=3)
         top_layout.addLayout(controls_layout, stretch=1)
@@ -146,9 +237,17 @@ class ImageTab(QWidget):
 
         self.image_pixmap_item = None
         self.brightness_effect = None
+        self.timers = StageTimers()
+
+        # One worker thread: a new run never competes with an older one for the CPU
+        self.detection_pool = QThreadPool()
+        self.detection_pool.setMaxThreadCount(1)
+        self.detection_task = None
+        self.detection_request = 0
 
     # ----------------- Methods -----------------
     def reset_image(self):
+        self.cancel_detection()
         self.brightness_slider.setEnabled(True)
         if not self.current_image_path:
             return
@@ -178,6 +277,7 @@ class ImageTab(QWidget):
         self.metadata_label.setText(f"Reset image: {self.current_image_path.name}")
 
     def show_random_image(self):
+        self.cancel_detection()
         self.brightness_slider.setEnabled(True)
         img_path = random.choice(self.images)
         self.current_image_path = img_path  # <-- store original path
@@ -265,49 +365,146 @@ class ImageTab(QWidget):
         self.teammate_index += 1
 
     def run_detection(self):
-        
+        """Start detection on a worker thread; clicking again while it runs cancels it"""
+        if self.detection_task is not None:
+            self.cancel_detection("Detection cancelled")
+            return
         if self.image_pixmap_item is None:
             return
 
-        rect = self.image_pixmap_item.boundingRect()
-        image = QImage(int(rect.width()), int(rect.height()), QImage.Format_ARGB32)
-        image.fill(Qt.transparent)
-        painter = QPainter(image)
-        self.scene.render(painter, target=rect, source=rect)
-        painter.end()
-        export_path = EXPORT_DIR / "exported_image.png"
-        image.save(str(export_path))
-
-        model_path = Path(r".\model\best.pt")
-        model = YOLO(str(model_path))
-        results = model.predict(
-            source=str(export_path),
-            save=True,
-            project=str(EXPORT_DIR),
-            name="yolo_results",
-            exist_ok=True
-        )
+        timers = self.timers
+        timers.begin_frame()
+
+        # The scene can only be rendered on the GUI thread; everything after runs on the worker
+        with timers.stage("render"):
+            rect = self.image_pixmap_item.boundingRect()
+            image = QImage(int(rect.width()), int(rect.height()), QImage.Format_ARGB32)
+            image.fill(Qt.transparent)
+            painter = QPainter(image)
+            self.scene.render(painter, target=rect, source=rect)
+            painter.end()
+
+        self.detection_request += 1
+        task = DetectionTask(self.detection_request, image, str(Path(r".\model\best.pt")))
+        task.signals.progress.connect(self.on_detection_progress)
+        task.signals.finished.connect(self.on_detection_finished)
+        task.signals.failed.connect(self.on_detection_failed)
+        self.detection_task = task
+        self.set_detecting(True)
+        self.detection_pool.start(task)
+
+    def set_detecting(self, running):
+        self.run_button.setText("Cancel Detection" if running else "Run Detection")
+        self.progress_bar.setVisible(running)
+
+    def cancel_detection(self, message=None):
+        """Drop the in-flight detection, if any; its result is ignored when it arrives"""
+        if self.detection_task is None:
+            return
+        self.detection_task.cancel()
+        self.detection_task = None
+        self.set_detecting(False)
+        if message:
+            self.metadata_label.setText(message)
+
+    def _is_current(self, request_id):
+        return self.detection_task is not None and request_id == self.detection_task.request_id
+
+    def on_detection_progress(self, request_id, stage):
+        if self._is_current(request_id):
+            labels = {"convert": "Preparing image", "load_model": "Loading model", "predict": "Running detection"}
+            self.metadata_label.setText(f"{labels.get(stage, stage)}...")
+
+    def on_detection_failed(self, request_id, message):
+        if not self._is_current(request_id):
+            return
+        self.detection_task = None
+        self.set_detecting(False)
+        QMessageBox.warning(self, "YOLO Error", f"Detection failed: {message}")
 
-        save_dir = Path(results[0].save_dir)
-        pred_file = save_dir / export_path.name
-        if not pred_file.exists():
-            candidates = list(save_dir.glob("*.*"))
-            if not candidates:
-                QMessageBox.warning(self, "YOLO Error", "No prediction image was generated.")
-                return
-            pred_file = candidates[-1]
+    def on_detection_finished(self, request_id, annotated, summary, timings):
+        if not self._is_current(request_id):
+            return
+        self.detection_task = None
+        self.set_detecting(False)
+
+        timers = self.timers
+        for stage, ms in timings.items():
+            timers.record(stage, ms)
+        with timers.stage("display"):
+            pred_pixmap = frame_to_pixmap(annotated)
+            self.scene.clear()
+            self.image_pixmap_item = QGraphicsPixmapItem(pred_pixmap)
+            self.scene.addItem(self.image_pixmap_item)
+            self.scene.setSceneRect(self.image_pixmap_item.boundingRect())
+            self.view.fitInView(self.image_pixmap_item.boundingRect(), Qt.KeepAspectRatio)
+        timers.end_frame()
+
+        metadata = f"Prediction: {summary}"
+        if timers.enabled and timers.trace:
+            last = timers.trace[-1]
+            stages = ", ".join(f"{k} {v:.0f} ms" for k, v in last.items() if k not in ("t", "total_ms"))
+            metadata += f"\nTiming: {last['total_ms']:.0f} ms total ({stages})"
+        self.metadata_label.setText(metadata)
 
-        pred_pixmap = QPixmap(str(pred_file))
-        self.scene.clear()
-        self.image_pixmap_item = QGraphicsPixmapItem(pred_pixmap)
-        self.scene.addItem(self.image_pixmap_item)
-        self.scene.setSceneRect(self.image_pixmap_item.boundingRect())
-        self.view.fitInView(self.image_pixmap_item.boundingRect(), Qt.KeepAspectRatio)
+        self.brightness_slider.setEnabled(False)
 
-        self.metadata_label.setText(f"Prediction displayed from {pred_file.name}")
 
-        self.brightness_slider.setEnabled(False)
+def load_detections(video_path):
+    """Per-frame boxes for a video from DETECTIONS_DIR, or {} if it hasn't been processed"""
+    detections_path = DETECTIONS_DIR / f"{Path(video_path).stem}_detections.jsonl"
+    detections = {}
+    if detections_path.exists():
+        with open(detections_path) as f:
+            for line in f:
+                record = json.loads(line)
+                detections[record["frame"]] = [box[:5] for box in record["boxes"]]
+    return detections
+
+def presence_segments(detections):
+    """[(start, end)] inclusive frame ranges where the board is detected"""
+    segments = []
+    for frame in sorted(f for f, boxes in detections.items() if boxes):
+        if segments and frame == segments[-1][1] + 1:
+            segments[-1] = (segments[-1][0], frame)
+        else:
+            segments.append((frame, frame))
+    return segments
 
+class TimelineStrip(QWidget):
+    """Thin bar marking where the board is present; click to seek"""
+    seek_requested = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.setFixedHeight(14)
+        self.frame_count = 0
+        self.segments = []
+        self.position = 0
+
+    def set_segments(self, frame_count, segments):
+        self.frame_count = frame_count
+        self.segments = segments
+        self.update()
+
+    def set_position(self, position):
+        self.position = position
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(220, 220, 220))
+        if self.frame_count > 0:
+            scale = self.width() / self.frame_count
+            for start, end in self.segments:
+                x = int(start * scale)
+                painter.fillRect(x, 0, max(1, int((end + 1) * scale) - x), self.height(), QColor(0, 170, 0))
+            painter.fillRect(int(self.position * scale), 0, 2, self.height(), QColor(0, 0, 255))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if self.frame_count > 0:
+            self.seek_requested.emit(int(event.x() * self.frame_count / max(self.width(), 1)))
 
 class VideoTab(QWidget):
     def __init__(self):
@@ -316,41 +513,54 @@ class VideoTab(QWidget):
         self.setLayout(self.layout)
 
         self.dropdown = QComboBox()
-        self.videos = list(VID_DIR.glob("*.avi"))
-        # self.videos = list(VID_DIR.glob("*.mp4"))
+        self.videos = sorted(p for p in VID_DIR.glob("*") if p.suffix.lower() in VIDEO_EXTENSIONS)
         if not self.videos:
-            raise FileNotFoundError(f"No .avi files found in {VID_DIR}")
-            # raise FileNotFoundError(f"No .mp4 files found in {VID_DIR}")
+            raise FileNotFoundError(f"No video files found in {VID_DIR}")
         for v in self.videos:
             self.dropdown.addItem(v.name, str(v))
         self.layout.addWidget(self.dropdown)
 
-        self.video_widget = QVideoWidget()
-        self.layout.addWidget(self.video_widget, stretch=1)
+        self.video_label = QLabel()
+        self.video_label.setAlignment(Qt.AlignCenter)
+        self.video_label.setMinimumSize(320, 240)
+        self.layout.addWidget(self.video_label, stretch=1)
 
-        self.player = QMediaPlayer(None, QMediaPlayer.VideoSurface)
-        self.player.setVideoOutput(self.video_widget)
+        self.reader = None
+        self.detections = {}
+        self.segments = []
+        self.position = 0
         self.dropdown.currentIndexChanged.connect(self.play_selected_video)
 
         self.play_button = QPushButton("Play")
         self.play_button.clicked.connect(self.play_pause)
-        
+
+        self.prev_segment_button = QPushButton("◀ Board")
+        self.prev_segment_button.clicked.connect(lambda: self.jump_to_segment(-1))
+        self.next_segment_button = QPushButton("Board ▶")
+        self.next_segment_button.clicked.connect(lambda: self.jump_to_segment(1))
+
         self.slider = QSlider(Qt.Horizontal)
         self.slider.setRange(0,0)
         self.slider.sliderMoved.connect(self.set_position)
 
+        self.timeline = TimelineStrip()
+        self.timeline.seek_requested.connect(self.set_position)
+
         self.timestamp = QLabel("00:00/00:00")
 
-        self.player.positionChanged.connect(self.update_position)
-        self.player.durationChanged.connect(self.update_duration)
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.advance_frame)
 
-        self.progress_layout = QHBoxLayout()
+        self.progress_layout = QVBoxLayout()
         self.progress_layout.addWidget(self.slider)
-        self.progress_layout.addWidget(self.timestamp)
+        self.progress_layout.addWidget(self.timeline)
 
         self.tools_layout = QHBoxLayout()
         self.tools_layout.addWidget(self.play_button)
-        self.tools_layout.addLayout(self.progress_layout)
+        self.tools_layout.addWidget(self.prev_segment_button)
+        self.tools_layout.addWidget(self.next_segment_button)
+        self.tools_layout.addLayout(self.progress_layout, stretch=1)
+        self.tools_layout.addWidget(self.timestamp)
 
         self.layout.addLayout(self.tools_layout)
         if self.videos:
@@ -361,48 +571,102 @@ class VideoTab(QWidget):
             return
         video_path = self.dropdown.itemData(index)
 
-        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(video_path)))
-        self.player.play()
-        self.player.pause()
+        self.timer.stop()
+        if self.reader is not None:
+            self.reader.release()
+        self.reader = KeyframeVideoReader(video_path)
+        self.timer.setInterval(int(1000 / self.reader.fps))
+
+        self.detections = load_detections(video_path)
+        self.segments = presence_segments(self.detections)
+        self.slider.setRange(0, max(len(self.reader) - 1, 0))
+        self.timeline.set_segments(len(self.reader), self.segments)
         self.play_button.setText("Play")
+        self.set_position(0)
 
-    def play_pause(self, index):
-        if index < 0:
+    def play_pause(self):
+        if self.reader is None:
             return
-        if self.player.state() == QMediaPlayer.PlayingState:
-            self.player.pause()
+        if self.timer.isActive():
+            self.timer.stop()
             self.play_button.setText("Play")
         else:
-            self.player.play()
+            self.timer.start()
             self.play_button.setText("Pause")
 
-    def update_position(self, position):
-        self.slider.setValue(position)
-        self.update_timestamp(position)
-
-    def update_duration(self, duration):
-        self.slider.setRange(0, duration)
-        self.total_duration = duration
-        self.update_timestamp(self.player.position())
+    def advance_frame(self):
+        if not self.show_frame(self.position + 1):
+            self.timer.stop()
+            self.play_button.setText("Play")
 
     def set_position(self, position):
-        self.player.setPosition(position)
+        self.show_frame(position)
 
-    def update_timestamp(self, current_ms):
+    def jump_to_segment(self, direction):
+        """Jump to the start of the next/previous stretch where the board is present"""
+        if direction > 0:
+            starts = [start for start, _ in self.segments if start > self.position]
+            target = starts[0] if starts else None
+        else:
+            starts = [start for start, _ in self.segments if start < self.position]
+            target = starts[-1] if starts else None
+        if target is not None:
+            self.show_frame(target)
+
+    def show_frame(self, index):
+        """Decode, annotate and display frame `index`; False past the end"""
+        if self.reader is None:
+            return False
+        frame = self.reader.get(index)
+        if frame is None:
+            return False
+        self.position = index
+
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        draw_boxes(frame, self.detections.get(index, []))
+        pixmap = frame_to_pixmap(frame)
+        self.video_label.setPixmap(pixmap.scaled(self.video_label.size(), Qt.KeepAspectRatio, Qt.FastTransformation))
+
+        self.slider.blockSignals(True)
+        self.slider.setValue(index)
+        self.slider.blockSignals(False)
+        self.timeline.set_position(index)
+        self.update_timestamp(index)
+        return True
+
+    def update_timestamp(self, frame_index):
         def ms_to_time(ms):
             seconds = ms // 1000
             minutes = seconds // 60
             seconds = seconds % 60
             return f"{minutes:02}:{seconds:02}"
 
-        current_time = ms_to_time(current_ms)
-        total_time = ms_to_time(self.player.duration())
+        fps = self.reader.fps
+        current_time = ms_to_time(int(frame_index * 1000 / fps))
+        total_time = ms_to_time(int(len(self.reader) * 1000 / fps))
         self.timestamp.setText(f"{current_time} / {total_time}")
 
+def draw_boxes(frame, boxes):
+    """Draw [x1, y1, x2, y2, conf] boxes on frame"""
+    for x1, y1, x2, y2, conf in boxes:
+        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+        label = f"RS Board: {conf:.2f}"
+        cv2.putText(frame, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+def frame_to_pixmap(frame):
+    """RGB numpy frame -> QPixmap"""
+    h, w, ch = frame.shape
+    qt_img = QImage(frame.data, w, h, ch * w, QImage.Format_RGB888)
+    return QPixmap.fromImage(qt_img)
+
 class VideoWidget(QWidget):
-    def __init__(self):
+    def __init__(self, service=None):
         super().__init__()
-        self.model = YOLO("model/best.pt")
+        # Capture and inference run in a DetectionService (in-process unless a
+        # service or RemoteDetectionClient is passed in); this widget only displays it
+        self.owns_service = service is None
+        self.service = service or DetectionService(0, "model/best.pt").start()
+        self.last_seq = 0
 
         self.setWindowTitle("OpenCV Video in PyQt5")
         self.label = QLabel()
@@ -417,17 +681,32 @@ class VideoWidget(QWidget):
         self.fail_icon = QPixmap("resources/Red_x.png")
         self.fail_icon = self.fail_icon.scaled(100, 100)
 
+        # Per-stage timing; costs nothing measurable until the overlay is enabled
+        self.timers = StageTimers()
+        self.perf_checkbox = QCheckBox("Performance overlay")
+        self.perf_checkbox.setChecked(self.timers.enabled)
+        self.perf_checkbox.toggled.connect(self.timers.set_enabled)
+        self.export_trace_button = QPushButton("Export Timing Trace")
+        self.export_trace_button.clicked.connect(self.export_trace)
+
+        perf_layout = QHBoxLayout()
+        perf_layout.addWidget(self.perf_checkbox)
+        perf_layout.addWidget(self.export_trace_button)
+        if getattr(self.service, "mode", None) == "step":
+            self.step_button = QPushButton("Next Frame")
+            self.step_button.clicked.connect(self.service.step)
+            perf_layout.addWidget(self.step_button)
+        perf_layout.addStretch()
+
         layout = QVBoxLayout()
         layout.addWidget(self.label)
         layout.addWidget(self.results)
+        layout.addLayout(perf_layout)
         self.setLayout(layout)
 
         self.update_result()
 
-        # OpenCV VideoCapture
-        self.cap = cv2.VideoCapture(0)  # 0 = default camera
-
-        # Timer to grab frames
+        # Timer to pick up the service's latest state
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
         self.timer.start(30)  # ~30 fps
@@ -439,38 +718,189 @@ class VideoWidget(QWidget):
             self.results.setPixmap(self.fail_icon)
 
     def update_frame(self):
-        ret, frame = self.cap.read()
-        if ret:
-            # Convert BGR (OpenCV) to RGB (Qt expects RGB)
-            results = self.model(frame, conf=0.25, verbose=False, device='cpu')
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        timers = self.timers
+        with timers.stage("fetch"):
+            state, frame = self.service.latest()
+        if state["seq"] == self.last_seq:
+            return
+        self.last_seq = state["seq"]
 
-            if len(results) > 0 and results[0].boxes is not None:
-                
-                boxes = results[0].boxes
-
-                if not boxes:
-                    self.rs_board_detected = False
-                    
-                for box in boxes:
-                    self.rs_board_detected = True
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    conf = box.conf[0].cpu().numpy()
-                    cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-                    label = f"RS Board: {conf:.2f}"
-                    cv2.putText(frame, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-
-            self.update_result()
-            h, w, ch = frame.shape
-            bytes_per_line = ch * w
-            qt_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.label.setPixmap(QPixmap.fromImage(qt_img))
+        timers.begin_frame()
+        self.rs_board_detected = state["rs_board_detected"]
+        self.update_result()
+        if frame is not None:
+            # Convert BGR (OpenCV) to RGB (Qt expects RGB); also copies the shared frame
+            with timers.stage("cvtColor"):
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+            with timers.stage("draw"):
+                # With the service's presence cascade, stage "classifier" means the detector was
+                # skipped: rs_board_detected is the classifier's call and there are no boxes to draw
+                draw_boxes(frame, state["boxes"])
+                if timers.enabled:
+                    self.draw_perf_overlay(frame, state)
+
+            with timers.stage("to_pixmap"):
+                self.label.setPixmap(frame_to_pixmap(frame))
+        timers.end_frame()
+
+    def draw_perf_overlay(self, frame, state):
+        """Draw FPS and per-stage ms (previous frames) in the top-left corner"""
+        lines = self.timers.summary_lines()
+        lines.append(f"service {state.get('fps', 0.0):5.1f} FPS ({state.get('stage') or 'detector'})")
+        lines += [f"{name:<10} {ms:6.1f} ms" for name, ms in state.get("timing_ms", {}).items()]
+        for i, line in enumerate(lines):
+            y = 20 + i * 18
+            cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+            cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+
+    def export_trace(self):
+        if not self.timers.trace:
+            QMessageBox.information(self, "No Trace", "Enable the performance overlay to collect timings first.")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Timing Trace", str(EXPORT_DIR / "realtime_trace.csv"),
+            "CSV (*.csv);;JSON Lines (*.jsonl)"
+        )
+        if path:
+            rows = self.timers.export_trace(path)
+            QMessageBox.information(self, "Trace Exported", f"Wrote {rows} frames to {path}")
 
     def closeEvent(self, event):
-        self.cap.release()
+        self.timer.stop()
+        if self.owns_service:
+            self.service.stop()
         super().closeEvent(event)
 
 
+class MultiStreamDetector(threading.Thread):
+    """Runs one batched model call over the newest frame of every capture, off the GUI thread
+
+    Like DetectionService for a single camera: each stream's latest
+    (seq, frame, boxes, detected) replaces the previous one, and the GUI
+    reads it with latest(i) whenever it repaints.
+    """
+
+    def __init__(self, captures, model, conf=0.25):
+        super().__init__(name="multi-camera-detector", daemon=True)
+        self.captures = captures
+        self.model = model
+        self.conf = conf
+        self._lock = threading.Lock()
+        self._results = [(0, None, [], False) for _ in captures]
+        self._stop_event = threading.Event()
+
+    def latest(self, index):
+        """Return (seq, frame, boxes, detected) of the newest processed frame of stream index"""
+        with self._lock:
+            return self._results[index]
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        last_seqs = [0] * len(self.captures)
+        while not self._stop_event.is_set():
+            # Collect the newest unseen frame of every stream
+            pending = []
+            for i, capture in enumerate(self.captures):
+                seq, frame, _ = capture.read_latest()
+                if frame is not None and seq != last_seqs[i]:
+                    last_seqs[i] = seq
+                    pending.append((i, seq, frame))
+            if not pending:
+                self._stop_event.wait(0.005)
+                continue
+
+            # One inference call for all streams
+            results = self.model([frame for _, _, frame in pending], conf=self.conf, verbose=False, device='cpu')
+
+            for (i, seq, frame), result in zip(pending, results):
+                boxes = []
+                if result.boxes is not None:
+                    boxes = [[*box.xyxy[0].cpu().numpy(), float(box.conf[0])] for box in result.boxes]
+                with self._lock:
+                    self._results[i] = (seq, frame, boxes, bool(boxes))
+
+class MultiCameraWidget(QWidget):
+    """Grid of camera/file/URL streams sharing one batched model call per frame
+
+    Inference runs on a MultiStreamDetector thread; the timer only paints the
+    latest frames and pass/fail state.
+    """
+
+    def __init__(self, sources, model=None):
+        super().__init__()
+        self.model = model or YOLO("model/best.pt")
+
+        self.pass_icon = QPixmap("resources/Green_check.svg").scaled(60, 60)
+        self.fail_icon = QPixmap("resources/Red_x.png").scaled(60, 60)
+
+        grid = QGridLayout()
+        self.setLayout(grid)
+        columns = math.ceil(math.sqrt(len(sources)))
+
+        self.streams = []
+        for i, source in enumerate(sources):
+            capture = CaptureThread(source)
+            if not capture.opened:
+                print(f"Warning: could not open source {source}")
+            capture.start()
+
+            name_label = QLabel(capture.name_for_display)
+            name_label.setAlignment(Qt.AlignCenter)
+            video_label = QLabel()
+            video_label.setAlignment(Qt.AlignCenter)
+            video_label.setMinimumSize(160, 120)
+            status_label = QLabel()
+            status_label.setAlignment(Qt.AlignCenter)
+            status_label.setPixmap(self.fail_icon)
+
+            cell = QVBoxLayout()
+            cell.addWidget(name_label)
+            cell.addWidget(video_label, stretch=1)
+            cell.addWidget(status_label)
+            grid.addLayout(cell, i // columns, i % columns)
+
+            self.streams.append({
+                'capture': capture,
+                'video_label': video_label,
+                'status_label': status_label,
+                'last_seq': 0,
+                'detected': False,
+            })
+
+        self.detector = MultiStreamDetector([stream['capture'] for stream in self.streams], self.model)
+        self.detector.start()
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_frames)
+        self.timer.start(30)
+
+    def update_frames(self):
+        for i, stream in enumerate(self.streams):
+            seq, frame, boxes, detected = self.detector.latest(i)
+            if frame is None or seq == stream['last_seq']:
+                continue
+            stream['last_seq'] = seq
+
+            # cvtColor also copies the frame the detector published
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            draw_boxes(frame, boxes)
+            if detected != stream['detected']:
+                stream['detected'] = detected
+                stream['status_label'].setPixmap(self.pass_icon if detected else self.fail_icon)
+
+            label = stream['video_label']
+            label.setPixmap(frame_to_pixmap(frame).scaled(label.size(), Qt.KeepAspectRatio, Qt.FastTransformation))
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.detector.stop()
+        for stream in self.streams:
+            stream['capture'].stop()
+        super().closeEvent(event)
+
 class DemoTab(QWidget):
     def __init__(self, text):
         super().__init__()
@@ -502,13 +932,11 @@ class ModelTab(QWidget):
         sam2_path = Path(r".\resources\sam2.gif")
         if not sam2_path.exists():
             raise FileNotFoundError(f"SAM2 image not found: {sam2_path}")
-        sam2_label.setPixmap(QPixmap(str(sam2_path)).scaledToWidth(400, Qt.SmoothTransformation))
 
-        scaling = gui_label.geometry()
-        movie_size = QSize(scaling.width()//2,scaling.height()//2)
+        # scripts/mp4ToGif.py exports the GIF at the 400 px display width, so frames are shown as decoded
         self.sam2_movie = QMovie(str(sam2_path))
+        self.sam2_movie.setCacheMode(QMovie.CacheAll)
         sam2_label.setMovie(self.sam2_movie)
-        self.sam2_movie.setScaledSize(movie_size)
         self.sam2_movie.setSpeed(200)
         self.sam2_movie.start()
 
@@ -546,7 +974,7 @@ class ModelTab(QWidget):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, sources=None, service=None):
         super().__init__()
         self.setWindowTitle("Hackathon Demo GUI")
         self.setGeometry(200, 200, 1000, 800)
@@ -556,11 +984,37 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(VideoTab(), "Video")
         self.tabs.addTab(BraggsPeakTab(), "Physics")
         self.tabs.addTab(ModelTab(), "Model")
-        self.tabs.addTab(VideoWidget(), "Real-time")
+        self.tabs.addTab(VideoWidget(service), "Real-time")
+        if sources:
+            self.tabs.addTab(MultiCameraWidget(sources), "Multi-camera")
         self.showMaximized()
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    sys.exit(app.exec_())
+    parser = argparse.ArgumentParser(description="Hackathon demo GUI")
+    parser.add_argument("--sources", nargs="+",
+                        help="Add a multi-camera tab for these camera indices, video files or stream URLs")
+    parser.add_argument("--service-url",
+                        help="Show a running detection_service.py (e.g. http://127.0.0.1:8765) instead of starting one")
+    parser.add_argument("--serve-port", type=int,
+                        help="Also publish the GUI's own detection service over HTTP on this port")
+    parser.add_argument("--source", default="0",
+                        help="Real-time tab input: camera index, video file, frame directory or recorded session (default: 0)")
+    parser.add_argument("--replay-mode", choices=REPLAY_MODES[1:],
+                        help="Replay speed for non-camera sources (default: realtime)")
+    parser.add_argument("--record", help="Record the Real-time tab's raw frames and detections to this directory")
+    # Leave Qt's own options (e.g. -style) for QApplication
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    if args.service_url:
+        service = RemoteDetectionClient(args.service_url).start()
+    else:
+        service = DetectionService(args.source, "model/best.pt", mode=args.replay_mode,
+                                   record_dir=args.record).start()
+        if args.serve_port:
+            serve(service, port=args.serve_port)
+    window = MainWindow(sources=args.sources, service=service)
+    exit_code = app.exec_()
+    service.stop()
+    sys.exit(exit_code)
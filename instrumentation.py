@@ -0,0 +1,151 @@
+"""
+Lightweight per-stage timing for the GUI pipelines
+Named timers, rolling histograms, FPS and CSV/JSONL trace export.
+When disabled, stage() hands back a shared no-op context manager.
+"""
+
+import csv
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+# Histogram bucket upper edges in ms
+HISTOGRAM_EDGES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, float("inf"))
+
+# Set RSB_PERF=1 to start with timers enabled
+PERF_ENABLED_DEFAULT = os.environ.get("RSB_PERF", "0") == "1"
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    __slots__ = ("timers", "name", "start")
+
+    def __init__(self, timers, name):
+        self.timers = timers
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timers.record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+class StageTimers:
+    """Rolling timings for named pipeline stages
+
+    Usage:
+        timers.begin_frame()
+        with timers.stage("inference"):
+            ...
+        timers.end_frame()
+    """
+
+    def __init__(self, enabled=PERF_ENABLED_DEFAULT, window=300, trace_length=10000):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}  # stage name -> deque of ms
+        self.frame_times = deque(maxlen=window)
+        self.trace = deque(maxlen=trace_length)
+        self._frame = None
+        self._frame_start = None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self._frame = None
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, ms):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(ms)
+        if self._frame is not None:
+            self._frame[name] = self._frame.get(name, 0.0) + ms
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._frame_start = time.perf_counter()
+        self._frame = {}
+
+    def end_frame(self):
+        if not self.enabled or self._frame is None:
+            return
+        now = time.perf_counter()
+        self.frame_times.append(now)
+        record = {"t": time.time(), "total_ms": (now - self._frame_start) * 1000}
+        record.update(self._frame)
+        self.trace.append(record)
+        self._frame = None
+
+    def fps(self):
+        if len(self.frame_times) < 2:
+            return 0.0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        """Per stage mean/p50/p95 over the rolling window, in ms"""
+        result = {}
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.fromiter(samples, dtype=float)
+            result[name] = {
+                "mean": float(values.mean()),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+            }
+        return result
+
+    def histograms(self):
+        """Per stage counts in HISTOGRAM_EDGES_MS buckets over the rolling window"""
+        result = {}
+        edges = np.array(HISTOGRAM_EDGES_MS)
+        for name, samples in self.samples.items():
+            values = np.fromiter(samples, dtype=float)
+            buckets = np.searchsorted(edges, values, side="left")
+            result[name] = np.bincount(buckets, minlength=len(edges)).tolist()
+        return result
+
+    def summary_lines(self):
+        """Short text lines for an on-screen overlay"""
+        lines = [f"FPS {self.fps():5.1f}"]
+        for name, stat in self.stats().items():
+            lines.append(f"{name:<10} {stat['mean']:6.1f} ms (p95 {stat['p95']:.1f})")
+        return lines
+
+    def export_trace(self, path):
+        """Write the per-frame trace as .csv or .jsonl (by extension); returns the row count"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        rows = list(self.trace)
+        if path.suffix.lower() == ".csv":
+            fields = ["t", "total_ms"] + sorted({k for row in rows for k in row} - {"t", "total_ms"})
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(path, "w") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+        return len(rows)
@@ -0,0 +1,283 @@
+"""
+Batch image perturbations for robustness testing
+NumPy-vectorised versions of the ImageTab effects (QGraphicsColorizeEffect
+brightness, mosquito/teammate overlays) plus tint, blur and noise, and a
+runner that perturbs the test split at several strengths in worker processes,
+detects in batches and reports detection rate against strength.
+
+Usage: python perturb.py [--images dataset/images/test] [--kinds brightness occlude ...]
+                         [--levels 0.25 0.5 0.75 1.0] [--workers N] [--output robustness.csv]
+"""
+
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+RESOURCES_DIR = Path("resources")
+OCCLUDER_PATHS = [RESOURCES_DIR / "mosquito.png", *sorted((RESOURCES_DIR / "teammates").glob("*.png"))]
+
+# cv2.GaussianBlur handles at most this many channels per call
+_MAX_CHANNELS = 510
+
+def colorize(batch, color, strength):
+    """QGraphicsColorizeEffect on a (N, H, W, 3) BGR uint8 batch
+
+    Like Qt: grayscale (qGray weights), screen-composite with `color` (RGB),
+    then blend over the original with opacity `strength`.
+    """
+    if strength <= 0:
+        return batch
+    batch = batch.astype(np.float32)
+    gray = (batch[..., 2] * 11 + batch[..., 1] * 16 + batch[..., 0] * 5) / 32
+    bgr = np.array(color[::-1], dtype=np.float32)
+    screened = 255 - (255 - gray[..., None]) * (255 - bgr) / 255
+    out = batch + (screened - batch) * min(strength, 1.0)
+    return np.clip(out + 0.5, 0, 255).astype(np.uint8)
+
+def slider_effect(value):
+    """(color, strength) the ImageTab brightness slider (0-100, 50 neutral) applies"""
+    strength = (value - 50) / 50.0
+    if strength >= 0:
+        return (255, 255, 255), min(strength, 1.0)
+    return (0, 0, 0), min(-strength, 1.0)
+
+def gaussian_blur(batch, sigma):
+    """Blur every image of the batch; images are stacked along channels so one call blurs many"""
+    if sigma <= 0:
+        return batch
+    n, h, w, c = batch.shape
+    stacked = batch.transpose(1, 2, 0, 3).reshape(h, w, n * c)
+    parts = [cv2.GaussianBlur(np.ascontiguousarray(stacked[..., i:i + _MAX_CHANNELS]), (0, 0), sigma)
+             for i in range(0, n * c, _MAX_CHANNELS)]
+    blurred = np.concatenate([p.reshape(h, w, -1) for p in parts], axis=2)
+    return blurred.reshape(h, w, n, c).transpose(2, 0, 1, 3)
+
+def gaussian_noise(batch, sigma, rng):
+    if sigma <= 0:
+        return batch
+    noise = rng.normal(0.0, sigma, batch.shape).astype(np.float32)
+    return np.clip(batch.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+def load_occluders(paths=OCCLUDER_PATHS):
+    """Occluder images as (BGR, alpha in [0, 1]) pairs"""
+    occluders = []
+    for path in paths:
+        image = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            continue
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+        if image.shape[2] == 3:
+            image = np.dstack([image, np.full(image.shape[:2], 255, np.uint8)])
+        occluders.append((image[..., :3].astype(np.float32), image[..., 3:].astype(np.float32) / 255))
+    return occluders
+
+def paste_occluders(batch, occluders, strength, rng):
+    """Alpha-composite one random occluder per image, `strength` * 50% of the image width, at a random spot"""
+    if strength <= 0 or not occluders:
+        return batch
+    batch = batch.copy()
+    n, h, w, _ = batch.shape
+    target_w = max(2, int(w * 0.5 * min(strength, 1.0)))
+    for i in range(n):
+        color, alpha = occluders[rng.integers(len(occluders))]
+        scale = target_w / color.shape[1]
+        size = (target_w, max(2, int(color.shape[0] * scale)))
+        color = cv2.resize(color, size, interpolation=cv2.INTER_AREA)
+        alpha = cv2.resize(alpha, size, interpolation=cv2.INTER_AREA)[..., None]
+        oh, ow = min(size[1], h), min(size[0], w)
+        y = rng.integers(0, h - oh + 1)
+        x = rng.integers(0, w - ow + 1)
+        region = batch[i, y:y + oh, x:x + ow].astype(np.float32)
+        blended = region + (color[:oh, :ow] - region) * alpha[:oh, :ow]
+        batch[i, y:y + oh, x:x + ow] = (blended + 0.5).astype(np.uint8)
+    return batch
+
+# name -> fn(batch, strength in [0, 1], rng, occluders); strength 0 is always the unchanged image
+PERTURBATIONS = {
+    # The two halves of the ImageTab slider
+    "brightness": lambda batch, s, rng, occ: colorize(batch, (255, 255, 255), s),
+    "darken": lambda batch, s, rng, occ: colorize(batch, (0, 0, 0), s),
+    "tint": lambda batch, s, rng, occ: colorize(batch, (255, 140, 0), s),
+    "blur": lambda batch, s, rng, occ: gaussian_blur(batch, 8.0 * s),
+    "noise": lambda batch, s, rng, occ: gaussian_noise(batch, 50.0 * s, rng),
+    "occlude": lambda batch, s, rng, occ: paste_occluders(batch, occ, s, rng),
+}
+
+def perturb(batch, kind, strength, rng=None, occluders=None):
+    """Apply one perturbation to a (N, H, W, 3) batch or a single (H, W, 3) image"""
+    single = batch.ndim == 3
+    if single:
+        batch = batch[None]
+    rng = rng if rng is not None else np.random.default_rng()
+    if kind == "occlude" and occluders is None:
+        occluders = load_occluders()
+    out = PERTURBATIONS[kind](batch, strength, rng, occluders)
+    return out[0] if single else out
+
+def load_boxes(label_path, width, height):
+    """YOLO label file -> list of xyxy pixel boxes (empty when the file is missing or empty)"""
+    boxes = []
+    if label_path.exists():
+        for line in label_path.read_text().splitlines():
+            parts = line.split()
+            if len(parts) >= 5:
+                cx, cy, bw, bh = (float(v) for v in parts[1:5])
+                boxes.append(((cx - bw / 2) * width, (cy - bh / 2) * height,
+                              (cx + bw / 2) * width, (cy + bh / 2) * height))
+    return boxes
+
+def iou(a, b):
+    iw = min(a[2], b[2]) - max(a[0], b[0])
+    ih = min(a[3], b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+def make_variants(paths, kind, strength, seed, save_dir=None):
+    """Worker: load images, perturb same-sized groups as one batch; returns (paths, images)"""
+    rng = np.random.default_rng(seed)
+    occluders = load_occluders() if kind == "occlude" else None
+    images = [cv2.imread(str(p)) for p in paths]
+    groups = {}
+    for i, image in enumerate(images):
+        if image is not None:
+            groups.setdefault(image.shape, []).append(i)
+
+    out_paths, out_images = [], []
+    for indices in groups.values():
+        batch = perturb(np.stack([images[i] for i in indices]), kind, strength, rng, occluders)
+        for i, image in zip(indices, batch):
+            out_paths.append(paths[i])
+            out_images.append(image)
+            if save_dir:
+                target = Path(save_dir) / f"{kind}_{strength:.2f}" / Path(paths[i]).name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                cv2.imwrite(str(target), image)
+    return kind, strength, out_paths, out_images
+
+def score(results, paths, labels_dir, conf, iou_threshold):
+    """Per-image (has_target, hit, false_positive, best_conf) for one detector batch"""
+    rows = []
+    for path, result in zip(paths, results):
+        height, width = result.orig_shape
+        truth = load_boxes(Path(labels_dir) / (Path(path).stem + ".txt"), width, height)
+        preds = []
+        if result.boxes is not None and len(result.boxes):
+            keep = result.boxes.conf.cpu().numpy() >= conf
+            preds = result.boxes.xyxy.cpu().numpy()[keep].tolist()
+            best = float(result.boxes.conf.cpu().numpy()[keep].max()) if keep.any() else 0.0
+        else:
+            best = 0.0
+        hit = bool(truth) and all(any(iou(t, p) >= iou_threshold for p in preds) for t in truth)
+        rows.append((bool(truth), hit, not truth and bool(preds), best))
+    return rows
+
+def run(args):
+    from ultralytics import YOLO
+
+    paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    if args.max_images:
+        paths = paths[:args.max_images]
+    if not paths:
+        raise FileNotFoundError(f"No images found in {args.images}")
+    labels_dir = args.labels or str(Path(args.images).parents[1] / "labels" / Path(args.images).name)
+
+    model = YOLO(args.model)
+    # Strength 0 is the same clean image for every kind, so it is scored once as "none"
+    levels = [level for level in args.levels if level > 0]
+    tasks = [("none", 0.0)] + [(kind, level) for kind in args.kinds for level in levels]
+    chunks = [paths[i:i + args.chunk] for i in range(0, len(paths), args.chunk)]
+    jobs = [(kind, level, chunk, args.seed + n) for n, ((kind, level), chunk) in
+            enumerate((task, chunk) for task in tasks for chunk in chunks)]
+    totals = {task: [0, 0, 0, 0, 0.0] for task in tasks}  # targets, hits, negatives, false positives, conf sum
+    print(f"{len(paths)} images x {len(tasks)} settings = {len(paths) * len(tasks)} variants on {args.workers} workers")
+
+    # Keep a bounded number of chunks in flight so generation runs ahead of detection without piling up
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        pending = set()
+        jobs_iter = iter(jobs)
+        done_variants = 0
+        while True:
+            while len(pending) < args.workers * 2:
+                job = next(jobs_iter, None)
+                if job is None:
+                    break
+                kind, level, chunk, seed = job
+                pending.add(pool.submit(make_variants, chunk, kind if kind != "none" else "brightness",
+                                        level, seed, args.save_dir))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                kind, level, chunk_paths, images = future.result()
+                task = ("none", 0.0) if level == 0.0 else (kind, level)
+                results = model.predict(images, conf=args.conf, batch=args.batch, verbose=False, device='cpu')
+                for has_target, hit, false_positive, best in score(results, chunk_paths, labels_dir,
+                                                                   args.conf, args.iou):
+                    stats = totals[task]
+                    stats[0] += has_target
+                    stats[1] += hit
+                    stats[2] += not has_target
+                    stats[3] += false_positive
+                    stats[4] += best
+                done_variants += len(images)
+                print(f"  {done_variants} variants scored", end="\r")
+    print()
+
+    rows = []
+    for (kind, level), (targets, hits, negatives, false_positives, conf_sum) in totals.items():
+        rows.append({
+            "perturbation": kind,
+            "strength": level,
+            "detection_rate": round(hits / targets, 4) if targets else None,
+            "false_positive_rate": round(false_positives / negatives, 4) if negatives else None,
+            "mean_top_conf": round(conf_sum / max(targets + negatives, 1), 4),
+            "images": targets + negatives,
+        })
+    return rows
+
+def print_table(rows):
+    header = f"{'perturbation':<14}{'strength':>9}{'det rate':>10}{'FP rate':>9}{'top conf':>10}{'images':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        det = f"{row['detection_rate']:.3f}" if row['detection_rate'] is not None else "-"
+        fp = f"{row['false_positive_rate']:.3f}" if row['false_positive_rate'] is not None else "-"
+        print(f"{row['perturbation']:<14}{row['strength']:>9.2f}{det:>10}{fp:>9}{row['mean_top_conf']:>10.3f}{row['images']:>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detector robustness against synthetic perturbations")
+    parser.add_argument("--images", default="dataset/images/test", help="Image directory (default: dataset/images/test)")
+    parser.add_argument("--labels", help="YOLO label directory (default: the matching labels/ split)")
+    parser.add_argument("--model", default="model/best.pt", help="Detector weights (default: model/best.pt)")
+    parser.add_argument("--kinds", nargs="+", default=list(PERTURBATIONS), choices=list(PERTURBATIONS),
+                        help="Perturbations to test (default: all)")
+    parser.add_argument("--levels", nargs="+", type=float, default=[0.25, 0.5, 0.75, 1.0],
+                        help="Strengths in (0, 1] (default: 0.25 0.5 0.75 1.0)")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold (default: 0.25)")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for a box to count as found (default: 0.5)")
+    parser.add_argument("--batch", type=int, default=16, help="Detector batch size (default: 16)")
+    parser.add_argument("--chunk", type=int, default=32, help="Images per worker task (default: 32)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="Variant generator processes (default: CPU cores - 1)")
+    parser.add_argument("--max-images", type=int, help="Use only the first N images")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--save-dir", help="Also write every variant under this directory")
+    parser.add_argument("--output", default="robustness.csv", help="CSV report (default: robustness.csv)")
+    args = parser.parse_args()
+
+    rows = run(args)
+    print_table(rows)
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Report saved to {args.output}")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Decode benchmark for intermediate video formats
+Converts each clip to the given profiles and compares file size, sequential
+decode FPS and random seek latency with OpenCV, for choosing an export profile
+Usage: python benchDecode.py CLIP [CLIP ...] [--profiles avi-raw avi-mjpeg mp4-intra] [--seeks 30]
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from convert import PROFILES, convert, collect_inputs
+
+def decode_fps(video_path, max_frames):
+    """Frames per second decoding from the start, up to max_frames"""
+    cap = cv2.VideoCapture(str(video_path))
+    frames = 0
+    start = time.perf_counter()
+    while frames < max_frames:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        frames += 1
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return frames / elapsed if elapsed > 0 else 0.0
+
+def seek_latency_ms(video_path, seeks, seed=0):
+    """Median and p95 ms to seek to a random frame and decode it"""
+    cap = cv2.VideoCapture(str(video_path))
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    rng = random.Random(seed)
+    timings = []
+    for _ in range(seeks):
+        target = rng.randrange(max(frame_count, 1))
+        start = time.perf_counter()
+        cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+        cap.read()
+        timings.append((time.perf_counter() - start) * 1000)
+    cap.release()
+    return float(np.median(timings)), float(np.percentile(timings, 95))
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare intermediate video formats for decoding and seeking')
+    parser.add_argument('clips', nargs='+', help='Source clips or directories')
+    parser.add_argument('--profiles', nargs='+', default=['avi-raw', 'avi-mjpeg', 'mp4-intra'],
+                        choices=sorted(PROFILES), help='Profiles to compare (default: avi-raw avi-mjpeg mp4-intra)')
+    parser.add_argument('--max-frames', type=int, default=600, help='Frames decoded for the FPS measurement (default: 600)')
+    parser.add_argument('--seeks', type=int, default=30, help='Random seeks per file (default: 30)')
+    parser.add_argument('--keep', help='Keep converted files in this directory instead of a temp dir')
+    args = parser.parse_args()
+
+    work_dir = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="bench_decode_"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    header = f"{'clip':<20}{'format':<12}{'size MB':>10}{'x source':>10}{'decode FPS':>12}{'seek p50 ms':>13}{'seek p95 ms':>13}"
+    print(header)
+    print("-" * len(header))
+    try:
+        for clip in collect_inputs(args.clips):
+            source_size = clip.stat().st_size
+            candidates = [("source", clip)]
+            for profile in args.profiles:
+                extension, _ = PROFILES[profile]
+                output_path = work_dir / f"{clip.stem}_{profile}{extension}"
+                _, status = convert(clip, output_path, profile)
+                if status.startswith("failed"):
+                    print(f"{clip.name:<20}{profile:<12} {status}")
+                    continue
+                candidates.append((profile, output_path))
+
+            for name, path in candidates:
+                size = path.stat().st_size
+                fps = decode_fps(path, args.max_frames)
+                p50, p95 = seek_latency_ms(path, args.seeks)
+                print(f"{clip.name:<20}{name:<12}{size / 1e6:>10.1f}{size / source_size:>10.1f}"
+                      f"{fps:>12.1f}{p50:>13.1f}{p95:>13.1f}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
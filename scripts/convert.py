@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Parallel ffmpeg conversion runner
+Builds ffmpeg argument lists (no shell, so paths with spaces are safe), runs
+several conversions at once and skips outputs that are already up to date
+Usage: python convert.py INPUT [INPUT ...] --profile PROFILE [--output-dir DIR] [--jobs N] [--check mtime|hash]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+VIDEO_EXTENSIONS = {'.mov', '.mp4', '.avi', '.mkv', '.m4v'}
+MANIFEST_NAME = ".convert_manifest.json"
+
+# name -> (output extension, ffmpeg output arguments)
+PROFILES = {
+    # Container change only: copies the streams, no re-encode
+    "mp4-remux": (".mp4", ["-map", "0:v:0", "-map", "0:a?", "-c", "copy", "-movflags", "+faststart"]),
+    "mp4": (".mp4", ["-c:v", "libx264", "-preset", "medium", "-crf", "20", "-pix_fmt", "yuv420p",
+                     "-c:a", "aac", "-movflags", "+faststart"]),
+    # Uncompressed AVI as movToAVI.py used to produce
+    "avi-raw": (".avi", ["-c:v", "rawvideo", "-c:a", "pcm_s16le"]),
+    # Intra-only exports (movToAVI.py): every frame is a keyframe, so any seek decodes one frame
+    "avi-mjpeg": (".avi", ["-c:v", "mjpeg", "-q:v", "3", "-pix_fmt", "yuvj420p", "-c:a", "pcm_s16le"]),
+    "mp4-intra": (".mp4", ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-g", "1",
+                           "-pix_fmt", "yuv420p", "-c:a", "aac", "-movflags", "+faststart"]),
+}
+
+# Profiles to fall back to when a stream copy is impossible (e.g. codec not allowed in the container)
+FALLBACKS = {"mp4-remux": "mp4"}
+
+# ffmpeg threads per job; jobs default to cores / threads so the machine stays busy but not oversubscribed
+THREADS_PER_JOB = 4
+
+def default_jobs(threads_per_job=THREADS_PER_JOB):
+    return max(1, (os.cpu_count() or 1) // threads_per_job)
+
+def ffmpeg_command(input_path, output_path, output_args, threads=THREADS_PER_JOB, input_args=()):
+    """ffmpeg argument list for one conversion"""
+    return ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            *input_args, "-i", str(input_path),
+            *output_args, "-threads", str(threads), str(output_path)]
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class Manifest:
+    """Per output directory record of which input hash and arguments produced each output"""
+
+    def __init__(self, directory):
+        self.path = Path(directory) / MANIFEST_NAME
+        self._lock = threading.Lock()
+        try:
+            self.entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, output_path):
+        with self._lock:
+            return self.entries.get(Path(output_path).name)
+
+    def set(self, output_path, entry):
+        with self._lock:
+            self.entries[Path(output_path).name] = entry
+            self.path.write_text(json.dumps(self.entries, indent=2))
+
+def is_up_to_date(input_path, output_path, output_args, check, manifest):
+    """mtime: output newer than input; hash: input content and arguments unchanged since the last run"""
+    if not Path(output_path).exists():
+        return False
+    if check == "mtime":
+        return Path(output_path).stat().st_mtime >= Path(input_path).stat().st_mtime
+    entry = manifest.get(output_path) if manifest else None
+    return bool(entry) and entry["args"] == list(output_args) and entry["input_hash"] == file_hash(input_path)
+
+def convert(input_path, output_path, profile, check="mtime", manifest=None, threads=THREADS_PER_JOB):
+    """Run one conversion with fallback; returns (output_path, status) with status 'skipped', 'done' or an error"""
+    requested = profile
+    extension, requested_args = PROFILES[profile]
+    output_args = requested_args
+    if is_up_to_date(input_path, output_path, requested_args, check, manifest):
+        return output_path, "skipped"
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(output_path).with_name(f".{Path(output_path).stem}.partial{extension}")
+    result = subprocess.run(ffmpeg_command(input_path, tmp_path, output_args, threads),
+                            capture_output=True, text=True)
+
+    if result.returncode != 0 and profile in FALLBACKS:
+        profile = FALLBACKS[profile]
+        _, output_args = PROFILES[profile]
+        result = subprocess.run(ffmpeg_command(input_path, tmp_path, output_args, threads),
+                                capture_output=True, text=True)
+
+    if result.returncode != 0:
+        tmp_path.unlink(missing_ok=True)
+        return output_path, f"failed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}"
+
+    # Only complete outputs get the final name, so an interrupted run never looks up to date
+    os.replace(tmp_path, output_path)
+    if manifest is not None:
+        manifest.set(output_path, {"input_hash": file_hash(input_path), "args": list(requested_args), "profile": profile})
+    return output_path, "done" if profile == requested else f"done (fell back to {profile})"
+
+def run_jobs(tasks, jobs=None, check="mtime", threads=THREADS_PER_JOB):
+    """Run (input, output, profile) conversions concurrently and print progress; returns failure count"""
+    if shutil.which("ffmpeg") is None:
+        raise FileNotFoundError("ffmpeg not found on PATH")
+
+    jobs = jobs or default_jobs(threads)
+    manifests = {}
+    if check == "hash":
+        for _, output_path, _ in tasks:
+            directory = Path(output_path).parent
+            directory.mkdir(parents=True, exist_ok=True)
+            manifests.setdefault(directory, Manifest(directory))
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(convert, input_path, output_path, profile, check,
+                        manifests.get(Path(output_path).parent), threads): input_path
+            for input_path, output_path, profile in tasks
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            output_path, status = future.result()
+            if status.startswith("failed"):
+                failures += 1
+            print(f"[{i}/{len(tasks)}] {Path(futures[future]).name} -> {Path(output_path).name}: {status}")
+    return failures
+
+def collect_inputs(paths, extensions=VIDEO_EXTENSIONS):
+    inputs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            inputs.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in extensions))
+        elif path.exists():
+            inputs.append(path)
+        else:
+            print(f"Warning: {path} not found")
+    return inputs
+
+def plan(inputs, profile, output_dir=None):
+    """(input, output, profile) tasks; outputs go next to the input unless output_dir is given"""
+    extension, _ = PROFILES[profile]
+    tasks = []
+    for input_path in inputs:
+        directory = Path(output_dir) if output_dir else input_path.parent
+        output_path = directory / (input_path.stem + extension)
+        if output_path.resolve() == input_path.resolve():
+            print(f"Warning: skipping {input_path}, output would overwrite it")
+            continue
+        tasks.append((input_path, output_path, profile))
+    return tasks
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert videos with ffmpeg, several at a time')
+    parser.add_argument('inputs', nargs='+', help='Video files or directories')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='mp4-remux', help='Output profile (default: mp4-remux)')
+    parser.add_argument('--output-dir', help='Output directory (default: next to each input)')
+    parser.add_argument('--jobs', type=int, help=f'Concurrent conversions (default: CPU cores / {THREADS_PER_JOB})')
+    parser.add_argument('--threads', type=int, default=THREADS_PER_JOB, help=f'ffmpeg threads per job (default: {THREADS_PER_JOB})')
+    parser.add_argument('--check', choices=['mtime', 'hash'], default='mtime', help='How to decide an output is up to date (default: mtime)')
+    args = parser.parse_args()
+
+    tasks = plan(collect_inputs(args.inputs), args.profile, args.output_dir)
+    if not tasks:
+        print("Nothing to convert")
+        return
+    failures = run_jobs(tasks, args.jobs, args.check, args.threads)
+    print(f"Conversion complete! ({len(tasks) - failures}/{len(tasks)} ok)")
+
+if __name__ == "__main__":
+    main()
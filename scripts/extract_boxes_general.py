@@ -2,14 +2,25 @@
 """
 General bounding box extraction script for any video with SAM2 annotations
 Usage: python extract_boxes_general.py --video VIDEO_FILE --annotations ANNOTATION_FILE [options]
+
+The annotation file may list several objects to track in one pass:
+    {"image_size": [W, H], "objects": [
+        {"name": "rs_board", "class_id": 0, "foreground_points": [...], "background_points": [...]},
+        {"name": "couch", "class_id": 1, "foreground_points": [...], "background_points": [...]}]}
+Each frame record then carries an 'objects' list with every object's box and class_id.
 """
 
 import json
 import cv2
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Headless: plots are saved, never shown
 import matplotlib.pyplot as plt
 import argparse
+import itertools
 import os
+import tempfile
+import time
 from pathlib import Path
 from ultralytics.models.sam import SAM2VideoPredictor
 
@@ -78,6 +89,437 @@ def create_subset_video(input_video, output_video, max_frames):
     print(f"Created subset video with {frame_count} frames: {output_video}")
     return frame_count
 
+def write_frames_video(input_video, output_video, step=1):
+    """Write every step-th frame (and always the last one) to output_video
+
+    Returns (indices of the written frames in the input video, total input frames).
+    """
+    cap = cv2.VideoCapture(input_video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    out = cv2.VideoWriter(output_video, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+
+    written = []
+    frame_idx = 0
+    last_frame = None
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_idx % step == 0:
+            out.write(frame)
+            written.append(frame_idx)
+        last_frame = frame
+        frame_idx += 1
+
+    # The last frame is always tracked so no frames have to be extrapolated
+    if last_frame is not None and written[-1] != frame_idx - 1:
+        out.write(last_frame)
+        written.append(frame_idx - 1)
+
+    cap.release()
+    out.release()
+    return written, frame_idx
+
+def write_clip(input_video, output_video, start, stop, reverse=False):
+    """Write frames start..stop (inclusive) to output_video, optionally in reverse order"""
+    cap = cv2.VideoCapture(input_video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    frames = []
+    for _ in range(stop - start + 1):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    indices = list(range(start, start + len(frames)))
+    if reverse:
+        frames.reverse()
+        indices.reverse()
+    height, width = frames[0].shape[:2]
+    out = cv2.VideoWriter(output_video, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for frame in frames:
+        out.write(frame)
+    out.release()
+    return indices
+
+def load_objects(data, max_fg=None, max_bg=None):
+    """Object prompt sets from an annotation file
+
+    Files may carry an 'objects' list, each entry with its own foreground and
+    background points and an optional class_id and name. Files written by the
+    point annotation GUI have a single top-level set, which becomes object 0
+    with class 0.
+    """
+    entries = data.get('objects') or [{
+        'foreground_points': data['foreground_points'],
+        'background_points': data['background_points']
+    }]
+    objects = []
+    for i, entry in enumerate(entries):
+        objects.append({
+            'object_id': i,
+            'class_id': int(entry.get('class_id', i)),
+            'name': entry.get('name', f'object_{i}'),
+            'foreground': entry['foreground_points'][:max_fg],
+            'background': entry['background_points'][:max_bg],
+            'available_foreground': len(entry['foreground_points']),
+            'available_background': len(entry['background_points'])
+        })
+    return objects
+
+def build_point_prompts(objects, scale=1.0):
+    """points/labels for one predictor call with one prompt set per object
+
+    Sets are padded to equal length with label -1, which SAM's prompt encoder ignores.
+    """
+    sets = [
+        ([[x * scale, y * scale] for x, y in obj['foreground'] + obj['background']],
+         [1] * len(obj['foreground']) + [0] * len(obj['background']))
+        for obj in objects
+    ]
+    length = max(len(points) for points, _ in sets)
+    points = [p + [[0.0, 0.0]] * (length - len(p)) for p, _ in sets]
+    labels = [l + [-1] * (length - len(l)) for _, l in sets]
+    return points, labels
+
+def frames_from_results(results, frame_indices, coverage_threshold, num_objects=1, verbose=True):
+    """Per-object lists of per-frame bbox records for SAM2 results
+
+    frame_indices maps result i to its frame in the video. Results must come from
+    ObjectMaskPredictor, which keeps one mask per object, so mask j is object j.
+    A frame with a different number of masks cannot be attributed and is
+    recorded as no detection for every object.
+    """
+    tracks = [[] for _ in range(num_objects)]
+    valid_frames = 0
+
+    for frame_idx, result in zip(frame_indices, results):
+        frame_objects = [{
+            'frame_index': frame_idx,
+            'bbox': None,
+            'mask_coverage': 0.0,
+            'has_detection': False,
+            'interpolated': False
+        } for _ in range(num_objects)]
+        
+        if hasattr(result, 'masks') and result.masks is not None:
+            try:
+                masks = result.masks.data.cpu().numpy()
+                if len(masks) != num_objects:
+                    if num_objects > 1:
+                        print(f"⚠ Frame {frame_idx}: {len(masks)} masks for {num_objects} objects, "
+                              f"cannot tell which is which; frame left empty")
+                        masks = []
+                    else:
+                        masks = masks[:1]
+                
+                for obj, mask in enumerate(masks):
+                    coverage = (mask > 0.5).sum() / mask.size * 100
+                    frame_data = frame_objects[obj]
+                    frame_data['mask_coverage'] = float(coverage)
+                    
+                    if coverage > coverage_threshold:
+                        bbox = mask_to_bbox(mask)
+                        if bbox:
+                            frame_data['bbox'] = bbox
+                            frame_data['has_detection'] = True
+                
+            except Exception as e:
+                print(f"Error processing frame {frame_idx}: {e}")
+        
+        for track, frame_data in zip(tracks, frame_objects):
+            track.append(frame_data)
+        valid_frames += frame_objects[0]['has_detection']
+        
+        # Print progress every 50 frames
+        if verbose and len(tracks[0]) % 50 == 1:
+            print(f"Processed frame {frame_idx}, valid detections so far: {valid_frames}")
+
+    return tracks
+
+def run_sam2(predictor, video, frame_indices, coverage_threshold, num_objects=1, verbose=True, **prompts):
+    """Track the prompted objects through video in one pass and return their per-frame records"""
+    # The predictor keeps its memory of the first video it saw; every clip starts from a clean state
+    predictor.inference_state = {}
+    results = predictor(source=video, **prompts)
+    return frames_from_results(results, frame_indices, coverage_threshold, num_objects, verbose)
+
+def interpolate_bbox(bbox_a, bbox_b, t):
+    """Linear interpolation of two mask_to_bbox boxes at fraction t from bbox_a to bbox_b"""
+    x_min, y_min, x_max, y_max = (
+        int(round(bbox_a[key] + (bbox_b[key] - bbox_a[key]) * t))
+        for key in ('x_min', 'y_min', 'x_max', 'y_max')
+    )
+    return {
+        'x_min': x_min,
+        'y_min': y_min,
+        'x_max': x_max,
+        'y_max': y_max,
+        'width': x_max - x_min,
+        'height': y_max - y_min,
+        'center_x': int((x_min + x_max) / 2),
+        'center_y': int((y_min + y_max) / 2),
+        'area': int(round(bbox_a['area'] + (bbox_b['area'] - bbox_a['area']) * t))
+    }
+
+def box_motion(bbox_a, bbox_b):
+    """Largest corner displacement in pixels between two boxes"""
+    return max(abs(bbox_a[key] - bbox_b[key]) for key in ('x_min', 'y_min', 'x_max', 'y_max'))
+
+def needs_refinement(frame_a, frame_b, max_motion):
+    """Whether the interval between two tracked frames is too eventful to interpolate"""
+    if frame_a['has_detection'] != frame_b['has_detection']:
+        return True  # Object appears or disappears somewhere in between
+    if not frame_a['has_detection']:
+        return False
+    return box_motion(frame_a['bbox'], frame_b['bbox']) > max_motion
+
+def fill_interpolated(tracked, total_frames):
+    """Complete per-frame records from the SAM2-tracked subset by linear interpolation"""
+    tracked_indices = sorted(tracked)
+    all_boxes = []
+    for a, b in zip(tracked_indices, tracked_indices[1:] + [None]):
+        all_boxes.append(tracked[a])
+        if b is None:
+            break
+        frame_a, frame_b = tracked[a], tracked[b]
+        both = frame_a['has_detection'] and frame_b['has_detection']
+        for frame_idx in range(a + 1, b):
+            t = (frame_idx - a) / (b - a)
+            all_boxes.append({
+                'frame_index': frame_idx,
+                'bbox': interpolate_bbox(frame_a['bbox'], frame_b['bbox'], t) if both else None,
+                'mask_coverage': frame_a['mask_coverage'] + (frame_b['mask_coverage'] - frame_a['mask_coverage']) * t,
+                'has_detection': both,
+                'interpolated': True
+            })
+    return all_boxes[:total_frames]
+
+def track_sparse(predictor, video, points, labels, interval, coverage_threshold, max_motion):
+    """Run SAM2 on every interval-th frame, densely re-track intervals that move too much, interpolate the rest
+
+    Returns (per-object lists of per-frame records, number of frames SAM2 processed).
+    """
+    num_objects = len(points)
+    with tempfile.TemporaryDirectory(prefix="sam2_sparse_") as work_dir:
+        key_video = os.path.join(work_dir, "keyframes.mp4")
+        key_indices, total_frames = write_frames_video(video, key_video, step=interval)
+        print(f"Tracking {len(key_indices)} keyframes (every {interval} of {total_frames} frames)")
+        tracked = [
+            {frame['frame_index']: frame for frame in track}
+            for track in run_sam2(predictor, key_video, key_indices, coverage_threshold, num_objects,
+                                  points=points, labels=labels)
+        ]
+        sam2_frames = len(key_indices)
+
+        refined = 0
+        for a, b in zip(key_indices, key_indices[1:]):
+            if b - a <= 1:
+                continue
+            eventful = [obj for obj in range(num_objects) if needs_refinement(tracked[obj][a], tracked[obj][b], max_motion)]
+            # Prompt each object with its box at a tracked end; objects only found at the later end run backwards
+            forward = [obj for obj in eventful if tracked[obj][a]['has_detection']]
+            backward = [obj for obj in eventful if not tracked[obj][a]['has_detection'] and tracked[obj][b]['has_detection']]
+            for reverse, anchor, group in ((False, a, forward), (True, b, backward)):
+                if not group:
+                    continue
+                clip_video = os.path.join(work_dir, f"clip_{a:06d}_{int(reverse)}.mp4")
+                clip_indices = write_clip(video, clip_video, a, b, reverse=reverse)
+                bboxes = [[tracked[obj][anchor]['bbox'][key] for key in ('x_min', 'y_min', 'x_max', 'y_max')]
+                          for obj in group]
+                clip_tracks = run_sam2(predictor, clip_video, clip_indices, coverage_threshold, len(group),
+                                       verbose=False, bboxes=bboxes)
+                for obj, track in zip(group, clip_tracks):
+                    for frame in track:
+                        if a < frame['frame_index'] < b:
+                            tracked[obj][frame['frame_index']] = frame
+                sam2_frames += len(clip_indices)
+                refined += 1
+
+    print(f"Ran {refined} dense re-tracking clips over {len(key_indices) - 1} keyframe intervals")
+    return [fill_interpolated(track, total_frames) for track in tracked], sam2_frames
+
+class ObjectMaskPredictor(SAM2VideoPredictor):
+    """SAM2VideoPredictor returning one mask per prompted object, in object order, on every frame
+
+    The stock predictor drops empty masks before postprocess and then numbers
+    the survivors 0..n-1, so when object 0 is absent object 1's mask is reported
+    as object 0. The unfiltered masks are read back from the tracking state instead;
+    empty ones simply have zero coverage.
+    """
+
+    def inference(self, im, *args, **kwargs):
+        pred_masks, scores = super().inference(im, *args, **kwargs)
+        frame = self.dataset.frame  # same key the parent stored this frame's output under
+        output_dict = self.inference_state["output_dict"]
+        for storage_key in ("cond_frame_outputs", "non_cond_frame_outputs"):
+            current_out = output_dict[storage_key].get(frame)
+            if current_out is None:
+                continue
+            masks = current_out["pred_masks"].flatten(0, 1)
+            obj_idx_to_id = self.inference_state["obj_idx_to_id"]
+            order = sorted(range(len(masks)), key=lambda idx: obj_idx_to_id.get(idx, idx))
+            masks = masks[order]
+            return masks, masks.new_ones(len(masks))
+        # Output not kept in the state (should not happen): only safe with a single object
+        return pred_masks, scores
+
+def make_predictor(model, conf, imgsz):
+    overrides = dict(
+        conf=conf,
+        task="segment",
+        mode="predict",
+        imgsz=imgsz,
+        model=model
+    )
+    return ObjectMaskPredictor(overrides=overrides)
+
+def scaled_imgsz(imgsz, scale, stride=32, minimum=256):
+    """SAM2 processing size for frames downscaled by scale, kept a multiple of the model stride"""
+    return max(minimum, int(round(imgsz * scale / stride)) * stride)
+
+def write_scaled_video(input_video, output_video, scale):
+    """Write input_video resized by scale; returns the scaled (width, height)"""
+    cap = cv2.VideoCapture(input_video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    out = cv2.VideoWriter(output_video, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        out.write(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+    cap.release()
+    out.release()
+    return size
+
+def upscale_bbox(bbox, scale, width, height):
+    """Map a box found on frames downscaled by scale back to original (width, height) pixel coordinates"""
+    # x_max/y_max are inclusive pixel indices, so the far edge maps from the end of that pixel
+    x_min = min(int(round(bbox['x_min'] / scale)), width - 1)
+    y_min = min(int(round(bbox['y_min'] / scale)), height - 1)
+    x_max = min(int(round((bbox['x_max'] + 1) / scale)) - 1, width - 1)
+    y_max = min(int(round((bbox['y_max'] + 1) / scale)) - 1, height - 1)
+    return {
+        'x_min': x_min,
+        'y_min': y_min,
+        'x_max': x_max,
+        'y_max': y_max,
+        'width': x_max - x_min,
+        'height': y_max - y_min,
+        'center_x': int((x_min + x_max) / 2),
+        'center_y': int((y_min + y_max) / 2),
+        'area': int(round(bbox['area'] / scale ** 2))
+    }
+
+def bbox_iou(bbox_a, bbox_b):
+    """IoU of two mask_to_bbox boxes (inclusive pixel coordinates)"""
+    iw = min(bbox_a['x_max'], bbox_b['x_max']) - max(bbox_a['x_min'], bbox_b['x_min']) + 1
+    ih = min(bbox_a['y_max'], bbox_b['y_max']) - max(bbox_a['y_min'], bbox_b['y_min']) + 1
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    area_a = (bbox_a['width'] + 1) * (bbox_a['height'] + 1)
+    area_b = (bbox_b['width'] + 1) * (bbox_b['height'] + 1)
+    return inter / (area_a + area_b - inter)
+
+def extract_boxes(predictor, video, objects, coverage_threshold,
+                  keyframe_interval=1, max_motion=20, scale=1.0):
+    """Per-frame boxes for every prompted object in original-frame coordinates
+
+    All objects are tracked in the same predictor pass. With scale < 1 SAM2 sees a
+    downscaled copy of the video (prompt points scaled to match) and the boxes are
+    mapped back. Returns (per-object lists of per-frame records, frames SAM2 processed).
+    """
+    points, labels = build_point_prompts(objects, scale)
+    with tempfile.TemporaryDirectory(prefix="sam2_scaled_") as work_dir:
+        if scale != 1.0:
+            cap = cv2.VideoCapture(video)
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            cap.release()
+            scaled_video = os.path.join(work_dir, "scaled.mp4")
+            scaled_size = write_scaled_video(video, scaled_video, scale)
+            print(f"Downscaled {width}x{height} -> {scaled_size[0]}x{scaled_size[1]}")
+            video = scaled_video
+
+        if keyframe_interval > 1:
+            tracks, sam2_frames = track_sparse(predictor, video, points, labels,
+                                               keyframe_interval, coverage_threshold, max_motion * scale)
+        else:
+            tracks = run_sam2(predictor, video, itertools.count(), coverage_threshold, len(objects),
+                              points=points, labels=labels)
+            sam2_frames = len(tracks[0])
+
+    if scale != 1.0:
+        for track in tracks:
+            for frame in track:
+                if frame['bbox']:
+                    frame['bbox'] = upscale_bbox(frame['bbox'], scale, width, height)
+    return tracks, sam2_frames
+
+def merge_tracks(tracks, objects):
+    """Per-frame records: the first object's fields at the top level, every object under 'objects'"""
+    all_boxes = []
+    for frame_objects in zip(*tracks):
+        frame_data = dict(frame_objects[0])
+        frame_data['objects'] = [
+            {'object_id': obj['object_id'], 'class_id': obj['class_id'],
+             **{key: value for key, value in record.items() if key != 'frame_index'}}
+            for obj, record in zip(objects, frame_objects)
+        ]
+        all_boxes.append(frame_data)
+    return all_boxes
+
+def calibrate_resolution(args, video, objects, scales, num_frames):
+    """Compare downscaled runs against the full-resolution boxes on the first num_frames frames"""
+    with tempfile.TemporaryDirectory(prefix="sam2_calibration_") as work_dir:
+        sample_video = os.path.join(work_dir, "sample.mp4")
+        create_subset_video(video, sample_video, num_frames)
+
+        runs = {}
+        for scale in [1.0] + sorted(set(scales) - {1.0}, reverse=True):
+            imgsz = scaled_imgsz(args.imgsz, scale)
+            print(f"\nCalibration run: scale {scale}, imgsz {imgsz}")
+            predictor = make_predictor(args.model, args.conf, imgsz)
+            start = time.perf_counter()
+            tracks, _ = extract_boxes(predictor, sample_video, objects, args.coverage_threshold, scale=scale)
+            # Pool every object's frames; each pair compares the same object on the same frame
+            runs[scale] = (imgsz, time.perf_counter() - start, [frame for track in tracks for frame in track])
+
+    _, reference_seconds, reference = runs[1.0]
+    rows = []
+    for scale, (imgsz, seconds, frames) in runs.items():
+        ious = [bbox_iou(ref['bbox'], frame['bbox']) if frame['bbox'] else 0.0
+                for ref, frame in zip(reference, frames) if ref['bbox']]
+        agreement = np.mean([ref['has_detection'] == frame['has_detection'] for ref, frame in zip(reference, frames)])
+        rows.append({
+            'scale': scale,
+            'imgsz': imgsz,
+            'seconds': round(seconds, 2),
+            'speedup': round(reference_seconds / seconds, 2) if seconds > 0 else None,
+            'mean_iou': round(float(np.mean(ious)), 4) if ious else None,
+            'p5_iou': round(float(np.percentile(ious, 5)), 4) if ious else None,
+            'detection_agreement': round(float(agreement), 4)
+        })
+    return rows
+
+def downscale_factor(value):
+    """argparse type for --downscale/--calibrate: a float with 0 < value <= 1"""
+    try:
+        factor = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid scale {value!r}")
+    if not 0 < factor <= 1:
+        raise argparse.ArgumentTypeError(f"scale must be in (0, 1], got {value}")
+    return factor
+
 def main():
     parser = argparse.ArgumentParser(description='Extract bounding boxes from video using SAM2 annotations')
     parser.add_argument('--video', required=True, help='Input video file (e.g., IMG_1824.mov)')
@@ -91,6 +533,13 @@ def main():
     parser.add_argument('--model', default='sam2_b.pt', help='SAM2 model file (default: sam2_b.pt)')
     parser.add_argument('--coverage-threshold', type=float, default=0.1, help='Minimum coverage for valid detection (default: 0.1)')
     parser.add_argument('--no-visualization', action='store_true', help='Skip creating visualization plots')
+    parser.add_argument('--qa', choices=['video', 'sheet'], help='Also render a QA overlay video or contact sheet (see render_qa.py)')
+    parser.add_argument('--keyframe-interval', type=int, default=1, help='Run SAM2 on every Nth frame and interpolate the rest (default: 1, every frame)')
+    parser.add_argument('--max-motion', type=float, default=20, help='Max box corner motion in px between keyframes before the interval is tracked densely (default: 20)')
+    parser.add_argument('--downscale', type=downscale_factor, default=1.0, help='Run SAM2 on frames (and --imgsz) scaled by this factor, boxes are mapped back (default: 1.0)')
+    parser.add_argument('--calibrate', type=downscale_factor, nargs='+', metavar='SCALE', help='Report box IoU of these downscale factors against full resolution, then exit')
+    parser.add_argument('--calibration-frames', type=int, default=150, help='Frames used by --calibrate (default: 150)')
+    parser.add_argument('--min-iou', type=float, default=0.9, help='Mean IoU a downscale factor needs to be recommended by --calibrate (default: 0.9)')
     
     args = parser.parse_args()
     
@@ -115,18 +564,16 @@ def main():
     # Load annotations
     data = load_annotations(args.annotations)
     
-    # Extract points
-    available_fg = len(data['foreground_points'])
-    available_bg = len(data['background_points'])
-    
-    fg_points = data['foreground_points'][:args.fg_points]
-    bg_points = data['background_points'][:args.bg_points]
+    # Extract points, one prompt set per object
+    objects = load_objects(data, args.fg_points, args.bg_points)
     
     print(f"Image dimensions: {data['image_size']}")
-    print(f"Available points: {available_fg} foreground, {available_bg} background")
-    print(f"Using: {len(fg_points)} foreground, {len(bg_points)} background points")
-    print(f"Foreground points: {fg_points}")
-    print(f"Background points: {bg_points}")
+    for obj in objects:
+        print(f"Object {obj['object_id']} ({obj['name']}, class {obj['class_id']}):")
+        print(f"  Available points: {obj['available_foreground']} foreground, {obj['available_background']} background")
+        print(f"  Using: {len(obj['foreground'])} foreground, {len(obj['background'])} background points")
+        print(f"  Foreground points: {obj['foreground']}")
+        print(f"  Background points: {obj['background']}")
     
     # Determine video to process
     video_to_process = args.video
@@ -140,68 +587,43 @@ def main():
         video_to_process = subset_video
         print(f"Processing subset: {actual_frames} frames")
     
-    # Create SAM2VideoPredictor
-    overrides = dict(
-        conf=args.conf,
-        task="segment",
-        mode="predict",
-        imgsz=args.imgsz,
-        model=args.model
-    )
-    
-    predictor = SAM2VideoPredictor(overrides=overrides)
-    
-    # Combine points and labels
+    # Combined points and labels of the first object, kept for the output and the summary plot
+    fg_points, bg_points = objects[0]['foreground'], objects[0]['background']
     points_combined = fg_points + bg_points
     labels_combined = [1] * len(fg_points) + [0] * len(bg_points)
     
-    print(f"Points: {points_combined}")
-    print(f"Labels: {labels_combined}")
+    if args.calibrate:
+        rows = calibrate_resolution(args, video_to_process, objects, args.calibrate, args.calibration_frames)
+        print(f"\n{'scale':>6}{'imgsz':>7}{'seconds':>9}{'speedup':>9}{'mean IoU':>10}{'p5 IoU':>8}{'det agree':>11}")
+        for row in rows:
+            print(f"{row['scale']:>6}{row['imgsz']:>7}{row['seconds']:>9}{row['speedup'] or '-':>9}"
+                  f"{row['mean_iou'] if row['mean_iou'] is not None else '-':>10}"
+                  f"{row['p5_iou'] if row['p5_iou'] is not None else '-':>8}{row['detection_agreement']:>11}")
+        good = [row for row in rows if row['mean_iou'] is not None and row['mean_iou'] >= args.min_iou]
+        cheapest = min(good, key=lambda row: row['seconds']) if good else None
+        if cheapest:
+            print(f"Cheapest scale with mean IoU >= {args.min_iou}: --downscale {cheapest['scale']}")
+        report_path = f"{Path(args.video).stem}_resolution_calibration.json"
+        with open(report_path, 'w') as f:
+            json.dump({'video_source': args.video, 'frames': args.calibration_frames, 'min_iou': args.min_iou,
+                       'recommended_scale': cheapest['scale'] if cheapest else None, 'runs': rows}, f, indent=2)
+        print(f"Calibration report saved to: {report_path}")
+        return
+    
+    # Create SAM2VideoPredictor
+    imgsz = scaled_imgsz(args.imgsz, args.downscale) if args.downscale != 1.0 else args.imgsz
+    predictor = make_predictor(args.model, args.conf, imgsz)
     
     # Run inference
-    print(f"Running SAM2 inference on {video_to_process}...")
-    results = predictor(
-        source=video_to_process,
-        points=[points_combined],
-        labels=[labels_combined]
-    )
+    print(f"Running SAM2 inference on {video_to_process} for {len(objects)} object(s) "
+          f"(scale {args.downscale}, imgsz {imgsz})...")
+    tracks, sam2_frames = extract_boxes(predictor, video_to_process, objects,
+                                        args.coverage_threshold, args.keyframe_interval,
+                                        args.max_motion, args.downscale)
+    all_boxes = merge_tracks(tracks, objects)
     
-    print(f"Inference completed! Results type: {type(results)}, length: {len(results)}")
-    
-    # Extract bounding boxes for all frames
-    all_boxes = []
-    valid_frames = 0
-    
-    for frame_idx, result in enumerate(results):
-        frame_data = {
-            'frame_index': frame_idx,
-            'bbox': None,
-            'mask_coverage': 0.0,
-            'has_detection': False
-        }
-        
-        if hasattr(result, 'masks') and result.masks is not None:
-            try:
-                mask = result.masks[0].data[0].cpu().numpy()
-                coverage = (mask > 0.5).sum() / mask.size * 100
-                
-                frame_data['mask_coverage'] = coverage
-                
-                if coverage > args.coverage_threshold:
-                    bbox = mask_to_bbox(mask)
-                    if bbox:
-                        frame_data['bbox'] = bbox
-                        frame_data['has_detection'] = True
-                        valid_frames += 1
-                
-            except Exception as e:
-                print(f"Error processing frame {frame_idx}: {e}")
-        
-        all_boxes.append(frame_data)
-        
-        # Print progress every 50 frames
-        if frame_idx % 50 == 0:
-            print(f"Processed frame {frame_idx}, valid detections so far: {valid_frames}")
+    print(f"Inference completed! SAM2 processed {sam2_frames} of {len(all_boxes)} frames")
+    valid_frames = sum(frame['has_detection'] for frame in all_boxes)
     
     # Save results to JSON
     output_data = {
@@ -210,13 +632,19 @@ def main():
         'processing_parameters': {
             'fg_points_used': len(fg_points),
             'bg_points_used': len(bg_points),
+            'num_objects': len(objects),
             'max_frames': args.max_frames,
             'conf': args.conf,
-            'imgsz': args.imgsz,
+            'imgsz': imgsz,
+            'downscale': args.downscale,
             'model': args.model,
-            'coverage_threshold': args.coverage_threshold
+            'coverage_threshold': args.coverage_threshold,
+            'keyframe_interval': args.keyframe_interval,
+            'max_motion': args.max_motion
         },
-        'total_frames': len(results),
+        'total_frames': len(all_boxes),
+        'sam2_frames': sam2_frames,
+        'interpolated_frames': sum(frame['interpolated'] for frame in all_boxes),
         'valid_detections': valid_frames,
         'image_dimensions': data['image_size'],
         'input_points': {
@@ -224,9 +652,15 @@ def main():
             'background': bg_points,
             'combined': points_combined,
             'labels': labels_combined,
-            'available_foreground': available_fg,
-            'available_background': available_bg
+            'available_foreground': objects[0]['available_foreground'],
+            'available_background': objects[0]['available_background']
         },
+        'objects': [
+            {'object_id': obj['object_id'], 'class_id': obj['class_id'], 'name': obj['name'],
+             'foreground': obj['foreground'], 'background': obj['background'],
+             'valid_detections': sum(frame['has_detection'] for frame in track)}
+            for obj, track in zip(objects, tracks)
+        ],
         'frames': all_boxes
     }
     
@@ -243,9 +677,12 @@ def main():
     
     print(f"\nResults Summary:")
     print(f"- Video processed: {video_to_process}")
-    print(f"- Total frames processed: {len(results)}")
+    print(f"- Total frames processed: {len(all_boxes)} ({sam2_frames} by SAM2)")
     print(f"- Frames with valid detections: {valid_frames}")
-    print(f"- Detection rate: {valid_frames/len(results)*100:.1f}%")
+    print(f"- Detection rate: {valid_frames/len(all_boxes)*100:.1f}%")
+    if len(objects) > 1:
+        for entry in output_data['objects']:
+            print(f"  - {entry['name']} (class {entry['class_id']}): {entry['valid_detections']} frames")
     print(f"- Results saved to: {args.output}")
     
     # Create visualization if requested
@@ -253,6 +690,10 @@ def main():
         video_stem = Path(args.video).stem
         create_summary_visualization(all_boxes, points_combined, labels_combined, 
                                    data['image_size'], video_stem, args.video)
+    
+    if args.qa:
+        from render_qa import render
+        render(args.output, args.qa)
 
 def create_summary_visualization(all_boxes, points, labels, image_size, video_name, video_path):
     """Create a summary visualization of the tracking results"""
@@ -300,22 +741,12 @@ def create_summary_visualization(all_boxes, points, labels, image_size, video_na
         axes[1, 0].text(0.5, 0.5, 'No valid detections', ha='center', va='center', transform=axes[1, 0].transAxes)
         axes[1, 0].set_title('Vertical Movement')
     
-    # Plot 4: Input points reference
-    # Try to find first frame image
-    video_stem = Path(video_path).stem
-    possible_frame_paths = [
-        f"{video_stem}_frames/frame_000000.jpg",
-        f"{video_stem}_frames/frame_000000.png",
-        f"frames/frame_000000.jpg",
-        f"frames/frame_000000.png"
-    ]
-    
-    frame_image = None
-    for frame_path in possible_frame_paths:
-        if os.path.exists(frame_path):
-            frame_image = cv2.imread(frame_path)
-            if frame_image is not None:
-                break
+    # Plot 4: Input points reference on the first frame of the video
+    cap = cv2.VideoCapture(video_path)
+    ret, frame_image = cap.read()
+    cap.release()
+    if not ret:
+        frame_image = None
     
     if frame_image is not None:
         image_rgb = cv2.cvtColor(frame_image, cv2.COLOR_BGR2RGB)
@@ -336,9 +767,9 @@ def create_summary_visualization(all_boxes, points, labels, image_size, video_na
     plt.tight_layout()
     output_plot = f'{video_name}_tracking_summary.png'
     plt.savefig(output_plot, dpi=150, bbox_inches='tight')
-    plt.show()
+    plt.close(fig)
     
     print(f"Tracking summary visualization saved as '{output_plot}'")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,15 +1,21 @@
-import os
+import argparse
+from pathlib import Path
+from convert import PROFILES, plan, collect_inputs, run_jobs
 
-input_directory = ".\\videos\\vids"
-output_directory = ".\\videos\\vids_avi"
-
-if "vids_avi" not in os.listdir(".\\videos"):
-    os.mkdir('.\\videos\\vids_avi')
+input_directory = Path("videos") / "vids"
+output_directory = Path("videos") / "vids_avi"
 
 def main():
-    for file_name in os.listdir(input_directory):
-        # clip = VideoFileClip(f"{input_directory}\\{file_name}")
-        # clip.write_videofile(f"{output_directory}\\{file_name[:-4]}_yuv420p.avi", codec='rawvideo', audio_codec='pcm_s16le', ffmpeg_params=['-pixel_format','yuv420p'])
-        os.system(f"ffmpeg -i {input_directory}\\{file_name} -c:v rawvideo -c:a pcm_s16le {output_directory}\\{file_name[:-4]}.avi")
+    parser = argparse.ArgumentParser(description='Optionally export the recordings as intra-only AVI (fast seeking in external editors and tools); the GUI plays videos/vids directly')
+    # MJPEG is intra-only like rawvideo (any frame decodes on its own) at a fraction of the size;
+    # see benchDecode.py for decode FPS / seek latency / size on our clips
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='avi-mjpeg', help='Output profile (default: avi-mjpeg)')
+    parser.add_argument('--check', choices=['mtime', 'hash'], default='hash',
+                        help='Up-to-date check; hash also notices a profile change (default: hash)')
+    args = parser.parse_args()
+
+    tasks = plan(collect_inputs([input_directory]), args.profile, output_directory)
+    run_jobs(tasks, check=args.check)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,20 +1,13 @@
-import os
-from moviepy.editor import VideoFileClip
+from pathlib import Path
+from convert import plan, collect_inputs, run_jobs
 
-folder_path = r"C:\Users\jzhang29\Projects\Archive\KIDS25-Team3\videos\vids_mp4"
+folder_path = Path("videos") / "vids_mp4"
 
-for filename in os.listdir(folder_path):
-    if filename.lower().endswith(".mov"):
-        mov_path = os.path.join(folder_path, filename)
-        mp4_filename = os.path.splitext(filename)[0] + ".mp4"
-        mp4_path = os.path.join(folder_path, mp4_filename)
-        
-        print(f"Converting {filename} to {mp4_filename}...")
-        
-        # Load the .mov video
-        clip = VideoFileClip(mov_path)
-        # Write it as .mp4
-        clip.write_videofile(mp4_path, codec="libx264", audio_codec="aac")
-        clip.close()
+if __name__ == "__main__":
+    # Remux .mov -> .mp4 without re-encoding; clips whose codecs mp4 can't hold are re-encoded to H.264/AAC
+    mov_files = collect_inputs([folder_path], extensions={".mov"})
+    tasks = plan(mov_files, "mp4-remux")
+    print(f"Converting {len(tasks)} .mov files in {folder_path}...")
+    run_jobs(tasks)
 
-print("Conversion complete!")
+    print("Conversion complete!")
@@ -1,15 +1,63 @@
-import os
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from convert import ffmpeg_command, default_jobs, collect_inputs
 
-input_dir = ".\\resources"
+input_dir = Path("resources")
 
-if "sam2.mp4" not in os.listdir(input_dir):
-    raise FileNotFoundError("sam2.mp4 not found in .\\resources")
+# ModelTab shows the SAM2 animation 400 px wide; exporting at that size means QMovie never rescales
+GUI_WIDTH = 400
 
-file_name = f"{input_dir}\\sam2.mp4"
+def animation_args(fmt, width, fps, colors):
+    """ffmpeg output arguments for a GIF (palette built in the same filter graph) or animated WebP"""
+    scale = f"fps={fps},scale={width}:-2:flags=lanczos"
+    if fmt == "gif":
+        graph = (f"{scale},split[s0][s1];"
+                 f"[s0]palettegen=max_colors={colors}:stats_mode=diff[p];"
+                 f"[s1][p]paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle")
+        return ["-filter_complex", graph, "-loop", "0", "-an"]
+    return ["-vf", scale, "-c:v", "libwebp", "-quality", "75", "-compression_level", "6", "-loop", "0", "-an"]
+
+def export_animation(video, output_dir=None, fmt="gif", width=GUI_WIDTH, fps=12, colors=256,
+                     max_size_mb=None, attempts=5):
+    """Export one video; shrinks width (and GIF colours) until the file fits max_size_mb"""
+    video = Path(video)
+    output = Path(output_dir or video.parent) / f"{video.stem}.{fmt}"
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    for attempt in range(attempts):
+        subprocess.run(ffmpeg_command(video, output, animation_args(fmt, width, fps, colors), threads=2),
+                       check=True, capture_output=True)
+        size_mb = output.stat().st_size / 1e6
+        if max_size_mb is None or size_mb <= max_size_mb:
+            return output, width, size_mb
+        print(f"{output.name}: {size_mb:.1f} MB at {width}px > {max_size_mb} MB, shrinking")
+        width = max(2, int(width * 0.8) // 2 * 2)
+        colors = max(32, colors // 2)
+    return output, width, size_mb
 
 def main():
-    if "palette.png" not in os.listdir(input_dir):
-        raise FileNotFoundError(f"palette.png not found in {input_dir}")
-    os.system(f'ffmpeg -i {file_name} -i {input_dir}\\palette.png -lavfi "paletteuse" {file_name[:-4]}.gif')
+    parser = argparse.ArgumentParser(description='Export videos as pre-sized GIF or animated WebP')
+    parser.add_argument('inputs', nargs='*', default=[str(input_dir / "sam2.mp4")], help='Videos or directories (default: resources/sam2.mp4)')
+    parser.add_argument('--format', choices=['gif', 'webp'], default='gif', help='Output format (default: gif)')
+    parser.add_argument('--width', type=int, default=GUI_WIDTH, help=f'Output width in px (default: {GUI_WIDTH}, the GUI display width)')
+    parser.add_argument('--fps', type=int, default=12, help='Output frame rate (default: 12)')
+    parser.add_argument('--colors', type=int, default=256, help='GIF palette size (default: 256)')
+    parser.add_argument('--max-size-mb', type=float, help='Shrink until the file is at most this size')
+    parser.add_argument('--output-dir', help='Output directory (default: next to each input)')
+    args = parser.parse_args()
+
+    videos = collect_inputs(args.inputs)
+    if not videos:
+        raise FileNotFoundError(f"No videos found in {args.inputs}")
+
+    with ThreadPoolExecutor(max_workers=default_jobs(2)) as pool:
+        futures = [pool.submit(export_animation, video, args.output_dir, args.format, args.width,
+                               args.fps, args.colors, args.max_size_mb) for video in videos]
+        for future in futures:
+            output, width, size_mb = future.result()
+            print(f"Saved {output} ({width}px, {size_mb:.1f} MB)")
+
 if __name__ == "__main__":
     main()
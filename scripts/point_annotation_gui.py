@@ -1,16 +1,216 @@
 #!/usr/bin/env python3
 """
 Simple GUI for Point Annotation
-Click to assign foreground/background points on images
+Click to assign foreground/background points on images, or on frames decoded
+straight from a video file
 """
 
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk, ImageDraw
+import bisect
+import cv2
 import json
 import os
+import queue
+import threading
+import time
 from pathlib import Path
 
+from point_tracker import propagate_points
+from video_frames import KeyframeVideoReader
+
+VIDEO_EXTENSIONS = "*.mov *.MOV *.mp4 *.MP4 *.avi *.mkv"
+
+def video_frame_paths(video_path, frame_count):
+    """Paths movToPng.py writes the video's frames to: videos/imgs/<stem>/<stem>frame_000000.png
+
+    movToPng reads videos/vids/ and writes videos/imgs/ (both relative to where
+    it runs), so a video inside a vids/ folder maps to the imgs/ folder next to
+    it; any other video maps to videos/imgs/ under the working directory. In
+    video mode these paths identify frames without existing on disk, so
+    image_path, annotation paths and frame_index match PNG-mode annotations.
+    """
+    video_path = Path(video_path).resolve()
+    if video_path.parent.name == "vids":
+        frames_root = video_path.parent.with_name("imgs")
+    else:
+        frames_root = Path("videos", "imgs").resolve()
+    frame_dir = frames_root / video_path.stem
+    return [str(frame_dir / f"{video_path.stem}frame_{i:06d}.png") for i in range(frame_count)]
+
+class AnnotationWriter:
+    """Background writer that debounces and coalesces annotation saves
+    
+    Saves are keyed by annotation path: submitting the same path again before
+    the delay expires replaces the queued data, so only the latest snapshot is
+    written. Submitting None for a path deletes the file instead.
+    """
+    
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self._pending = {}  # path -> (due time, data or None for delete)
+        self._writing = {}  # path -> data being written now (popped from _pending, not on disk yet)
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="annotation-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, file_path, data):
+        """Queue data to be written to file_path (None deletes the file)"""
+        with self._cond:
+            self._pending[str(file_path)] = (time.monotonic() + self.delay, data)
+            self._cond.notify_all()
+    
+    def lookup(self, file_path):
+        """Return (True, data) if a write for file_path is queued or in progress, else (False, None)"""
+        file_path = str(file_path)
+        with self._cond:
+            if file_path in self._pending:
+                return True, self._pending[file_path][1]
+            if file_path in self._writing:
+                return True, self._writing[file_path]
+        return False, None
+    
+    def flush(self):
+        """Write everything queued now and block until it is on disk"""
+        with self._cond:
+            self._pending = {path: (0, data) for path, (_, data) in self._pending.items()}
+            self._cond.notify_all()
+            while self._pending or self._writing:
+                self._cond.wait()
+    
+    def close(self):
+        """Flush queued writes and stop the writer thread"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed and not self._pending:
+                        return
+                    now = time.monotonic()
+                    due = [path for path, (when, _) in self._pending.items() if when <= now]
+                    if due:
+                        break
+                    timeout = min(when for when, _ in self._pending.values()) - now if self._pending else None
+                    self._cond.wait(timeout)
+                batch = [(path, self._pending.pop(path)[1]) for path in due]
+                self._writing.update(batch)
+            
+            for path, data in batch:
+                try:
+                    self._write(Path(path), data)
+                finally:
+                    with self._cond:
+                        del self._writing[path]
+                        self._cond.notify_all()
+    
+    def _write(self, file_path, data):
+        try:
+            if data is None:
+                if file_path.exists():
+                    file_path.unlink()
+                    print(f"✓ Deleted annotation file: {file_path.name}")
+                return
+            
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, file_path)
+            
+            print(f"✓ Auto-saved annotations: {file_path.name} -> {data['source_directory_name']}/ (frame {data['frame_index']})")
+        except Exception as e:
+            print(f"⚠ Auto-save failed: {e}")
+
+class AnnotatedFrameIndex:
+    """In-memory bitmap of which frames in the loaded sequence have annotations
+    
+    Built with a single directory listing of the annotation folder, then kept
+    up to date as frames are saved or deleted. A sorted list of annotated
+    indices gives O(log n) next/previous annotated lookups; next/previous
+    unannotated lookups use bytearray.find, a memchr over one byte per frame.
+    """
+    
+    def __init__(self, size=0):
+        self.bits = bytearray(size)
+        self.annotated = []  # sorted frame indices with bits set
+    
+    @classmethod
+    def scan(cls, image_files, annotation_dir):
+        """Build the index from one listing of annotation_dir"""
+        index = cls(len(image_files))
+        
+        if not os.path.isdir(annotation_dir):
+            return index
+        
+        stem_to_index = {Path(image_file).stem: i for i, image_file in enumerate(image_files)}
+        suffix = "_annotations.json"
+        with os.scandir(annotation_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix):
+                    i = stem_to_index.get(entry.name[:-len(suffix)])
+                    if i is not None:
+                        index.bits[i] = 1
+        
+        index.annotated = [i for i, bit in enumerate(index.bits) if bit]
+        return index
+    
+    def __len__(self):
+        return len(self.bits)
+    
+    def __contains__(self, i):
+        return 0 <= i < len(self.bits) and self.bits[i] == 1
+    
+    def count(self):
+        return len(self.annotated)
+    
+    def mark(self, i, annotated=True):
+        """Set or clear the annotated flag for frame i"""
+        if not 0 <= i < len(self.bits) or self.bits[i] == annotated:
+            return
+        self.bits[i] = 1 if annotated else 0
+        pos = bisect.bisect_left(self.annotated, i)
+        if annotated:
+            self.annotated.insert(pos, i)
+        else:
+            del self.annotated[pos]
+    
+    def next_annotated(self, i):
+        pos = bisect.bisect_right(self.annotated, i)
+        return self.annotated[pos] if pos < len(self.annotated) else None
+    
+    def previous_annotated(self, i):
+        pos = bisect.bisect_left(self.annotated, i)
+        return self.annotated[pos - 1] if pos > 0 else None
+    
+    def next_unannotated(self, i):
+        j = self.bits.find(0, i + 1)
+        return j if j >= 0 else None
+    
+    def previous_unannotated(self, i):
+        j = self.bits.rfind(0, 0, max(i, 0))
+        return j if j >= 0 else None
+    
+    def density(self, buckets):
+        """Fraction of annotated frames in each of `buckets` equal slices"""
+        total = len(self.bits)
+        if total == 0 or buckets <= 0:
+            return []
+        counts = [0] * buckets
+        for i in self.annotated:
+            counts[i * buckets // total] += 1
+        sizes = [0] * buckets
+        for b in range(buckets):
+            sizes[b] = (b + 1) * total // buckets - b * total // buckets
+        return [c / n if n else 0.0 for c, n in zip(counts, sizes)]
+
 class PointAnnotationGUI:
     def __init__(self, root):
         self.root = root
@@ -20,6 +220,7 @@ class PointAnnotationGUI:
         # State variables
         self.current_image = None
         self.current_image_path = None
+        self.loaded_image_index = None  # index of current_image_path in image_files
         self.photo = None
         self.canvas_image = None
         self.scale_factor = 1.0
@@ -29,14 +230,35 @@ class PointAnnotationGUI:
         # Directory and image management
         self.image_directory = None
         self.image_files = []
+        self.video_reader = None  # set in video mode; frames are decoded on demand
+        self.video_path = None
+        self.current_frame = None  # BGR frame on screen in video mode
         self.current_image_index = 0
         self.slider_updating = False  # Prevent slider feedback loops
+        self.slider_load_pending = False
+        self.annotation_index = AnnotatedFrameIndex()
         
         # Annotation data
         self.foreground_points = []
         self.background_points = []
         self.point_mode = "foreground"  # "foreground" or "background"
         
+        # Propagated (tentative) points, keyed by image index, until accepted
+        self.tentative_points = {}
+        self.propagation_cancel = None
+        self.propagation_results = queue.Queue()
+        
+        # Optional live SAM2 preview (worker created on first use)
+        self.preview_worker = None
+        self.preview_request_id = None
+        self.preview_mask_photo = None
+        self.preview_result = None  # (image_path, mask, bbox) for the current frame
+        self.preview_polling = False
+        
+        # Auto-saves run on a background thread so navigation never waits on disk
+        self.writer = AnnotationWriter()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Setup GUI
         self.setup_gui()
         
@@ -56,6 +278,7 @@ class PointAnnotationGUI:
         file_frame.pack(fill=tk.X, pady=(0, 10))
         
         ttk.Button(file_frame, text="Select Directory", command=self.select_directory).pack(fill=tk.X, pady=2)
+        ttk.Button(file_frame, text="Open Video", command=self.open_video).pack(fill=tk.X, pady=2)
         ttk.Button(file_frame, text="Load Single Image", command=self.load_single_image).pack(fill=tk.X, pady=2)
         ttk.Button(file_frame, text="Save Annotations", command=self.save_annotations).pack(fill=tk.X, pady=2)
         
@@ -89,6 +312,12 @@ class PointAnnotationGUI:
                                      variable=self.frame_var, command=self.on_slider_change)
         self.frame_slider.pack(fill=tk.X, pady=2)
         
+        # Annotation density strip under the slider (click to jump)
+        self.density_canvas = tk.Canvas(nav_frame, height=10, bg="#e0e0e0", highlightthickness=0)
+        self.density_canvas.pack(fill=tk.X, pady=(0, 2))
+        self.density_canvas.bind("<Configure>", lambda event: self.draw_density_markers())
+        self.density_canvas.bind("<Button-1>", self.on_density_click)
+        
         # Quick jump buttons
         quick_jump_frame = ttk.Frame(nav_frame)
         quick_jump_frame.pack(fill=tk.X, pady=2)
@@ -100,6 +329,14 @@ class PointAnnotationGUI:
         ttk.Button(quick_jump_frame, text="+10", command=lambda: self.jump_relative(10)).pack(side=tk.LEFT, padx=2)
         ttk.Button(quick_jump_frame, text="Last", command=self.jump_to_last).pack(side=tk.RIGHT, padx=(2, 0))
         
+        # Annotated / unannotated jumps
+        annotated_jump_frame = ttk.Frame(nav_frame)
+        annotated_jump_frame.pack(fill=tk.X, pady=2)
+        
+        ttk.Button(annotated_jump_frame, text="◀ Annotated", command=self.jump_to_previous_annotated).pack(side=tk.LEFT, padx=(0, 2))
+        ttk.Button(annotated_jump_frame, text="Annotated ▶", command=self.jump_to_next_annotated).pack(side=tk.LEFT, padx=2)
+        ttk.Button(annotated_jump_frame, text="Unannotated ▶", command=self.jump_to_next_unannotated).pack(side=tk.RIGHT, padx=(2, 0))
+        
         # Image info
         self.image_info_label = ttk.Label(nav_frame, text="No directory selected")
         self.image_info_label.pack(pady=2)
@@ -134,6 +371,42 @@ class PointAnnotationGUI:
         ttk.Button(points_frame, text="Delete Current Annotations", command=self.clear_current_annotations).pack(fill=tk.X, pady=2)
         ttk.Button(points_frame, text="Batch Save All", command=self.batch_save_all_annotations).pack(fill=tk.X, pady=2)
         
+        # Propagation
+        propagate_frame = ttk.LabelFrame(control_frame, text="Propagation", padding=10)
+        propagate_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        propagate_range_frame = ttk.Frame(propagate_frame)
+        propagate_range_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(propagate_range_frame, text="Frames ±").pack(side=tk.LEFT)
+        self.propagate_frames_var = tk.IntVar(value=10)
+        ttk.Spinbox(propagate_range_frame, from_=1, to=500, width=6,
+                    textvariable=self.propagate_frames_var).pack(side=tk.LEFT, padx=(5, 5))
+        ttk.Button(propagate_range_frame, text="Propagate", command=self.propagate_current_points).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        ttk.Button(propagate_frame, text="Accept Propagated", command=self.accept_tentative_points).pack(fill=tk.X, pady=2)
+        ttk.Button(propagate_frame, text="Accept All Propagated", command=self.accept_all_tentative_points).pack(fill=tk.X, pady=2)
+        ttk.Button(propagate_frame, text="Discard Propagated", command=self.discard_tentative_points).pack(fill=tk.X, pady=2)
+        
+        self.propagation_label = ttk.Label(propagate_frame, text="Tentative frames: 0")
+        self.propagation_label.pack(anchor=tk.W, pady=2)
+        
+        # SAM2 preview
+        preview_frame = ttk.LabelFrame(control_frame, text="SAM2 Preview", padding=10)
+        preview_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.preview_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(preview_frame, text="Live mask preview", variable=self.preview_var,
+                        command=self.toggle_preview).pack(anchor=tk.W)
+        
+        preview_model_frame = ttk.Frame(preview_frame)
+        preview_model_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(preview_model_frame, text="Model:").pack(side=tk.LEFT)
+        self.preview_model_var = tk.StringVar(value="sam2_b.pt")
+        ttk.Entry(preview_model_frame, textvariable=self.preview_model_var, width=14).pack(side=tk.LEFT, padx=(5, 0))
+        
+        self.preview_label = ttk.Label(preview_frame, text="Preview off")
+        self.preview_label.pack(anchor=tk.W, pady=2)
+        
         # Point counts
         self.fg_count_label = ttk.Label(points_frame, text="Foreground: 0")
         self.fg_count_label.pack(anchor=tk.W, pady=2)
@@ -146,7 +419,7 @@ class PointAnnotationGUI:
         instructions_frame.pack(fill=tk.X, pady=(0, 10))
         
         instructions = """
-1. Select directory or load single image
+1. Select directory, open video or load single image
 2. Navigate using buttons, slider, or entry
 3. Select point mode (F/B keys)
 4. Click on image to add points
@@ -167,6 +440,10 @@ Keyboard shortcuts:
 - Space: Next frame
 - Home/End: First/Last frame
 - PgUp/PgDn: Jump ±10 frames
+- [ / ]: Previous/next annotated frame
+- U / Shift+U: Next/previous unannotated
+- P: Propagate points ±N frames
+- A: Accept propagated points
         """
         ttk.Label(instructions_frame, text=instructions, justify=tk.LEFT).pack()
         
@@ -199,6 +476,7 @@ Keyboard shortcuts:
         directory = filedialog.askdirectory(title="Select Image Directory")
         
         if directory:
+            self.finish_current_sequence()
             self.image_directory = directory
             
             # Find all image files
@@ -210,6 +488,7 @@ Keyboard shortcuts:
                     self.image_files.append(str(file_path))
             
             self.image_files.sort()  # Sort alphabetically
+            self.rebuild_annotation_index()
             
             if self.image_files:
                 self.current_image_index = 0
@@ -219,6 +498,49 @@ Keyboard shortcuts:
             else:
                 messagebox.showwarning("Warning", "No image files found in selected directory")
     
+    def open_video(self):
+        """Annotate frames decoded from a video instead of extracted images"""
+        
+        file_path = filedialog.askopenfilename(
+            title="Select Video",
+            filetypes=[("Video files", VIDEO_EXTENSIONS), ("All files", "*.*")]
+        )
+        
+        if not file_path:
+            return
+        
+        self.finish_current_sequence()
+        try:
+            reader = KeyframeVideoReader(file_path)
+        except IOError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if len(reader) == 0:
+            reader.release()
+            messagebox.showwarning("Warning", "Could not determine the number of frames in this video")
+            return
+        
+        self.video_reader = reader
+        self.video_path = file_path
+        self.image_files = video_frame_paths(file_path, len(reader))
+        self.image_directory = str(Path(self.image_files[0]).parent)
+        self.rebuild_annotation_index()
+        
+        self.current_image_index = 0
+        self.load_current_image()
+        self.update_navigation_info()
+        index_kind = "keyframe index" if reader.keyframes else "OpenCV seeking"
+        print(f"✓ Opened video with {len(reader)} frames ({index_kind})")
+    
+    def close_video(self):
+        """Leave video mode, releasing the decoder"""
+        
+        if self.video_reader is not None:
+            self.video_reader.release()
+        self.video_reader = None
+        self.video_path = None
+        self.current_frame = None
+    
     def load_single_image(self):
         """Load a single image file (legacy mode)"""
         
@@ -232,8 +554,10 @@ Keyboard shortcuts:
         
         if file_path:
             # Set up single image mode
+            self.finish_current_sequence()
             self.image_directory = str(Path(file_path).parent)
             self.image_files = [file_path]
+            self.rebuild_annotation_index()
             self.current_image_index = 0
             self.load_current_image()
             self.update_navigation_info()
@@ -251,8 +575,16 @@ Keyboard shortcuts:
         file_path = self.image_files[self.current_image_index]
         
         try:
+            if self.video_reader is not None:
+                frame = self.video_reader.get(self.current_image_index)
+                if frame is None:
+                    raise IOError(f"Could not decode frame {self.current_image_index}")
+                self.current_frame = frame
+                self.current_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            else:
+                self.current_image = Image.open(file_path)
             self.current_image_path = file_path
-            self.current_image = Image.open(file_path)
+            self.loaded_image_index = self.current_image_index
             
             # Load existing annotations for this image
             self.load_existing_annotations()
@@ -296,6 +628,7 @@ Keyboard shortcuts:
             self.progress_var.set(0)
             self.frame_slider.configure(to=0)
             self.frame_entry.delete(0, tk.END)
+            self.draw_density_markers()
             return
         
         current = self.current_image_index + 1
@@ -305,7 +638,10 @@ Keyboard shortcuts:
         # Extract frame number from filename for display
         frame_num = self.extract_frame_index(filename)
         
-        self.image_info_label.config(text=f"{current}/{total}: {filename} (Frame {frame_num})")
+        self.image_info_label.config(
+            text=f"{current}/{total}: {filename} (Frame {frame_num})\n"
+                 f"Annotated: {self.annotation_index.count()}/{total}"
+        )
         self.progress_var.set((current / total) * 100)
         
         # Update slider and entry
@@ -315,8 +651,77 @@ Keyboard shortcuts:
         self.frame_entry.delete(0, tk.END)
         self.frame_entry.insert(0, str(current))
         self.slider_updating = False
+        
+        self.draw_density_markers()
+    
+    def finish_current_sequence(self):
+        """Save and flush the open frame before another sequence replaces it"""
+        
+        self.cancel_propagation()
+        self.tentative_points = {}
+        self.update_propagation_label()
+        
+        if self.current_image_path and (self.foreground_points or self.background_points):
+            self.auto_save_annotations()
+        self.writer.flush()
+        
+        self.current_image_path = None
+        self.loaded_image_index = None
+        self.foreground_points = []
+        self.background_points = []
+        self.close_video()
+    
+    def rebuild_annotation_index(self):
+        """Scan the annotation directory once for the loaded image list"""
+        
+        if not self.image_files:
+            self.annotation_index = AnnotatedFrameIndex()
+            return
+        
+        annotation_dir = self.get_annotation_path(self.image_files[0]).parent
+        self.annotation_index = AnnotatedFrameIndex.scan(self.image_files, annotation_dir)
+        print(f"✓ Indexed {self.annotation_index.count()} annotated frames in {annotation_dir}")
+    
+    def draw_density_markers(self):
+        """Draw annotation density along the slider, one bucket per few pixels"""
+        
+        self.density_canvas.delete("all")
+        total = len(self.annotation_index)
+        if total == 0:
+            return
+        
+        width = self.density_canvas.winfo_width()
+        height = self.density_canvas.winfo_height()
+        if width <= 1:
+            return
+        
+        bucket_px = 2
+        buckets = min(total, max(1, width // bucket_px))
+        bucket_width = width / buckets
+        for b, density in enumerate(self.annotation_index.density(buckets)):
+            if density <= 0:
+                continue
+            # Darker green for denser buckets
+            shade = int(200 - 150 * density)
+            color = f"#00{shade:02x}00"
+            x0 = b * bucket_width
+            self.density_canvas.create_rectangle(x0, 0, x0 + bucket_width, height, fill=color, width=0)
+        
+        # Current position
+        x = (self.current_image_index + 0.5) * width / total
+        self.density_canvas.create_line(x, 0, x, height, fill="blue", width=2)
     
-    def get_annotation_path(self, image_path):
+    def on_density_click(self, event):
+        """Jump to the frame under the click on the density strip"""
+        
+        if not self.image_files:
+            return
+        
+        width = max(self.density_canvas.winfo_width(), 1)
+        new_index = int(event.x * len(self.image_files) / width)
+        self.jump_to_index(new_index)
+    
+    def get_annotation_path(self, image_path, create=False):
         """Get the annotation file path that preserves source directory structure"""
         
         image_path = Path(image_path)
@@ -324,9 +729,11 @@ Keyboard shortcuts:
         # Get the source directory name
         source_dir_name = image_path.parent.name
         
-        # Create annotation directory structure: annotations/{source_dir_name}/
+        # Annotation directory structure: annotations/{source_dir_name}/
+        # (created lazily by whoever writes into it)
         annotation_dir = Path('annotations') / source_dir_name
-        annotation_dir.mkdir(parents=True, exist_ok=True)
+        if create:
+            annotation_dir.mkdir(parents=True, exist_ok=True)
         
         # Annotation file path
         annotation_path = annotation_dir / f"{image_path.stem}_annotations.json"
@@ -343,10 +750,15 @@ Keyboard shortcuts:
         self.foreground_points = []
         self.background_points = []
         
-        # Look for existing annotation file
+        # Look for existing annotation file, preferring a save that is still queued
         annotation_path = self.get_annotation_path(self.current_image_path)
+        is_pending, pending_data = self.writer.lookup(annotation_path)
         
-        if annotation_path.exists():
+        if is_pending:
+            if pending_data is not None:
+                self.foreground_points = list(pending_data["foreground_points"])
+                self.background_points = list(pending_data["background_points"])
+        elif self.is_current_indexed_annotated() and annotation_path.exists():
             try:
                 with open(annotation_path, 'r') as f:
                     annotations = json.load(f)
@@ -362,6 +774,14 @@ Keyboard shortcuts:
         # Update display
         self.update_point_counts()
     
+    def is_current_indexed_annotated(self):
+        """Whether the index says the current frame has an annotation file"""
+        
+        # Images outside the indexed list (should not happen) fall back to disk
+        if self.loaded_image_index is None or self.loaded_image_index >= len(self.annotation_index):
+            return True
+        return self.loaded_image_index in self.annotation_index
+    
     def display_image(self):
         """Display the current image on canvas"""
         
@@ -393,8 +813,9 @@ Keyboard shortcuts:
         # Update scroll region
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
         
-        # Redraw points
+        # Redraw points and any preview that belongs to this image
         self.draw_points()
+        self.draw_preview()
     
     def on_canvas_click(self, event):
         """Handle canvas click events"""
@@ -445,6 +866,19 @@ Keyboard shortcuts:
                 canvas_x - 5, canvas_y - 5, canvas_x + 5, canvas_y + 5,
                 fill="red", outline="darkred", width=2, tags="point"
             )
+        
+        # Draw propagated points that have not been accepted yet (hollow, dashed)
+        tentative = self.tentative_points.get(self.loaded_image_index)
+        if tentative:
+            tentative_fg, tentative_bg = tentative
+            for points, color in ((tentative_fg, "green"), (tentative_bg, "red")):
+                for x, y in points:
+                    canvas_x = x * self.scale_factor
+                    canvas_y = y * self.scale_factor
+                    self.canvas.create_oval(
+                        canvas_x - 5, canvas_y - 5, canvas_x + 5, canvas_y + 5,
+                        outline=color, width=2, dash=(2, 2), tags="point"
+                    )
     
     def change_mode(self):
         """Change point annotation mode"""
@@ -483,6 +917,115 @@ Keyboard shortcuts:
         """Update point count labels"""
         self.fg_count_label.config(text=f"Foreground: {len(self.foreground_points)}")
         self.bg_count_label.config(text=f"Background: {len(self.background_points)}")
+        
+        # Point counts change whenever the prompt does, so refresh the preview here
+        self.request_preview()
+    
+    def toggle_preview(self):
+        """Start or stop the live SAM2 preview"""
+        
+        if self.preview_var.get():
+            if self.preview_worker is None or self.preview_worker.model != self.preview_model_var.get():
+                if self.preview_worker is not None:
+                    self.preview_worker.close()
+                try:
+                    from sam2_preview import SAM2PreviewWorker
+                except ImportError as e:
+                    messagebox.showerror("Error", f"SAM2 preview unavailable: {e}")
+                    self.preview_var.set(False)
+                    return
+                self.preview_worker = SAM2PreviewWorker(model=self.preview_model_var.get())
+            self.request_preview()
+            if not self.preview_polling:
+                self.preview_polling = True
+                self.root.after(50, self._poll_preview)
+        else:
+            self.preview_request_id = None
+            self.preview_result = None
+            self.preview_label.config(text="Preview off")
+            self.draw_preview()
+    
+    def request_preview(self):
+        """Ask the preview worker for a mask from the current points"""
+        
+        if not self.preview_var.get() or self.preview_worker is None or not self.current_image_path:
+            return
+        
+        if not self.foreground_points and not self.background_points:
+            self.preview_request_id = None
+            self.preview_result = None
+            self.preview_label.config(text="Add points to preview")
+            self.draw_preview()
+            return
+        
+        # Video frames have no file for SAM2 to read, so the decoded frame goes along
+        self.preview_request_id = self.preview_worker.submit(
+            self.current_image_path, self.foreground_points, self.background_points,
+            image=self.current_frame if self.video_reader is not None else None
+        )
+        self.preview_label.config(text="Running SAM2...")
+    
+    def _poll_preview(self):
+        """Pick up finished previews from the worker while preview is on"""
+        
+        if not self.preview_var.get() or self.preview_worker is None:
+            self.preview_polling = False
+            return
+        
+        while True:
+            try:
+                request_id, image_path, mask, bbox, error = self.preview_worker.results.get_nowait()
+            except queue.Empty:
+                break
+            
+            # Only the latest request for the image on screen is shown
+            if request_id != self.preview_request_id or image_path != str(self.current_image_path):
+                continue
+            
+            if error is not None:
+                self.preview_result = None
+                self.preview_label.config(text=f"Preview failed: {error}")
+                print(f"⚠ SAM2 preview failed: {error}")
+            elif mask is None:
+                self.preview_result = None
+                self.preview_label.config(text="No mask")
+            else:
+                self.preview_result = (image_path, mask, bbox)
+                coverage = (mask > 0.5).sum() / mask.size * 100
+                self.preview_label.config(text=f"Mask coverage: {coverage:.1f}%")
+            self.draw_preview()
+        
+        self.root.after(50, self._poll_preview)
+    
+    def draw_preview(self):
+        """Overlay the preview mask and its bbox under the points"""
+        
+        self.canvas.delete("preview")
+        self.preview_mask_photo = None
+        
+        if not self.preview_var.get() or self.preview_result is None:
+            return
+        
+        image_path, mask, bbox = self.preview_result
+        if image_path != str(self.current_image_path) or self.photo is None:
+            return
+        
+        # Semi-transparent blue mask scaled like the displayed image
+        alpha = Image.fromarray(((mask > 0.5) * 110).astype("uint8"), mode="L")
+        alpha = alpha.resize((self.photo.width(), self.photo.height()), Image.Resampling.NEAREST)
+        overlay = Image.new("RGBA", alpha.size, (30, 144, 255, 0))
+        overlay.putalpha(alpha)
+        self.preview_mask_photo = ImageTk.PhotoImage(overlay)
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.preview_mask_photo, tags="preview")
+        
+        if bbox:
+            self.canvas.create_rectangle(
+                bbox['x_min'] * self.scale_factor, bbox['y_min'] * self.scale_factor,
+                bbox['x_max'] * self.scale_factor, bbox['y_max'] * self.scale_factor,
+                outline="yellow", width=2, tags="preview"
+            )
+        
+        self.canvas.tag_raise("point")
     
     def save_annotations(self):
         """Save annotations to JSON file (manual save)"""
@@ -496,7 +1039,7 @@ Keyboard shortcuts:
             return
         
         # Get the structured annotation path
-        default_path = self.get_annotation_path(self.current_image_path)
+        default_path = self.get_annotation_path(self.current_image_path, create=True)
         
         file_path = filedialog.asksaveasfilename(
             title="Save Annotations",
@@ -518,10 +1061,12 @@ Keyboard shortcuts:
         if not self.foreground_points and not self.background_points:
             return  # Nothing to save
         
-        # Auto-save with structured path
+        # Auto-save with structured path; the writer thread does the disk I/O
         file_path = self.get_annotation_path(self.current_image_path)
         
-        self._save_annotations_to_file(str(file_path), show_message=False)
+        self.writer.submit(file_path, self._build_annotation_data(str(file_path)))
+        if self.loaded_image_index is not None:
+            self.annotation_index.mark(self.loaded_image_index)
     
     def extract_frame_index(self, filename):
         """Extract frame index from filename like 'frame_000000.jpg'"""
@@ -535,36 +1080,53 @@ Keyboard shortcuts:
         except:
             return 0
     
+    def _build_annotation_data(self, file_path, image_path=None, foreground_points=None, background_points=None):
+        """Snapshot annotations in the on-disk JSON format (current image by default)"""
+        
+        if image_path is None:
+            image_path = self.current_image_path
+        if foreground_points is None:
+            foreground_points = self.foreground_points
+        if background_points is None:
+            background_points = self.background_points
+        
+        # Get source directory information
+        image_path = Path(image_path)
+        source_dir_name = image_path.parent.name
+        source_dir_path = str(image_path.parent)
+        
+        # Extract frame index from filename
+        frame_index = self.extract_frame_index(image_path.name)
+        
+        data = {
+            "image_path": str(image_path),
+            "image_filename": image_path.name,
+            "frame_index": frame_index,
+            "source_directory": source_dir_path,
+            "source_directory_name": source_dir_name,
+            # Frames of one sequence share a size, so the open image's size applies
+            "image_size": self.current_image.size,
+            "foreground_points": list(foreground_points),
+            "background_points": list(background_points),
+            "total_points": len(foreground_points) + len(background_points),
+            "annotation_created": str(Path(file_path).parent),
+            "annotation_structure": f"annotations/{source_dir_name}/",
+            "video_sequence_info": {
+                "is_video_frame": True,
+                "frame_number": frame_index,
+                "sequence_name": source_dir_name
+            }
+        }
+        if self.video_path is not None:
+            # image_path is the name the extracted frame would have; the pixels come from here
+            data["source_video"] = str(self.video_path)
+        return data
+    
     def _save_annotations_to_file(self, file_path, show_message=True):
         """Internal method to save annotations to a specific file"""
         
         try:
-            # Get source directory information
-            image_path = Path(self.current_image_path)
-            source_dir_name = image_path.parent.name
-            source_dir_path = str(image_path.parent)
-            
-            # Extract frame index from filename
-            frame_index = self.extract_frame_index(image_path.name)
-            
-            annotations = {
-                "image_path": str(self.current_image_path),
-                "image_filename": image_path.name,
-                "frame_index": frame_index,
-                "source_directory": source_dir_path,
-                "source_directory_name": source_dir_name,
-                "image_size": self.current_image.size,
-                "foreground_points": self.foreground_points,
-                "background_points": self.background_points,
-                "total_points": len(self.foreground_points) + len(self.background_points),
-                "annotation_created": str(Path(file_path).parent),
-                "annotation_structure": f"annotations/{source_dir_name}/",
-                "video_sequence_info": {
-                    "is_video_frame": True,
-                    "frame_number": frame_index,
-                    "sequence_name": source_dir_name
-                }
-            }
+            annotations = self._build_annotation_data(file_path)
             
             with open(file_path, 'w') as f:
                 json.dump(annotations, f, indent=2)
@@ -572,13 +1134,13 @@ Keyboard shortcuts:
             if show_message:
                 messagebox.showinfo("Success", f"Annotations saved to {file_path}")
             else:
-                print(f"✓ Auto-saved annotations: {Path(file_path).name} -> {source_dir_name}/ (frame {frame_index})")
+                print(f"✓ Saved annotations: {Path(file_path).name} -> {annotations['source_directory_name']}/ (frame {annotations['frame_index']})")
                 
         except Exception as e:
             if show_message:
                 messagebox.showerror("Error", f"Failed to save annotations: {e}")
             else:
-                print(f"⚠ Auto-save failed: {e}")
+                print(f"⚠ Save failed: {e}")
     
     def batch_save_all_annotations(self):
         """Save annotations for all images that have points"""
@@ -587,17 +1149,15 @@ Keyboard shortcuts:
             messagebox.showwarning("Warning", "No directory loaded")
             return
         
-        # Save current image first
+        # Save current image first and wait for queued writes to land
         if self.current_image_path and (self.foreground_points or self.background_points):
             self.auto_save_annotations()
+        self.writer.flush()
         
-        saved_count = 0
-        
-        # Check all images for existing annotations in structured directories
-        for image_path in self.image_files:
-            annotation_path = self.get_annotation_path(image_path)
-            if annotation_path.exists():
-                saved_count += 1
+        # Re-scan so files added or removed outside the tool are counted too
+        self.rebuild_annotation_index()
+        saved_count = self.annotation_index.count()
+        self.draw_density_markers()
         
         source_dir_name = Path(self.image_files[0]).parent.name if self.image_files else "unknown"
         messagebox.showinfo("Batch Save", 
@@ -613,15 +1173,169 @@ Keyboard shortcuts:
         # Clear points
         self.clear_all_points()
         
-        # Delete annotation file if it exists
+        # Delete annotation file if it exists; queued through the writer so it
+        # supersedes any save for this frame that has not been written yet
         annotation_path = self.get_annotation_path(self.current_image_path)
+        self.writer.submit(annotation_path, None)
+        if self.loaded_image_index is not None:
+            self.annotation_index.mark(self.loaded_image_index, False)
+            self.update_navigation_info()
+    
+    def on_close(self):
+        """Flush pending auto-saves before the window closes"""
+        
+        self.cancel_propagation()
+        if self.current_image_path and (self.foreground_points or self.background_points):
+            self.auto_save_annotations()
+        self.writer.close()
+        self.close_video()
+        self.root.destroy()
+    
+    def propagate_current_points(self):
+        """Track the current frame's points forward and backward over N frames"""
+        
+        if not self.image_files or self.loaded_image_index is None:
+            return
+        
+        if not self.foreground_points and not self.background_points:
+            messagebox.showwarning("Warning", "No points to propagate")
+            return
         
-        if annotation_path.exists():
+        try:
+            num_frames = int(self.propagate_frames_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showwarning("Invalid Input", "Please enter a valid number of frames")
+            return
+        
+        self.cancel_propagation()
+        cancel_event = threading.Event()
+        self.propagation_cancel = cancel_event
+        
+        # Snapshot everything the worker needs; it must not touch Tk or self state
+        image_files = list(self.image_files)
+        start_index = self.loaded_image_index
+        foreground_points = list(self.foreground_points)
+        background_points = list(self.background_points)
+        results = self.propagation_results
+        video_path = self.video_path
+        
+        def worker():
+            # The GUI's decoder is not thread safe, so video frames come from a reader of our own
+            reader = None
             try:
-                annotation_path.unlink()
-                print(f"✓ Deleted annotation file: {annotation_path.name}")
+                read_frame = None
+                if video_path is not None:
+                    reader = KeyframeVideoReader(video_path)
+                    read_frame = reader.get
+                for direction in (1, -1):
+                    for index, fg, bg in propagate_points(image_files, start_index, foreground_points,
+                                                          background_points, num_frames=num_frames,
+                                                          direction=direction, cancel_event=cancel_event,
+                                                          read_frame=read_frame):
+                        results.put((cancel_event, index, fg, bg))
             except Exception as e:
-                print(f"⚠ Failed to delete annotation file: {e}")
+                print(f"⚠ Propagation failed: {e}")
+            finally:
+                if reader is not None:
+                    reader.release()
+                results.put((cancel_event, None, None, None))
+        
+        threading.Thread(target=worker, name="point-propagation", daemon=True).start()
+        self.propagation_label.config(text="Propagating...")
+        self.root.after(50, self._poll_propagation)
+    
+    def _poll_propagation(self):
+        """Move finished propagation results from the worker into the GUI"""
+        
+        done = False
+        redraw = False
+        while True:
+            try:
+                cancel_event, index, fg, bg = self.propagation_results.get_nowait()
+            except queue.Empty:
+                break
+            
+            if cancel_event is not self.propagation_cancel or cancel_event.is_set():
+                continue  # Result from a cancelled or superseded run
+            
+            if index is None:
+                done = True
+                continue
+            
+            # Never shadow real annotations with tentative ones
+            if index in self.annotation_index:
+                continue
+            if index == self.loaded_image_index and (self.foreground_points or self.background_points):
+                continue
+            
+            self.tentative_points[index] = (fg, bg)
+            redraw = redraw or index == self.loaded_image_index
+        
+        if redraw:
+            self.draw_points()
+        
+        if done:
+            self.propagation_cancel = None
+            self.update_propagation_label()
+        elif self.propagation_cancel is not None:
+            self.propagation_label.config(text=f"Propagating... ({len(self.tentative_points)} frames)")
+            self.root.after(50, self._poll_propagation)
+    
+    def cancel_propagation(self):
+        """Stop a running propagation; its remaining results are discarded"""
+        
+        if self.propagation_cancel is not None:
+            self.propagation_cancel.set()
+            self.propagation_cancel = None
+    
+    def update_propagation_label(self):
+        """Update the tentative frame count label"""
+        self.propagation_label.config(text=f"Tentative frames: {len(self.tentative_points)}")
+    
+    def accept_tentative_points(self):
+        """Turn the current frame's propagated points into real annotations"""
+        
+        tentative = self.tentative_points.pop(self.loaded_image_index, None)
+        if not tentative:
+            return
+        
+        tentative_fg, tentative_bg = tentative
+        self.foreground_points.extend(tentative_fg)
+        self.background_points.extend(tentative_bg)
+        self.auto_save_annotations()
+        
+        self.draw_points()
+        self.update_point_counts()
+        self.update_propagation_label()
+        self.update_navigation_info()
+    
+    def accept_all_tentative_points(self):
+        """Save every propagated frame as a real annotation"""
+        
+        if not self.tentative_points:
+            return
+        
+        if self.loaded_image_index in self.tentative_points:
+            self.accept_tentative_points()
+        
+        for index, (fg, bg) in sorted(self.tentative_points.items()):
+            image_path = self.image_files[index]
+            file_path = self.get_annotation_path(image_path)
+            self.writer.submit(file_path, self._build_annotation_data(str(file_path), image_path, fg, bg))
+            self.annotation_index.mark(index)
+        
+        print(f"✓ Accepted propagated points on {len(self.tentative_points)} frames")
+        self.tentative_points = {}
+        self.update_propagation_label()
+        self.update_navigation_info()
+    
+    def discard_tentative_points(self):
+        """Drop all propagated points that were not accepted"""
+        
+        self.cancel_propagation()
+        self.tentative_points = {}
+        self.draw_points()
+        self.update_propagation_label()
     
     def on_slider_change(self, value):
         """Handle slider value changes"""
@@ -632,6 +1346,16 @@ Keyboard shortcuts:
         new_index = int(float(value))
         if new_index != self.current_image_index:
             self.current_image_index = new_index
+            # Drag events that arrive while a frame decodes collapse into one load of the latest position
+            if not self.slider_load_pending:
+                self.slider_load_pending = True
+                self.root.after_idle(self._load_slider_frame)
+    
+    def _load_slider_frame(self):
+        """Load the frame the slider ended up on, unless something else already did"""
+        
+        self.slider_load_pending = False
+        if self.current_image_index != self.loaded_image_index:
             self.load_current_image()
             self.update_navigation_info()
     
@@ -676,6 +1400,68 @@ Keyboard shortcuts:
         self.load_current_image()
         self.update_navigation_info()
     
+    def jump_to_index(self, new_index):
+        """Jump to an absolute 0-based index, clamped to the sequence"""
+        
+        if not self.image_files:
+            return
+        
+        new_index = max(0, min(new_index, len(self.image_files) - 1))
+        
+        if new_index != self.current_image_index:
+            self.current_image_index = new_index
+            self.load_current_image()
+            self.update_navigation_info()
+    
+    def _jump_to_found(self, new_index, description):
+        """Jump to an index returned by the annotation index, or report none found"""
+        
+        if new_index is None:
+            self.root.bell()
+            print(f"⚠ No {description} frame in that direction")
+            return
+        self.jump_to_index(new_index)
+    
+    def current_annotation_position(self):
+        """Current index with unsaved points taken into account for jumps"""
+        
+        # Points placed on the current frame count as annotated once we leave it
+        if self.foreground_points or self.background_points:
+            self.annotation_index.mark(self.current_image_index)
+        return self.current_image_index
+    
+    def jump_to_next_annotated(self):
+        """Jump to the next frame that has annotations"""
+        
+        if not self.image_files:
+            return
+        i = self.current_annotation_position()
+        self._jump_to_found(self.annotation_index.next_annotated(i), "annotated")
+    
+    def jump_to_previous_annotated(self):
+        """Jump to the previous frame that has annotations"""
+        
+        if not self.image_files:
+            return
+        i = self.current_annotation_position()
+        self._jump_to_found(self.annotation_index.previous_annotated(i), "annotated")
+    
+    def jump_to_next_unannotated(self):
+        """Jump to the next frame without annotations"""
+        
+        if not self.image_files:
+            return
+        i = self.current_annotation_position()
+        self._jump_to_found(self.annotation_index.next_unannotated(i), "unannotated")
+    
+    def jump_to_previous_unannotated(self):
+        """Jump to the previous frame without annotations"""
+        
+        if not self.image_files:
+            return
+        i = self.current_annotation_position()
+        self._jump_to_found(self.annotation_index.previous_unannotated(i), "unannotated")
+    
     def jump_relative(self, offset):
         """Jump relative to current frame"""
         
@@ -695,7 +1481,19 @@ Keyboard shortcuts:
         
         key = event.keysym.lower()
         
-        if key == 'f':
+        if event.keysym == 'U':
+            self.jump_to_previous_unannotated()
+        elif key == 'u':
+            self.jump_to_next_unannotated()
+        elif key == 'bracketright':
+            self.jump_to_next_annotated()
+        elif key == 'bracketleft':
+            self.jump_to_previous_annotated()
+        elif key == 'p':
+            self.propagate_current_points()
+        elif key == 'a':
+            self.accept_tentative_points()
+        elif key == 'f':
             self.mode_var.set("foreground")
             self.change_mode()
         elif key == 'b':
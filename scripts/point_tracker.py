@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Lightweight point tracker for propagating annotation prompts between frames
+Uses pyramidal Lucas-Kanade optical flow on downscaled grayscale frames
+"""
+
+import cv2
+import numpy as np
+
+# Lucas-Kanade parameters for the downscaled frames
+LK_PARAMS = dict(
+    winSize=(21, 21),
+    maxLevel=3,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01)
+)
+
+def load_gray(image_path, max_side=640):
+    """Load an image as grayscale, downscaled so its longest side is at most max_side
+
+    Returns (gray_image, scale) where scale maps original coordinates to the
+    downscaled image.
+    """
+    image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise IOError(f"Could not read image: {image_path}")
+    return downscale_gray(image, max_side)
+
+def downscale_gray(image, max_side=640):
+    """Downscale a grayscale image like load_gray; returns (gray_image, scale)"""
+    height, width = image.shape
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1.0:
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+    return image, scale
+
+def track_step(prev_gray, next_gray, points, max_fb_error=1.0):
+    """Track points from prev_gray to next_gray
+
+    Points are an (N, 2) float32 array in downscaled coordinates. A point is
+    kept only if LK finds it and tracking it back lands within max_fb_error
+    pixels of where it started (forward-backward check).
+
+    Returns (new_points, ok) where ok is a boolean mask over the input points.
+    """
+    if len(points) == 0:
+        return points, np.zeros(0, dtype=bool)
+
+    p0 = points.reshape(-1, 1, 2)
+    p1, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, next_gray, p0, None, **LK_PARAMS)
+    p0r, status_back, _ = cv2.calcOpticalFlowPyrLK(next_gray, prev_gray, p1, None, **LK_PARAMS)
+
+    fb_error = np.linalg.norm(p0 - p0r, axis=2).reshape(-1)
+    ok = (status.reshape(-1) == 1) & (status_back.reshape(-1) == 1) & (fb_error < max_fb_error)
+
+    # Points must also stay inside the frame
+    height, width = next_gray.shape
+    p1 = p1.reshape(-1, 2)
+    ok &= (p1[:, 0] >= 0) & (p1[:, 0] < width) & (p1[:, 1] >= 0) & (p1[:, 1] < height)
+
+    return p1, ok
+
+def propagate_points(image_files, start_index, foreground_points, background_points,
+                     num_frames=10, direction=1, max_side=640, max_fb_error=1.0,
+                     cancel_event=None, read_frame=None):
+    """Carry foreground/background points from start_index through neighbouring frames
+
+    Tracks frame to frame in one direction (+1 forward, -1 backward) for up to
+    num_frames frames. Points that fail the forward-backward check are dropped
+    and stay dropped. Stops early when every point is lost or cancel_event is set.
+
+    Yields (frame_index, foreground_points, background_points) in original image
+    coordinates as integer (x, y) lists, matching the annotation JSON format.
+
+    read_frame, when given, maps a frame index to a BGR frame and is used
+    instead of reading image_files (e.g. frames decoded from a video).
+    """
+    def gray(index):
+        if read_frame is None:
+            return load_gray(image_files[index], max_side)
+        frame = read_frame(index)
+        if frame is None:
+            raise IOError(f"Could not decode frame {index}")
+        return downscale_gray(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), max_side)
+
+    num_fg = len(foreground_points)
+    all_points = list(foreground_points) + list(background_points)
+    if not all_points:
+        return
+
+    prev_gray, scale = gray(start_index)
+    points = np.array(all_points, dtype=np.float32) * scale
+    alive = np.ones(len(all_points), dtype=bool)
+
+    index = start_index
+    for _ in range(num_frames):
+        if cancel_event is not None and cancel_event.is_set():
+            return
+
+        index += direction
+        if not 0 <= index < len(image_files):
+            return
+
+        next_gray, next_scale = gray(index)
+        if next_gray.shape != prev_gray.shape:
+            return  # Frame size changed; not the same sequence
+
+        new_points, ok = track_step(prev_gray, next_gray, points[alive], max_fb_error)
+        alive_indices = np.flatnonzero(alive)
+        points[alive_indices] = new_points
+        alive[alive_indices[~ok]] = False
+
+        if not alive.any():
+            return
+
+        original = np.rint(points / next_scale).astype(int)
+        fg = [(int(x), int(y)) for i, (x, y) in enumerate(original) if alive[i] and i < num_fg]
+        bg = [(int(x), int(y)) for i, (x, y) in enumerate(original) if alive[i] and i >= num_fg]
+        yield index, fg, bg
+
+        prev_gray = next_gray
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Headless QA renderer for SAM2 tracking results
+Draws the boxes of an extract_boxes_general.py results file on the real video
+frames, either as an overlay video or as a contact sheet of sampled frames.
+Frames are streamed from the source video; worker processes each render one
+contiguous chunk of frames.
+Usage: python render_qa.py RESULTS_JSON [--mode video|sheet] [--output FILE] [--workers N]
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from convert import ffmpeg_command
+
+# BGR colours per object id
+OBJECT_COLORS = [(0, 200, 0), (255, 128, 0), (0, 165, 255), (255, 0, 255), (255, 255, 0), (0, 0, 255)]
+
+def frame_objects(record):
+    """(object_id, class_id, object record) for every object of a frame record"""
+    if 'objects' in record:
+        return [(obj['object_id'], obj['class_id'], obj) for obj in record['objects']]
+    return [(0, 0, record)]
+
+def draw_record(frame, record, scale=1.0):
+    """Draw a frame record's boxes in place; interpolated boxes are thinner and marked '~'"""
+    for object_id, class_id, obj in frame_objects(record):
+        color = OBJECT_COLORS[object_id % len(OBJECT_COLORS)]
+        bbox = obj['bbox']
+        if not bbox:
+            continue
+        p1 = (int(bbox['x_min'] * scale), int(bbox['y_min'] * scale))
+        p2 = (int(bbox['x_max'] * scale), int(bbox['y_max'] * scale))
+        interpolated = obj.get('interpolated', False)
+        cv2.rectangle(frame, p1, p2, color, 1 if interpolated else 2)
+        label = f"cls {class_id} {obj['mask_coverage']:.1f}%{' ~' if interpolated else ''}"
+        cv2.putText(frame, label, (p1[0], max(p1[1] - 6, 12)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+
+    status = f"frame {record['frame_index']}"
+    if not record['has_detection']:
+        status += "  no detection"
+    cv2.putText(frame, status, (8, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255) if not record['has_detection'] else (255, 255, 255), 2, cv2.LINE_AA)
+    return frame
+
+def read_chunk(video_path, start, stop, wanted=None):
+    """Yield (frame_index, frame) for start <= index < stop, decoding sequentially from one seek
+
+    With `wanted` (a sorted list) only those frames are decoded; the rest are grabbed and skipped.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    wanted = set(wanted) if wanted is not None else None
+    try:
+        for index in range(start, stop):
+            if wanted is not None and index not in wanted:
+                if not cap.grab():
+                    return
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                return
+            yield index, frame
+    finally:
+        cap.release()
+
+def render_video_chunk(video_path, records, start, stop, output_path, fps, scale):
+    """Worker: write frames start..stop-1 with their boxes drawn to output_path"""
+    writer = None
+    written = 0
+    for index, frame in read_chunk(video_path, start, stop):
+        if scale != 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if writer is None:
+            height, width = frame.shape[:2]
+            writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+        record = records.get(index)
+        if record is not None:
+            draw_record(frame, record, scale)
+        writer.write(frame)
+        written += 1
+    if writer is not None:
+        writer.release()
+    return written
+
+def render_sheet_chunk(video_path, records, indices, thumb_width):
+    """Worker: thumbnails (RGB) of the given sorted frame indices with boxes drawn"""
+    thumbs = []
+    for index, frame in read_chunk(video_path, indices[0], indices[-1] + 1, wanted=indices):
+        scale = thumb_width / frame.shape[1]
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        draw_record(frame, records[index], scale)
+        thumbs.append((index, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+    return thumbs
+
+def chunk_ranges(total, chunks):
+    size = math.ceil(total / max(chunks, 1))
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+def concat_parts(parts, output_path, fps):
+    """Join chunk videos; stream copy with ffmpeg when available, else re-encode with OpenCV"""
+    if shutil.which("ffmpeg"):
+        list_path = Path(parts[0]).with_name("parts.txt")
+        list_path.write_text("".join(f"file '{Path(part).resolve()}'\n" for part in parts))
+        subprocess.run(ffmpeg_command(list_path, output_path, ["-c", "copy"],
+                                      input_args=["-f", "concat", "-safe", "0"]),
+                       check=True, capture_output=True)
+        return
+
+    writer = None
+    for part in parts:
+        for _, frame in read_chunk(part, 0, int(1e9)):
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+            writer.write(frame)
+    if writer is not None:
+        writer.release()
+
+def render_overlay_video(video_path, records, output_path, workers, scale=0.5):
+    cap = cv2.VideoCapture(str(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+    total = max(records) + 1
+
+    with tempfile.TemporaryDirectory(prefix="qa_overlay_") as work_dir:
+        ranges = chunk_ranges(total, workers)
+        parts = [os.path.join(work_dir, f"part_{i:04d}.mp4") for i in range(len(ranges))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(render_video_chunk, video_path,
+                            {i: records[i] for i in range(start, stop) if i in records},
+                            start, stop, part, fps, scale)
+                for (start, stop), part in zip(ranges, parts)
+            ]
+            written = sum(future.result() for future in futures)
+        concat_parts([part for part in parts if os.path.exists(part)], output_path, fps)
+    return written
+
+def render_contact_sheet(video_path, records, output_path, workers, samples=48, cols=8, thumb_width=320, title=None):
+    indices = sorted(records)
+    if len(indices) > samples:
+        picks = np.linspace(0, len(indices) - 1, samples).round().astype(int)
+        indices = [indices[i] for i in sorted(set(picks))]
+
+    groups = [indices[start:stop] for start, stop in chunk_ranges(len(indices), workers)]
+    thumbs = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_sheet_chunk, video_path, {i: records[i] for i in group}, group, thumb_width)
+                   for group in groups if group]
+        for future in futures:
+            thumbs.extend(future.result())
+
+    rows = math.ceil(len(thumbs) / cols)
+    fig, axes = plt.subplots(rows, cols, figsize=(cols * 2.5, rows * 2.0), squeeze=False)
+    for ax in axes.flat:
+        ax.axis('off')
+    for ax, (index, thumb) in zip(axes.flat, thumbs):
+        ax.imshow(thumb)
+        ax.set_title(f"{index}{' ~' if records[index].get('interpolated') else ''}", fontsize=8)
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=120)
+    plt.close(fig)
+    return len(thumbs)
+
+def render(results_path, mode="video", output=None, workers=None, scale=0.5, samples=48, cols=8):
+    """Render QA output for a results JSON; returns the output path"""
+    with open(results_path) as f:
+        results = json.load(f)
+    # Subset runs processed the first frames of the source video, so indices line up with it
+    video_path = results['video_source']
+    records = {frame['frame_index']: frame for frame in results['frames']}
+    if not records:
+        print(f"No frames in {results_path}, nothing to render")
+        return None
+    workers = workers or max(1, (os.cpu_count() or 1) - 1)
+    stem = Path(results_path).stem
+
+    if mode == "video":
+        output = output or f"{stem}_qa.mp4"
+        count = render_overlay_video(video_path, records, output, workers, scale)
+    else:
+        output = output or f"{stem}_qa_sheet.png"
+        count = render_contact_sheet(video_path, records, output, workers, samples, cols,
+                                     title=f"{Path(video_path).name}: {results['valid_detections']}/{results['total_frames']} frames detected")
+    print(f"QA {mode} with {count} frames saved to {output}")
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description='Render SAM2 tracking results on the source video frames')
+    parser.add_argument('results', help='Results JSON written by extract_boxes_general.py')
+    parser.add_argument('--mode', choices=['video', 'sheet'], default='video', help='Overlay video or contact sheet (default: video)')
+    parser.add_argument('--output', help='Output file (default: <results>_qa.mp4 or <results>_qa_sheet.png)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU cores - 1)')
+    parser.add_argument('--scale', type=float, default=0.5, help='Overlay video scale (default: 0.5)')
+    parser.add_argument('--samples', type=int, default=48, help='Frames on the contact sheet (default: 48)')
+    parser.add_argument('--cols', type=int, default=8, help='Contact sheet columns (default: 8)')
+    args = parser.parse_args()
+
+    render(args.results, args.mode, args.output, args.workers, args.scale, args.samples, args.cols)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Background SAM2 preview for the point annotation GUI
+Runs SAM2 on single frames and caches the image encoder output per frame,
+so adding a point only re-runs the prompt decoder
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+
+from extract_boxes_general import mask_to_bbox
+
+class SAM2PreviewWorker:
+    """Single background thread that turns point prompts into a mask and bbox
+
+    Requests are latest-wins: if several arrive while SAM2 is busy, only the
+    newest one is processed. Results are put on `results` as
+    (request_id, image_path, mask, bbox, error) for the GUI thread to poll.
+    """
+
+    def __init__(self, model="sam2_b.pt", imgsz=1024, conf=0.25, cache_size=8):
+        self.model = model
+        self.imgsz = imgsz
+        self.conf = conf
+        self.cache_size = cache_size
+        self.results = queue.Queue()
+
+        self._predictor = None
+        self._features = OrderedDict()  # image path -> cached encoder output
+        self._request = None
+        self._request_id = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="sam2-preview", daemon=True)
+        self._thread.start()
+
+    def submit(self, image_path, foreground_points, background_points, image=None):
+        """Queue a preview for image_path, replacing any request not yet started
+
+        image (a BGR array) is used instead of reading image_path when given;
+        image_path then only identifies the frame. Returns the request id that
+        the matching result will carry.
+        """
+        with self._cond:
+            self._request_id += 1
+            self._request = (self._request_id, str(image_path),
+                             list(foreground_points), list(background_points), image)
+            self._cond.notify()
+            return self._request_id
+
+    def close(self):
+        """Stop the worker thread after the request in progress"""
+        with self._cond:
+            self._closed = True
+            self._request = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._request is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                request, self._request = self._request, None
+
+            request_id, image_path, fg, bg, image = request
+            try:
+                mask, bbox = self._predict(image_path, fg, bg, image)
+                self.results.put((request_id, image_path, mask, bbox, None))
+            except Exception as e:
+                self.results.put((request_id, image_path, None, None, e))
+
+    def _get_predictor(self):
+        if self._predictor is None:
+            # Imported here so the GUI starts without loading torch
+            from ultralytics.models.sam import SAM2Predictor
+
+            overrides = dict(
+                conf=self.conf,
+                task="segment",
+                mode="predict",
+                imgsz=self.imgsz,
+                model=self.model,
+                verbose=False
+            )
+            self._predictor = SAM2Predictor(overrides=overrides)
+        return self._predictor
+
+    def _predict(self, image_path, foreground_points, background_points, image=None):
+        predictor = self._get_predictor()
+        source = image if image is not None else image_path
+
+        # Image encoder runs once per frame; prompt decoding reuses its output
+        features = self._features.get(image_path)
+        if features is None:
+            predictor.reset_image()
+            predictor.set_image(source)
+            features = predictor.features
+            self._features[image_path] = features
+            while len(self._features) > self.cache_size:
+                self._features.popitem(last=False)
+        else:
+            self._features.move_to_end(image_path)
+            predictor.features = features
+
+        points = list(foreground_points) + list(background_points)
+        labels = [1] * len(foreground_points) + [0] * len(background_points)
+        if not points:
+            return None, None
+
+        results = predictor(source=source, points=[points], labels=[labels])
+        if not results or results[0].masks is None:
+            return None, None
+
+        mask = results[0].masks.data[0].cpu().numpy()
+        return mask, mask_to_bbox(mask)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Random-access frame reader for compressed videos
+Builds (and caches next to the video) an index of keyframe positions with
+ffprobe, so a seek decodes only from the nearest preceding keyframe, and
+keeps a small LRU cache of decoded frames around the cursor
+"""
+
+import bisect
+import json
+import shutil
+import subprocess
+from collections import OrderedDict
+from pathlib import Path
+
+import cv2
+
+INDEX_SUFFIX = ".kfidx.json"
+
+def probe_keyframes(video_path):
+    """Keyframe frame numbers (presentation order) of the first video stream via ffprobe
+
+    Returns (keyframes, frame_count), or None when ffprobe is unavailable or fails.
+    """
+    if shutil.which("ffprobe") is None:
+        return None
+
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(video_path)]
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    # Packets come in decode order; frame numbers are ranks in presentation order
+    packets = []
+    for line in output.splitlines():
+        parts = line.strip().split(",")
+        if len(parts) < 2 or parts[0] in ("", "N/A"):
+            continue
+        packets.append((float(parts[0]), "K" in parts[1]))
+    if not packets:
+        return None
+
+    packets.sort(key=lambda packet: packet[0])
+    keyframes = [i for i, (_, is_key) in enumerate(packets) if is_key]
+    return keyframes or [0], len(packets)
+
+def load_keyframe_index(video_path):
+    """Keyframe index for video_path, from the sidecar cache when it is still valid"""
+    video_path = Path(video_path)
+    index_path = video_path.with_name(video_path.name + INDEX_SUFFIX)
+    stat = video_path.stat()
+
+    if index_path.exists():
+        try:
+            cached = json.loads(index_path.read_text())
+            if cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime:
+                return cached["keyframes"], cached["frame_count"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    probed = probe_keyframes(video_path)
+    if probed is None:
+        return None
+    keyframes, frame_count = probed
+
+    try:
+        index_path.write_text(json.dumps({"size": stat.st_size, "mtime": stat.st_mtime,
+                                          "frame_count": frame_count, "keyframes": keyframes}))
+    except OSError:
+        pass  # Read-only location; the index is rebuilt next time
+    return keyframes, frame_count
+
+class KeyframeVideoReader:
+    """Decode arbitrary frames of a video on demand
+
+    Sequential reads are plain decoder reads. A backward jump, or a forward
+    jump past the next keyframe, seeks to the nearest keyframe at or before the
+    target and decodes forward from there; frames decoded on the way that are
+    within `cache_radius` of the target are kept in the LRU cache.
+    """
+
+    def __init__(self, video_path, cache_size=48, cache_radius=8):
+        self.video_path = str(video_path)
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video: {video_path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        index = load_keyframe_index(video_path)
+        if index is not None:
+            self.keyframes, self.frame_count = index
+        else:
+            # No ffprobe: let OpenCV seek by frame number itself
+            self.keyframes = None
+            self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        self.cache_size = cache_size
+        self.cache_radius = cache_radius
+        self._cache = OrderedDict()
+        self._position = 0  # index of the frame the next read() returns
+
+    def __len__(self):
+        return self.frame_count
+
+    def _remember(self, index, frame):
+        self._cache[index] = frame
+        self._cache.move_to_end(index)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _keyframe_before(self, index):
+        if not self.keyframes:
+            return index
+        return self.keyframes[max(bisect.bisect_right(self.keyframes, index) - 1, 0)]
+
+    def _seek(self, index):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        self._position = index
+
+    def get(self, index):
+        """Frame `index` (BGR), or None past the end of the video"""
+        if index < 0 or (self.frame_count and index >= self.frame_count):
+            return None
+
+        frame = self._cache.get(index)
+        if frame is not None:
+            self._cache.move_to_end(index)
+            return frame
+
+        if index != self._position:
+            keyframe = self._keyframe_before(index)
+            # Decode forward from where we are if that beats seeking
+            if not (self._position < index and keyframe <= self._position):
+                self._seek(keyframe)
+
+        # Skip (grab without converting) until we are close to the target
+        while self._position < index - self.cache_radius:
+            if not self.cap.grab():
+                return None
+            self._position += 1
+
+        while self._position <= index:
+            ret, frame = self.cap.read()
+            if not ret:
+                return None
+            self._remember(self._position, frame)
+            self._position += 1
+
+        return frame
+
+    def release(self):
+        self.cap.release()
+        self._cache.clear()
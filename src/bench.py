@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+# Exported formats looked for next to the .pt, keyed by ultralytics export format
+EXPORT_SUFFIXES = {
+    'onnx': '.onnx',
+    'torchscript': '.torchscript',
+    'openvino': '_openvino_model',
+    'ncnn': '_ncnn_model',
+}
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+def percentiles(timings_ms):
+    timings = np.asarray(timings_ms)
+    return {
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'mean_ms': float(timings.mean()),
+    }
+
+def load_frames(image_dir, video_path, num_images, num_video_frames):
+    """Fixed benchmark frames: the first test images plus the first frames of the reference video"""
+    frames = []
+    images = sorted(p for p in Path(image_dir).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)[:num_images]
+    for image in images:
+        frame = cv2.imread(str(image))
+        if frame is not None:
+            frames.append(frame)
+
+    if video_path and Path(video_path).exists():
+        cap = cv2.VideoCapture(str(video_path))
+        while len(frames) < num_images + num_video_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+
+    return frames
+
+def run_path(weights, path, image_dir, video_path, num_images, num_video_frames, batch, imgsz, warmup):
+    """Time one inference path in a fresh process so its peak RSS is its own"""
+    frames = load_frames(image_dir, video_path, num_images, num_video_frames)
+    if not frames:
+        raise FileNotFoundError(f"No benchmark frames in {image_dir} or {video_path}")
+
+    model = YOLO(str(weights), task='detect')
+    step = batch if path == 'batched' else 1
+
+    for i in range(warmup):
+        chunk = frames[i * step % len(frames):][:step]
+        model(chunk if step > 1 else chunk[0], imgsz=imgsz, conf=0.25, verbose=False, device='cpu')
+
+    timings = []
+    start_all = time.perf_counter()
+    for i in range(0, len(frames), step):
+        chunk = frames[i:i + step]
+        start = time.perf_counter()
+        if step > 1:
+            model(chunk, imgsz=imgsz, conf=0.25, verbose=False, device='cpu')
+        else:
+            # Same call VideoWidget.update_frame makes for every camera frame
+            model(chunk[0], imgsz=imgsz, conf=0.25, verbose=False, device='cpu')
+        # Per-frame latency, so batched and single paths are comparable
+        timings.append((time.perf_counter() - start) * 1000 / len(chunk))
+    elapsed = time.perf_counter() - start_all
+
+    stats = percentiles(timings)
+    stats['throughput_fps'] = len(frames) / elapsed
+    stats['frames'] = len(frames)
+    stats['peak_rss_mb'] = peak_rss_mb()
+    return stats
+
+def evaluate_map(weights, data, imgsz):
+    """mAP of weights on the test split (dataset/labels/test)"""
+    model = YOLO(str(weights), task='detect')
+    metrics = model.val(data=data, split='test', imgsz=imgsz, batch=1, device='cpu', plots=False, verbose=False)
+    return {'map50': float(metrics.box.map50), 'map50_95': float(metrics.box.map)}
+
+def find_backends(weights, export_formats, imgsz):
+    """The .pt plus any exported models next to it, exporting requested formats that are missing"""
+    weights = Path(weights)
+    backends = {'pytorch': weights}
+    for fmt, suffix in EXPORT_SUFFIXES.items():
+        exported = weights.parent / f"{weights.stem}{suffix}"
+        if not exported.exists() and fmt in export_formats:
+            print(f"Exporting {weights.name} to {fmt}...")
+            exported = Path(YOLO(str(weights)).export(format=fmt, imgsz=imgsz))
+        if exported.exists():
+            backends[fmt] = exported
+    return backends
+
+def file_digest(path):
+    path = Path(path)
+    if path.is_dir():
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparable_run(history, current):
+    """Latest history entry with the same weights digest and benchmark settings, or None"""
+    for entry in reversed(history):
+        if entry.get('model_sha256') == current['model_sha256'] and entry.get('settings') == current['settings']:
+            return entry
+    return None
+
+def report_regressions(previous, current, tolerance):
+    """Print p50 latency / mAP changes against a comparable earlier history entry"""
+    if previous is None:
+        print("\nNo earlier run with the same weights and settings to compare with")
+        return
+    print(f"\nCompared with run of {previous['timestamp']} (commit {previous.get('git_commit')}):")
+    for key, result in current['results'].items():
+        old = previous['results'].get(key)
+        if not old or 'p50_ms' not in result or 'p50_ms' not in old:
+            continue
+        change = (result['p50_ms'] - old['p50_ms']) / old['p50_ms']
+        flag = "  <-- REGRESSION" if change > tolerance else ""
+        print(f"  {key:<24} p50 {old['p50_ms']:7.1f} -> {result['p50_ms']:7.1f} ms ({change:+.1%}){flag}")
+    for backend, result in current['accuracy'].items():
+        old = previous.get('accuracy', {}).get(backend)
+        if old:
+            change = result['map50'] - old['map50']
+            flag = "  <-- REGRESSION" if change < -0.01 else ""
+            print(f"  {backend + ' mAP50':<24} {old['map50']:.3f} -> {result['map50']:.3f} ({change:+.3f}){flag}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Latency, throughput, memory and mAP benchmark for the RS board detector')
+    parser.add_argument('--model', default='../model/best.pt', help='Detector weights (default: ../model/best.pt)')
+    parser.add_argument('--data', default='../data/yaml.yaml', help='Dataset YAML whose test split is scored (default: ../data/yaml.yaml)')
+    parser.add_argument('--images', default='../dataset/images/test', help='Benchmark image directory (default: ../dataset/images/test)')
+    parser.add_argument('--video', default='../videos/videos/IMG_1830.mov', help='Reference video (default: ../videos/videos/IMG_1830.mov)')
+    parser.add_argument('--num-images', type=int, default=100, help='Test images timed (default: 100)')
+    parser.add_argument('--num-video-frames', type=int, default=200, help='Reference video frames timed (default: 200)')
+    parser.add_argument('--batch', type=int, default=8, help='Batch size for the batched path (default: 8)')
+    parser.add_argument('--imgsz', type=int, default=640, help='Inference image size (default: 640)')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed warmup calls per path (default: 5)')
+    parser.add_argument('--export', nargs='*', default=[], choices=list(EXPORT_SUFFIXES), help='Export these backends first if missing')
+    parser.add_argument('--skip-map', action='store_true', help='Only measure speed')
+    parser.add_argument('--history', default='../model/bench_history.json', help='JSON history file (default: ../model/bench_history.json)')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Relative p50 slowdown flagged as a regression (default: 0.10)')
+    parser.add_argument('--note', default='', help='Free-text note stored with this run')
+    args = parser.parse_args()
+
+    backends = find_backends(args.model, args.export, args.imgsz)
+    print(f"Backends: {', '.join(backends)}")
+
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'note': args.note,
+        'model': str(args.model),
+        'model_sha256': file_digest(args.model),
+        'host': {'platform': platform.platform(), 'processor': platform.processor(), 'cpus': os.cpu_count()},
+        'settings': {'imgsz': args.imgsz, 'batch': args.batch, 'num_images': args.num_images,
+                     'num_video_frames': args.num_video_frames, 'video': args.video},
+        'results': {},
+        'accuracy': {},
+    }
+
+    for backend, weights in backends.items():
+        for path in ('single', 'batched'):
+            key = f"{backend}/{path}"
+            # Spawned, not forked: a forked child's ru_maxrss starts at the parent's peak
+            # (torch, ultralytics and the models evaluate_map has already loaded)
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                try:
+                    stats = pool.submit(run_path, weights, path, args.images, args.video, args.num_images,
+                                        args.num_video_frames, args.batch, args.imgsz, args.warmup).result()
+                except Exception as e:
+                    # Some exports only support a fixed batch size
+                    print(f"{key:<24} failed: {e}")
+                    record['results'][key] = {'error': str(e)}
+                    continue
+            record['results'][key] = stats
+            print(f"{key:<24} p50 {stats['p50_ms']:7.1f}  p95 {stats['p95_ms']:7.1f}  p99 {stats['p99_ms']:7.1f} ms  "
+                  f"{stats['throughput_fps']:6.1f} FPS  peak RSS {stats['peak_rss_mb']:7.1f} MB")
+
+        if not args.skip_map:
+            record['accuracy'][backend] = evaluate_map(weights, args.data, args.imgsz)
+            print(f"{backend:<24} mAP50 {record['accuracy'][backend]['map50']:.3f}  "
+                  f"mAP50-95 {record['accuracy'][backend]['map50_95']:.3f}")
+
+    history_path = Path(args.history)
+    history = json.loads(history_path.read_text()) if history_path.exists() else []
+    report_regressions(comparable_run(history, record), record, args.tolerance)
+
+    history.append(record)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    history_path.write_text(json.dumps(history, indent=2))
+    print(f"\nBenchmark appended to {history_path}")
@@ -0,0 +1,239 @@
+import argparse
+import csv
+import json
+import shutil
+from pathlib import Path
+import torch.nn as nn
+import yaml
+from ultralytics import YOLO
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.nn.modules import Bottleneck
+from ultralytics.nn.tasks import yaml_model_load
+from ultralytics.utils.torch_utils import get_flops, get_num_params
+
+from bench import run_path, evaluate_map
+from train import train
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+def pseudo_label(teacher_weights, image_dirs, output_dir, conf=0.5, imgsz=640, batch=16, exclude=()):
+    """Label unlabelled frames with the teacher's boxes (YOLO txt); returns the number of images labelled
+
+    The teacher's knowledge reaches the student through these extra training
+    targets (hard pseudo-label distillation); frames it finds nothing in become negatives.
+    """
+    teacher = YOLO(str(teacher_weights))
+    images_out = Path(output_dir) / "images" / "train"
+    labels_out = Path(output_dir) / "labels" / "train"
+    images_out.mkdir(parents=True, exist_ok=True)
+    labels_out.mkdir(parents=True, exist_ok=True)
+
+    exclude = set(exclude)
+    images = [p for d in image_dirs for p in sorted(Path(d).rglob("*"))
+              if p.suffix.lower() in IMAGE_EXTENSIONS and p.stem not in exclude]
+    for start in range(0, len(images), batch):
+        chunk = images[start:start + batch]
+        for image, result in zip(chunk, teacher.predict([str(p) for p in chunk], conf=conf, imgsz=imgsz,
+                                                        verbose=False, device='cpu')):
+            lines = [f"{int(c)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}"
+                     for c, (x, y, w, h) in zip(result.boxes.cls.tolist(), result.boxes.xywhn.tolist())]
+            (labels_out / f"pl_{image.stem}.txt").write_text("\n".join(lines) + ("\n" if lines else ""))
+            shutil.copy(image, images_out / f"pl_{image.stem}{image.suffix}")
+        print(f"Pseudo-labelled {min(start + batch, len(images))}/{len(images)}", end="\r")
+    print()
+    return len(images)
+
+def distill_data(data, output_dir, pseudo_count):
+    """Dataset YAML training on ground truth plus pseudo-labels, validating and testing on the original splits"""
+    with open(data) as f:
+        config = yaml.safe_load(f)
+    root = (Path(data).parent / config['path']).resolve()
+    output_dir = Path(output_dir).resolve()
+
+    # Ground-truth training images are linked in next to the pseudo-labelled ones
+    for kind in ("images", "labels"):
+        source = root / kind / "train"
+        target = output_dir / kind / "train"
+        for path in source.iterdir():
+            link = target / path.name
+            if not link.exists():
+                try:
+                    link.symlink_to(path)
+                except OSError:
+                    shutil.copy(path, link)
+
+    distilled = {
+        'path': str(output_dir),
+        'train': 'images/train',
+        'val': str(root / config['val']),
+        'test': str(root / config['test']),
+        'names': config['names'],
+    }
+    yaml_path = output_dir / "data.yaml"
+    with open(yaml_path, 'w') as f:
+        yaml.safe_dump(distilled, f)
+    print(f"Distillation set: {pseudo_count} pseudo-labelled + ground-truth training images -> {yaml_path}")
+    return yaml_path
+
+def narrow_student_yaml(width, output_dir, base="yolo11n.yaml"):
+    """Model YAML of the nano architecture with every layer's channel count scaled by width (nano is 0.25)"""
+    cfg = yaml_model_load(base)
+    depth, _, max_channels = cfg['scales'][cfg['scale']]
+    # A single scale is picked regardless of the file name
+    cfg['scales'] = {'n': [depth, width, max_channels]}
+    for key in ('scale', 'yaml_file'):
+        cfg.pop(key, None)
+    path = Path(output_dir) / f"student_w{width:.3f}.yaml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        yaml.safe_dump(cfg, f, sort_keys=False)
+    return path
+
+def _slice_conv(block, out_keep=None, in_keep=None):
+    """Replace a Conv block's conv (and BN) by one holding only the kept output/input channels"""
+    conv = block.conv
+    weight = conv.weight.detach()
+    if out_keep is not None:
+        weight = weight[out_keep]
+    if in_keep is not None:
+        weight = weight[:, in_keep]
+    new = nn.Conv2d(weight.shape[1], weight.shape[0], conv.kernel_size, conv.stride, conv.padding,
+                    conv.dilation, conv.groups, bias=conv.bias is not None)
+    new.weight.data.copy_(weight)
+    if conv.bias is not None:
+        new.bias.data.copy_(conv.bias.detach()[out_keep] if out_keep is not None else conv.bias.detach())
+    block.conv = new
+
+    if out_keep is not None:
+        bn = block.bn
+        new_bn = nn.BatchNorm2d(len(out_keep), eps=bn.eps, momentum=bn.momentum)
+        for name in ('weight', 'bias', 'running_mean', 'running_var'):
+            getattr(new_bn, name).data.copy_(getattr(bn, name).detach()[out_keep])
+        block.bn = new_bn
+
+def prune_channels(weights, amount, output):
+    """Physically remove `amount` of the hidden channels of every Bottleneck (cv1 outputs = cv2 inputs)
+
+    A Bottleneck's hidden channels are produced by cv1 and consumed only by cv2,
+    so they can be dropped without touching residual adds, concatenations or the
+    Detect head. Channels with the smallest BN scale go first; the kept count is
+    rounded to a multiple of 8 for the CPU kernels.
+    """
+    yolo = YOLO(str(weights))
+    before = get_num_params(yolo.model)
+    pruned = 0
+    for module in yolo.model.modules():
+        if not isinstance(module, Bottleneck) or not hasattr(module.cv1, 'bn') or module.cv2.conv.groups != 1:
+            continue
+        channels = module.cv1.conv.out_channels
+        keep_count = min(channels, max(8, round(channels * (1 - amount) / 8) * 8))
+        if keep_count == channels:
+            continue
+        keep = module.cv1.bn.weight.detach().abs().argsort(descending=True)[:keep_count].sort().values
+        _slice_conv(module.cv1, out_keep=keep)
+        _slice_conv(module.cv2, in_keep=keep)
+        pruned += 1
+    print(f"Pruned {pruned} bottlenecks: {before:,} -> {get_num_params(yolo.model):,} parameters")
+    yolo.save(str(output))
+    return Path(output)
+
+class PrunedTrainer(DetectionTrainer):
+    """Fine-tunes the loaded (pruned) model itself
+
+    The stock trainer rebuilds the model from its YAML and copies matching
+    weights in, which would silently restore the full channel counts.
+    """
+
+    def get_model(self, cfg=None, weights=None, verbose=True):
+        return weights
+
+def fine_tune_pruned(weights, data, epochs, imgsz, batch, workers, project, name):
+    yolo = YOLO(str(weights))
+    yolo.train(data=str(data), epochs=epochs, imgsz=imgsz, batch=batch, workers=workers,
+               device='cpu', project=project, name=name, exist_ok=True, trainer=PrunedTrainer)
+    return Path(yolo.trainer.save_dir) / "weights" / "best.pt"
+
+def describe(weights, data, imgsz, images, latency_images):
+    """mAP on the test split, parameter count, FLOPs and CPU latency of one checkpoint"""
+    model = YOLO(str(weights)).model
+    stats = run_path(weights, 'single', images, None, latency_images, 0, 1, imgsz, 5)
+    return {
+        **evaluate_map(weights, data, imgsz),
+        'params': get_num_params(model),
+        'gflops': round(get_flops(model, imgsz), 2),
+        'p50_ms': round(stats['p50_ms'], 1),
+        'fps': round(stats['throughput_fps'], 1),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Distil and prune the RS board detector for CPU deployment')
+    parser.add_argument('--data', default='../data/yaml.yaml', help='Dataset YAML (default: ../data/yaml.yaml)')
+    parser.add_argument('--teacher', default='yolo11s.pt', help='Teacher weights; trained on --data first unless --teacher-trained (default: yolo11s.pt)')
+    parser.add_argument('--teacher-trained', action='store_true', help='--teacher is already trained on our data')
+    parser.add_argument('--student', help='Student starting weights or model YAML (default: nano narrowed by --student-width)')
+    parser.add_argument('--student-width', type=float, default=0.1875, help='Channel width multiplier of the default student; nano is 0.25 (default: 0.1875)')
+    parser.add_argument('--baseline', default='../model/best.pt', help='Current deployed weights, reported for comparison (default: ../model/best.pt)')
+    parser.add_argument('--unlabelled', nargs='*', default=['../videos/imgs'], help='Frame directories for pseudo-labels (default: ../videos/imgs)')
+    parser.add_argument('--pseudo-conf', type=float, default=0.5, help='Teacher confidence for pseudo-labels (default: 0.5)')
+    parser.add_argument('--prune', type=float, default=0.3, help='Fraction of bottleneck hidden channels removed, 0 to skip (default: 0.3)')
+    parser.add_argument('--epochs', type=int, default=50, help='Teacher and student epochs (default: 50)')
+    parser.add_argument('--finetune-epochs', type=int, default=15, help='Fine-tune epochs after pruning (default: 15)')
+    parser.add_argument('--imgsz', type=int, default=640, help='Training and inference size (default: 640)')
+    parser.add_argument('--batch', type=int, default=16, help='Batch size (default: 16)')
+    parser.add_argument('--workers', type=int, default=8, help='Dataloader worker processes (default: 8)')
+    parser.add_argument('--images', default='../dataset/images/test', help='Images timed for latency (default: ../dataset/images/test)')
+    parser.add_argument('--latency-images', type=int, default=50, help='Images timed per checkpoint (default: 50)')
+    parser.add_argument('--work-dir', default='../model/compress', help='Runs and intermediate data (default: ../model/compress)')
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir)
+    project = str(work_dir / "runs")
+    steps = {}
+    if Path(args.baseline).exists():
+        steps['baseline'] = Path(args.baseline)
+
+    teacher = Path(args.teacher)
+    if not args.teacher_trained:
+        teacher = train(model=args.teacher, data=args.data, epochs=args.epochs, imgsz=args.imgsz, batch=args.batch,
+                        workers=args.workers, project=project, name="teacher", resume=True) / "weights" / "best.pt"
+    steps['teacher'] = teacher
+
+    with open(args.data) as f:
+        dataset_root = (Path(args.data).parent / yaml.safe_load(f)['path']).resolve()
+    # Frames already in any split must not be pseudo-labelled (val/test would leak into training)
+    labelled = {p.stem for p in (dataset_root / "images").rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS}
+    count = pseudo_label(teacher, args.unlabelled, work_dir / "distill_data", args.pseudo_conf, args.imgsz,
+                         args.batch, exclude=labelled)
+    distill_yaml = distill_data(args.data, work_dir / "distill_data", count)
+
+    student_model = args.student or str(narrow_student_yaml(args.student_width, work_dir))
+    student = train(model=student_model, data=str(distill_yaml), epochs=args.epochs, imgsz=args.imgsz,
+                    batch=args.batch, workers=args.workers, project=project, name="student", resume=True)
+    steps['student_distilled'] = student / "weights" / "best.pt"
+
+    if args.prune > 0:
+        pruned = prune_channels(steps['student_distilled'], args.prune, work_dir / f"student_pruned_{args.prune:.2f}.pt")
+        steps['pruned'] = pruned
+        steps['pruned_finetuned'] = fine_tune_pruned(pruned, distill_yaml, args.finetune_epochs, args.imgsz,
+                                                     args.batch, args.workers, project, "pruned_finetune")
+
+    rows = []
+    for step, weights in steps.items():
+        print(f"Measuring {step} ({weights})...")
+        rows.append({'step': step, 'weights': str(weights),
+                     **describe(weights, args.data, args.imgsz, args.images, args.latency_images)})
+
+    header = f"{'step':<20}{'mAP50':>8}{'mAP50-95':>10}{'params':>11}{'GFLOPs':>8}{'p50 ms':>8}{'FPS':>7}"
+    print("\n" + header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['step']:<20}{row['map50']:>8.3f}{row['map50_95']:>10.3f}{row['params']:>11,}"
+              f"{row['gflops']:>8.2f}{row['p50_ms']:>8.1f}{row['fps']:>7.1f}")
+
+    with open(work_dir / "compress_report.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(work_dir / "compress_report.json", 'w') as f:
+        json.dump(rows, f, indent=2)
+    print(f"Report saved to {work_dir / 'compress_report.csv'}")
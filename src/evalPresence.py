@@ -0,0 +1,75 @@
+import argparse
+import json
+from pathlib import Path
+import numpy as np
+from ultralytics import YOLO
+
+def presence_probabilities(model, split_dir, imgsz, batch=64):
+    """(p_present, is_present) arrays for every image of a presence dataset split"""
+    present_index = next(i for i, name in model.names.items() if name == "present")
+    probs, truth = [], []
+    for label in ("present", "absent"):
+        images = sorted(str(p) for p in (Path(split_dir) / label).glob("*.jpg"))
+        for start in range(0, len(images), batch):
+            for result in model.predict(images[start:start + batch], imgsz=imgsz, verbose=False, device='cpu'):
+                probs.append(float(result.probs.data[present_index]))
+                truth.append(label == "present")
+    return np.array(probs), np.array(truth)
+
+def choose_thresholds(probs, truth, max_error):
+    """Widest trusted band: the lowest low / highest high whose confident calls stay within max_error
+
+    Frames with low < p < high go to the detector. Returns (low, high, gated fraction, confident error rate).
+    """
+    candidates = np.unique(np.concatenate([[0.0, 1.0], np.quantile(probs, np.linspace(0, 1, 201))]))
+    best = (0.0, 1.0, 0.0, 0.0)
+    for low in candidates[candidates < 0.5]:
+        absent_calls = probs <= low
+        # Lowering high only adds present calls, so walk down until the error budget is exceeded
+        for high in candidates[candidates >= 0.5][::-1]:
+            present_calls = probs >= high
+            confident = absent_calls | present_calls
+            if not confident.any():
+                continue
+            errors = (absent_calls & truth) | (present_calls & ~truth)
+            error_rate = errors.sum() / confident.sum()
+            if error_rate > max_error:
+                break
+            gated = confident.mean()
+            if gated > best[2]:
+                best = (float(low), float(high), float(gated), float(error_rate))
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Evaluate the presence classifier and pick the cascade thresholds')
+    parser.add_argument('--model', default='../model/presence.pt', help='Presence classifier (default: ../model/presence.pt)')
+    parser.add_argument('--data', default='../dataset_presence', help='Presence dataset root (default: ../dataset_presence)')
+    parser.add_argument('--imgsz', type=int, default=128, help='Classifier input size (default: 128)')
+    parser.add_argument('--max-error', type=float, default=0.01, help='Allowed error rate of the calls the detector is skipped for (default: 0.01)')
+    parser.add_argument('--output', default='../model/presence_thresholds.json', help='Thresholds file read by cascade.py (default: ../model/presence_thresholds.json)')
+    args = parser.parse_args()
+
+    model = YOLO(args.model)
+
+    # Thresholds are chosen on val and checked on test
+    val_probs, val_truth = presence_probabilities(model, Path(args.data) / "val", args.imgsz)
+    low, high, gated, error = choose_thresholds(val_probs, val_truth, args.max_error)
+    print(f"val:  accuracy@0.5 {np.mean((val_probs >= 0.5) == val_truth):.3f}, "
+          f"thresholds low {low:.3f} high {high:.3f}, detector skipped {gated:.1%} (error {error:.2%})")
+
+    report = {"low": low, "high": high, "max_error": args.max_error, "val_skipped": gated, "val_error": error}
+    test_dir = Path(args.data) / "test"
+    if test_dir.exists():
+        probs, truth = presence_probabilities(model, test_dir, args.imgsz)
+        absent_calls, present_calls = probs <= low, probs >= high
+        confident = absent_calls | present_calls
+        errors = (absent_calls & truth) | (present_calls & ~truth)
+        report["test_accuracy"] = float(np.mean((probs >= 0.5) == truth))
+        report["test_skipped"] = float(confident.mean())
+        report["test_error"] = float(errors.sum() / max(confident.sum(), 1))
+        print(f"test: accuracy@0.5 {report['test_accuracy']:.3f}, detector skipped {report['test_skipped']:.1%} "
+              f"(error {report['test_error']:.2%})")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Thresholds saved to {args.output}")
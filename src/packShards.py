@@ -0,0 +1,210 @@
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+import yaml
+from ultralytics.data import YOLODataset
+from ultralytics.data.utils import img2label_paths
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+SPLITS = ("train", "val")
+PAD_VALUE = 114  # ultralytics' letterbox grey
+
+def letterbox(frame, imgsz):
+    """Resize the long side to imgsz and pad to imgsz x imgsz; returns (image, ratio, (left, top), (new_w, new_h))"""
+    h0, w0 = frame.shape[:2]
+    ratio = min(imgsz / h0, imgsz / w0)
+    new_w, new_h = round(w0 * ratio), round(h0 * ratio)
+    if (new_w, new_h) != (w0, h0):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA if ratio < 1 else cv2.INTER_LINEAR)
+    left, top = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+    out = np.full((imgsz, imgsz, 3), PAD_VALUE, dtype=np.uint8)
+    out[top:top + new_h, left:left + new_w] = frame
+    return out, ratio, (left, top), (new_w, new_h)
+
+def read_labels(label_path):
+    """[[cls, x, y, w, h], ...] from a YOLO label file (normalised xywh); missing file = background image"""
+    if not label_path.exists():
+        return []
+    return [[float(v) for v in line.split()[:5]] for line in label_path.read_text().splitlines() if line.strip()]
+
+def letterbox_labels(labels, imgsz, offset, size):
+    """Map normalised boxes of the original image onto the letterboxed one"""
+    (left, top), (new_w, new_h) = offset, size
+    return [[int(c), (x * new_w + left) / imgsz, (y * new_h + top) / imgsz, w * new_w / imgsz, h * new_h / imgsz]
+            for c, x, y, w, h in labels]
+
+def pack_split(image_dir, output, split, imgsz=640, workers=8):
+    """Letterbox every image of a split once into <output>/<split>.npy (N x imgsz x imgsz x 3 BGR, memory-mappable) plus <split>.json
+
+    The JSON index keeps, per row, the source file, its original shape and the
+    labels already in letterboxed coordinates, so training never touches the PNGs.
+    """
+    images = sorted(p for p in Path(image_dir).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    if not images:
+        raise FileNotFoundError(f"No images in {image_dir}")
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    shard = np.lib.format.open_memmap(output / f"{split}.npy", mode='w+', dtype=np.uint8,
+                                      shape=(len(images), imgsz, imgsz, 3))
+
+    def pack(job):
+        row, image = job
+        frame = cv2.imread(str(image))
+        if frame is None:
+            return None
+        boxed, ratio, offset, size = letterbox(frame, imgsz)
+        shard[row] = boxed
+        labels = read_labels(Path(img2label_paths([str(image)])[0]))
+        return {
+            'file': image.name,
+            'shape': list(frame.shape[:2]),
+            'ratio': ratio,
+            'pad': list(offset),
+            'labels': letterbox_labels(labels, imgsz, offset, size),
+        }
+
+    # cv2 releases the GIL while decoding and resizing, so threads are enough; rows are disjoint
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(pack, enumerate(images)))
+    shard.flush()
+
+    unreadable = [image.name for image, entry in zip(images, entries) if entry is None]
+    if unreadable:
+        raise ValueError(f"Could not read {len(unreadable)} images in {image_dir}, e.g. {unreadable[0]}")
+
+    index = {'imgsz': imgsz, 'count': len(images), 'source': str(Path(image_dir).resolve()), 'images': entries}
+    with open(output / f"{split}.json", 'w') as f:
+        json.dump(index, f)
+    size_mb = shard.nbytes / 1024 / 1024
+    print(f"{split}: {len(images)} images -> {output / f'{split}.npy'} ({size_mb:.0f} MB)")
+    return index
+
+def pack(data="../data/yaml.yaml", output="../dataset_shards", imgsz=640, splits=SPLITS, workers=8):
+    """Pack the splits of a dataset YAML and write <output>/data.yaml for train.py --shards"""
+    with open(data) as f:
+        config = yaml.safe_load(f)
+    root = (Path(data).parent / config['path']).resolve()
+    for split in splits:
+        pack_split(root / config[split], output, split, imgsz, workers)
+
+    # Same dataset as the original YAML (absolute paths); the trainer swaps in the shards by split
+    packed = {**config, 'path': str(root)}
+    with open(Path(output) / "data.yaml", 'w') as f:
+        yaml.safe_dump(packed, f)
+    return Path(output) / "data.yaml"
+
+def shard_split(shard_dir, img_path):
+    """Name of the packed split whose source is img_path, or None to read that split from disk"""
+    for split in SPLITS:
+        index = Path(shard_dir) / f"{split}.json"
+        if index.exists() and json.loads(index.read_text())['source'] == str(Path(img_path).resolve()):
+            return split
+    return None
+
+class ShardDataset(YOLODataset):
+    """YOLODataset reading pre-letterboxed rows from a packed shard instead of decoding image files
+
+    Each shard row is treated as the original image, so the trainer's own
+    resize is a no-op and labels come straight from the index.
+    """
+
+    def __init__(self, *args, shard_dir, split, **kwargs):
+        with open(Path(shard_dir) / f"{split}.json") as f:
+            self.index = json.load(f)
+        self.shard_path = Path(shard_dir) / f"{split}.npy"
+        self._shard = None
+        super().__init__(*args, **kwargs)
+        if self.imgsz != self.index['imgsz']:
+            raise ValueError(f"Shards in {shard_dir} were packed at {self.index['imgsz']}, "
+                             f"training uses imgsz={self.imgsz}; repack with --imgsz {self.imgsz}")
+
+    @property
+    def shard(self):
+        # Opened lazily so dataloader workers map the file themselves instead of pickling it
+        if self._shard is None:
+            self._shard = np.load(self.shard_path, mmap_mode='r')
+        return self._shard
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shard'] = None
+        return state
+
+    def get_img_files(self, img_path):
+        files = [str(Path(self.index['source']) / entry['file']) for entry in self.index['images']]
+        if self.fraction < 1:
+            files = files[:round(len(files) * self.fraction)]
+        return files
+
+    def get_labels(self):
+        imgsz = self.index['imgsz']
+        labels = []
+        for im_file, entry in zip(self.im_files, self.index['images']):
+            boxes = np.array(entry['labels'], dtype=np.float32).reshape(-1, 5)
+            labels.append({
+                'im_file': im_file,
+                'shape': (imgsz, imgsz),
+                'cls': boxes[:, :1],
+                'bboxes': boxes[:, 1:],
+                'segments': [],
+                'keypoints': None,
+                'normalized': True,
+                'bbox_format': 'xywh',
+            })
+        return labels
+
+    def load_image(self, i, rect_mode=True):
+        # Copied out of the map: augmentations write into the image in place
+        im = np.array(self.shard[i])
+        if self.augment:
+            # Mosaic draws its extra images from this buffer
+            self.buffer.append(i)
+            if len(self.buffer) >= self.max_buffer_length:
+                self.buffer.pop(0)
+        return im, im.shape[:2], im.shape[:2]
+
+class ShardTrainer(DetectionTrainer):
+    """DetectionTrainer whose train/val datasets come from the shards next to its data YAML"""
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        shard_dir = Path(self.args.data).parent
+        split = shard_split(shard_dir, img_path)
+        if split is None:
+            return super().build_dataset(img_path, mode, batch)
+        gs = max(int(self.model.stride.max() if self.model else 0), 32)
+        return ShardDataset(
+            img_path=img_path,
+            imgsz=self.args.imgsz,
+            batch_size=batch,
+            augment=mode == "train",
+            hyp=self.args,
+            rect=self.args.rect or mode == "val",
+            cache=None,
+            single_cls=self.args.single_cls or False,
+            stride=gs,
+            pad=0.0 if mode == "train" else 0.5,
+            prefix=colorstr(f"{mode} (shards): "),
+            task=self.args.task,
+            classes=self.args.classes,
+            data=self.data,
+            fraction=self.args.fraction if mode == "train" else 1.0,
+            shard_dir=shard_dir,
+            split=split,
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Pack letterboxed training images into memory-mapped shards')
+    parser.add_argument('--data', default='../data/yaml.yaml', help='Dataset YAML (default: ../data/yaml.yaml)')
+    parser.add_argument('--output', default='../dataset_shards', help='Shard directory (default: ../dataset_shards)')
+    parser.add_argument('--imgsz', type=int, default=640, help='Training image size the shards are packed at (default: 640)')
+    parser.add_argument('--splits', nargs='+', default=list(SPLITS), choices=SPLITS, help='Splits to pack (default: train val)')
+    parser.add_argument('--workers', type=int, default=8, help='Decoding threads (default: 8)')
+    args = parser.parse_args()
+
+    data = pack(args.data, args.output, args.imgsz, args.splits, args.workers)
+    print(f"Shard dataset written to {data}; train with: python train.py --shards {args.output} --imgsz {args.imgsz}")
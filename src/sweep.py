@@ -0,0 +1,115 @@
+import argparse
+import csv
+import itertools
+import random
+import statistics
+import time
+from pathlib import Path
+from ultralytics import YOLO
+from ultralytics.data.utils import check_det_dataset
+from train import train, add_training_args
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+def sweep_configs(models, sizes, mode="grid", samples=None, seed=0):
+    """List (model, imgsz) pairs for a grid sweep or a random subset of the grid"""
+    configs = list(itertools.product(models, sizes))
+    if mode == "random":
+        rng = random.Random(seed)
+        configs = rng.sample(configs, min(samples or len(configs), len(configs)))
+    return configs
+
+def measure_latency(weights, images, imgsz, warmup=5):
+    """Median/p95 single-image CPU latency in ms, like the real-time tab calls the model"""
+    model = YOLO(str(weights))
+    for image in images[:warmup]:
+        model(str(image), imgsz=imgsz, device='cpu', verbose=False)
+
+    timings = []
+    for image in images:
+        start = time.perf_counter()
+        model(str(image), imgsz=imgsz, device='cpu', verbose=False)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return statistics.median(timings), timings[int(0.95 * (len(timings) - 1))]
+
+def evaluate_run(run_dir, data, imgsz, latency_images):
+    """Validate best.pt of a finished run and time it on CPU"""
+    weights = Path(run_dir) / "weights" / "best.pt"
+    model = YOLO(str(weights))
+    metrics = model.val(data=data, imgsz=imgsz, device='cpu', plots=False, verbose=False)
+    params = sum(p.numel() for p in model.model.parameters())
+    p50, p95 = measure_latency(weights, latency_images, imgsz)
+    return {
+        'map50': float(metrics.box.map50),
+        'map50_95': float(metrics.box.map),
+        'params': params,
+        'latency_p50_ms': p50,
+        'latency_p95_ms': p95,
+        'fps': 1000.0 / p50 if p50 else 0.0
+    }
+
+def print_table(rows):
+    """Print the sweep comparison, fastest configuration first"""
+    header = f"{'model':<14}{'imgsz':>6}{'params(M)':>11}{'mAP50':>8}{'mAP50-95':>10}{'p50 ms':>9}{'p95 ms':>9}{'FPS':>7}"
+    print(header)
+    print("-" * len(header))
+    for row in sorted(rows, key=lambda r: r['latency_p50_ms']):
+        print(f"{row['model']:<14}{row['imgsz']:>6}{row['params'] / 1e6:>11.2f}{row['map50']:>8.3f}"
+              f"{row['map50_95']:>10.3f}{row['latency_p50_ms']:>9.1f}{row['latency_p95_ms']:>9.1f}{row['fps']:>7.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sweep model size and image size on CPU and compare mAP against latency')
+    parser.add_argument('--models', nargs='+', default=['yolo11n.pt', 'yolo11s.pt'], help='Starting weights to sweep (default: yolo11n.pt yolo11s.pt)')
+    parser.add_argument('--imgsz', nargs='+', type=int, default=[320, 480, 640], help='Image sizes to sweep (default: 320 480 640)')
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid', help='Run every combination or a random subset (default: grid)')
+    parser.add_argument('--samples', type=int, help='Number of configurations for a random sweep (default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='Random sweep seed (default: 0)')
+    parser.add_argument('--latency-images', type=int, default=50, help='Validation images used to time each model (default: 50)')
+    parser.add_argument('--target-map', type=float, help='mAP50 the deployed model must reach; reports the fastest that does')
+    parser.add_argument('--output', default='../model/sweep_results.csv', help='Comparison table CSV (default: ../model/sweep_results.csv)')
+    add_training_args(parser)
+    args = parser.parse_args()
+
+    val_dir = Path(check_det_dataset(args.data)['val'])
+    latency_images = sorted(p for p in val_dir.rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS)[:args.latency_images]
+    if not latency_images:
+        raise FileNotFoundError(f"No validation images found in {val_dir}")
+
+    configs = sweep_configs(args.models, args.imgsz, args.mode, args.samples, args.seed)
+    print(f"Sweeping {len(configs)} configurations sequentially on {args.device}")
+
+    rows = []
+    for i, (model, imgsz) in enumerate(configs, 1):
+        name = f"sweep_{Path(model).stem}_{imgsz}"
+        print(f"\n[{i}/{len(configs)}] {model} @ {imgsz} -> {name}")
+
+        run_dir = train(model=model, data=args.data, epochs=args.epochs, imgsz=imgsz,
+                        batch=args.batch, workers=args.workers, cache=args.cache,
+                        device=args.device, project=args.project, name=name,
+                        resume=args.resume)
+
+        row = {'model': Path(model).stem, 'imgsz': imgsz, 'run_dir': str(run_dir)}
+        row.update(evaluate_run(run_dir, args.data, imgsz, latency_images))
+        rows.append(row)
+
+        # Rewrite the table after every run so partial sweeps are still useful
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(row.keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    print()
+    print_table(rows)
+    print(f"\nComparison table saved to {args.output}")
+
+    if args.target_map is not None:
+        passing = [r for r in rows if r['map50'] >= args.target_map]
+        if passing:
+            best_row = min(passing, key=lambda r: r['latency_p50_ms'])
+            print(f"Fastest configuration with mAP50 >= {args.target_map}: "
+                  f"{best_row['model']} @ {best_row['imgsz']} ({best_row['latency_p50_ms']:.1f} ms, {best_row['run_dir']})")
+        else:
+            print(f"No configuration reached mAP50 >= {args.target_map}")
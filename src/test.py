@@ -1,6 +1,178 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import cv2
 from ultralytics import YOLO
 
+VIDEO_EXTENSIONS = {'.mov', '.mp4', '.avi', '.mkv', '.m4v'}
+CSV_FIELDS = ['frame', 'time_s', 'class_id', 'class_name', 'conf', 'x1', 'y1', 'x2', 'y2']
+
+class DetectionWriter:
+    """Append-only per-frame detection writer for jsonl, csv or parquet
+
+    jsonl has one line per frame (frames without detections included), which is
+    what the video player timeline reads. csv and parquet have one row per box.
+    """
+
+    def __init__(self, path, fmt, parquet_rows=10000):
+        self.fmt = fmt
+        self.path = Path(path)
+        self._rows = []
+        self._parquet_rows = parquet_rows
+        self._parquet_writer = None
+        if fmt == 'jsonl':
+            self._file = open(self.path, 'w')
+        elif fmt == 'csv':
+            self._file = open(self.path, 'w', newline='')
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+            self._csv.writeheader()
+        elif fmt == 'parquet':
+            import pyarrow  # noqa: F401  (fail early if parquet support is missing)
+            self._file = None
+        else:
+            raise ValueError(f"Unknown detection format: {fmt}")
+
+    def write_frame(self, frame, time_s, boxes, names):
+        """boxes: iterable of (x1, y1, x2, y2, conf, class_id)"""
+        if self.fmt == 'jsonl':
+            record = {
+                'frame': frame,
+                'time_s': round(time_s, 4),
+                'boxes': [[round(x1, 1), round(y1, 1), round(x2, 1), round(y2, 1), round(conf, 4), cls]
+                          for x1, y1, x2, y2, conf, cls in boxes]
+            }
+            self._file.write(json.dumps(record) + '\n')
+            return
+
+        for x1, y1, x2, y2, conf, cls in boxes:
+            row = {'frame': frame, 'time_s': round(time_s, 4), 'class_id': cls, 'class_name': names[cls],
+                   'conf': round(conf, 4), 'x1': round(x1, 1), 'y1': round(y1, 1),
+                   'x2': round(x2, 1), 'y2': round(y2, 1)}
+            if self.fmt == 'csv':
+                self._csv.writerow(row)
+            else:
+                self._rows.append(row)
+
+        if self.fmt == 'parquet' and len(self._rows) >= self._parquet_rows:
+            self._flush_parquet()
+
+    def _flush_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(self._rows, schema=pa.schema([
+            ('frame', pa.int64()), ('time_s', pa.float64()), ('class_id', pa.int64()),
+            ('class_name', pa.string()), ('conf', pa.float64()), ('x1', pa.float64()),
+            ('y1', pa.float64()), ('x2', pa.float64()), ('y2', pa.float64())
+        ]))
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(str(self.path), table.schema)
+        self._parquet_writer.write_table(table)
+        self._rows = []
+
+    def close(self):
+        if self.fmt == 'parquet':
+            if self._rows or self._parquet_writer is None:
+                self._flush_parquet()
+            self._parquet_writer.close()
+        else:
+            self._file.close()
+
+def process_video(video_path, model_path, output_dir, fmt='jsonl', batch=8, imgsz=640, conf=0.25,
+                  save_video=False, threads=None):
+    """Run the detector over one video, streaming frames in batches
+
+    Returns (video_path, frames processed, frames with detections).
+    """
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    video_path = Path(video_path)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    cap = cv2.VideoCapture(str(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+
+    model = YOLO(str(model_path))
+    writer = DetectionWriter(output_dir / f"{video_path.stem}_detections.{fmt}", fmt)
+    video_writer = None
+    if save_video:
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        video_writer = cv2.VideoWriter(str(output_dir / f"{video_path.stem}_annotated.mp4"), fourcc, fps, (width, height))
+
+    frames = 0
+    detected = 0
+    try:
+        # stream=True yields Results as batches finish instead of collecting them all
+        for result in model.predict(source=str(video_path), stream=True, batch=batch, imgsz=imgsz,
+                                    conf=conf, device='cpu', verbose=False):
+            boxes = []
+            if result.boxes is not None and len(result.boxes):
+                xyxy = result.boxes.xyxy.cpu().numpy()
+                confs = result.boxes.conf.cpu().numpy()
+                classes = result.boxes.cls.cpu().numpy().astype(int)
+                boxes = [(float(x1), float(y1), float(x2), float(y2), float(c), int(k))
+                         for (x1, y1, x2, y2), c, k in zip(xyxy, confs, classes)]
+                detected += 1
+
+            writer.write_frame(frames, frames / fps, boxes, result.names)
+            if video_writer is not None:
+                video_writer.write(result.plot())
+            frames += 1
+    finally:
+        writer.close()
+        if video_writer is not None:
+            video_writer.release()
+
+    return str(video_path), frames, detected
+
+def find_videos(source):
+    source = Path(source)
+    if source.is_dir():
+        return sorted(p for p in source.iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS)
+    return [source]
+
 if __name__ == "__main__":
-    model = YOLO("../model/runs/detect/train/weights/best.pt")
-    results = model.predict("../videos/videos/IMG_1830.mov", save=True)
-    print(results)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Offline RS board detection over videos, writing compact per-frame detections')
+    parser.add_argument('--source', default='../videos/videos/IMG_1830.mov', help='Video file or directory of videos (default: ../videos/videos/IMG_1830.mov)')
+    parser.add_argument('--model', default='../model/runs/detect/train/weights/best.pt', help='Detector weights (default: ../model/runs/detect/train/weights/best.pt)')
+    parser.add_argument('--output', default='../detections', help='Output directory (default: ../detections)')
+    parser.add_argument('--format', choices=['jsonl', 'csv', 'parquet'], default='jsonl', help='Detection file format (default: jsonl)')
+    parser.add_argument('--batch', type=int, default=8, help='Frames per inference batch (default: 8)')
+    parser.add_argument('--imgsz', type=int, default=640, help='Inference image size (default: 640)')
+    parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold (default: 0.25)')
+    parser.add_argument('--jobs', type=int, default=1, help='Videos processed in parallel worker processes (default: 1)')
+    parser.add_argument('--save-video', action='store_true', help='Also write an annotated video per input')
+    args = parser.parse_args()
+
+    videos = find_videos(args.source)
+    if not videos:
+        raise FileNotFoundError(f"No videos found in {args.source}")
+
+    jobs = max(1, min(args.jobs, len(videos)))
+    # Split the cores between workers so torch threads don't oversubscribe the CPU
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    options = dict(model_path=args.model, output_dir=args.output, fmt=args.format, batch=args.batch,
+                   imgsz=args.imgsz, conf=args.conf, save_video=args.save_video, threads=threads)
+
+    if jobs == 1:
+        for video in videos:
+            path, frames, detected = process_video(video, **options)
+            print(f"{Path(path).name}: {detected}/{frames} frames with detections")
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(process_video, video, **options) for video in videos]
+            for future in as_completed(futures):
+                path, frames, detected = future.result()
+                print(f"{Path(path).name}: {detected}/{frames} frames with detections")
+
+    print(f"Detections saved to {args.output}")
@@ -1,5 +1,104 @@
+import argparse
+from pathlib import Path
+import torch
 from ultralytics import YOLO
 
+def last_checkpoint(project, name):
+    """Return the last.pt of a previous run, or None if there isn't one"""
+    last = Path(project) / name / "weights" / "last.pt"
+    return last if last.exists() else None
+
+def run_finished(checkpoint):
+    """Ultralytics strips finished checkpoints and marks them with epoch -1"""
+    ckpt = torch.load(str(checkpoint), map_location='cpu', weights_only=False)
+    return ckpt.get('epoch', -1) == -1
+
+def train(model="yolo11n.pt", data="../data/yaml.yaml", epochs=50, imgsz=640, batch=16,
+          workers=8, cache=False, device="cpu", project="../model/runs/detect", name="train",
+          resume=False, shards=None):
+    """Train a YOLO model, resuming from the run's last.pt when asked and available
+
+    With shards (a directory written by packShards.py) the train/val images are
+    read pre-letterboxed from its memory-mapped arrays instead of decoded each epoch.
+    Returns the run directory.
+    """
+    trainer = None
+    if shards is not None:
+        from packShards import ShardTrainer
+        trainer = ShardTrainer
+        data = str(Path(shards) / "data.yaml")
+        # The shards are already a decoded cache
+        cache = False
+    last = last_checkpoint(project, name) if resume else None
+    if last is not None and run_finished(last):
+        print(f"{project}/{name} already finished, nothing to resume")
+        return last.parent.parent
+    if last is not None:
+        print(f"Resuming from {last}")
+        yolo = YOLO(str(last))
+        yolo.train(resume=True, trainer=trainer)
+    else:
+        if resume:
+            print(f"No checkpoint found for {project}/{name}, starting a new run")
+        yolo = YOLO(model)
+        yolo.train(
+            data=data,
+            epochs=epochs,
+            imgsz=imgsz,
+            batch=batch,
+            workers=workers,
+            cache=cache,
+            device=device,
+            project=project,
+            name=name,
+            # Only a resumable run reuses its directory; fresh runs get train2, train3... so best.pt is never overwritten
+            exist_ok=resume,
+            trainer=trainer
+        )
+    return Path(yolo.trainer.save_dir)
+
+def parse_cache(value):
+    """'ram' or 'disk' cache decoded images; anything else disables caching"""
+    value = value.lower()
+    if value in ("ram", "disk"):
+        return value
+    if value in ("none", "false", "off", "0"):
+        return False
+    raise argparse.ArgumentTypeError("cache must be 'ram', 'disk' or 'none'")
+
+def add_training_args(parser):
+    """Training options shared by train.py and sweep.py"""
+    parser.add_argument('--data', default='../data/yaml.yaml', help='Dataset YAML (default: ../data/yaml.yaml)')
+    parser.add_argument('--epochs', type=int, default=50, help='Training epochs (default: 50)')
+    parser.add_argument('--batch', type=int, default=16, help='Batch size (default: 16)')
+    parser.add_argument('--workers', type=int, default=8, help='Dataloader worker processes (default: 8)')
+    parser.add_argument('--cache', type=parse_cache, default=False,
+                        help="Cache decoded images in 'ram' or on 'disk' (default: none)")
+    parser.add_argument('--device', default='cpu', help='Training device (default: cpu)')
+    parser.add_argument('--project', default='../model/runs/detect', help='Run output directory (default: ../model/runs/detect)')
+    parser.add_argument('--resume', action='store_true', help="Resume the run from its last.pt if one exists")
+
 if __name__ == "__main__":
-    model =  YOLO("yolo11n.pt")
-    results = model.train(data='../data/yaml.yaml', epochs=50)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the RS board detector')
+    parser.add_argument('--model', default='yolo11n.pt', help='Starting weights (default: yolo11n.pt)')
+    parser.add_argument('--imgsz', type=int, default=640, help='Training image size (default: 640)')
+    parser.add_argument('--name', default='train', help='Run name (default: train)')
+    parser.add_argument('--shards', help='Read train/val images from this packShards.py directory (replaces --data)')
+    add_training_args(parser)
+    args = parser.parse_args()
+
+    save_dir = train(
+        model=args.model,
+        data=args.data,
+        epochs=args.epochs,
+        imgsz=args.imgsz,
+        batch=args.batch,
+        workers=args.workers,
+        cache=args.cache,
+        device=args.device,
+        project=args.project,
+        name=args.name,
+        resume=args.resume,
+        shards=args.shards
+    )
+    print(f"Training finished: {save_dir}")
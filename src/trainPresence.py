@@ -0,0 +1,95 @@
+import argparse
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import cv2
+from ultralytics import YOLO
+
+from train import last_checkpoint
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+SPLITS = ("train", "val", "test")
+
+def is_positive(label_path):
+    """A frame shows the board iff its YOLO label file has at least one box"""
+    return label_path.exists() and label_path.read_text().strip() != ""
+
+def build_presence_dataset(dataset="../dataset", output="../dataset_presence", imgsz=128, workers=8):
+    """Classification copy of the detection dataset: <split>/present|absent/<image>.jpg at imgsz x imgsz
+
+    Images are squashed (not cropped) like cascade.presence_input does at inference,
+    so a board near the frame edge stays in the picture.
+    """
+    jobs = []
+    for split in SPLITS:
+        image_dir = Path(dataset) / "images" / split
+        label_dir = Path(dataset) / "labels" / split
+        if not image_dir.exists():
+            continue
+        for image in sorted(p for p in image_dir.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS):
+            label = "present" if is_positive(label_dir / (image.stem + ".txt")) else "absent"
+            jobs.append((image, Path(output) / split / label / (image.stem + ".jpg")))
+
+    def convert(job):
+        source, target = job
+        if target.exists():
+            return True
+        frame = cv2.imread(str(source))
+        if frame is None:
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return cv2.imwrite(str(target), cv2.resize(frame, (imgsz, imgsz), interpolation=cv2.INTER_AREA))
+
+    # cv2 releases the GIL while decoding, so threads are enough
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        written = sum(pool.map(convert, jobs))
+
+    for split in SPLITS:
+        counts = {label: len(list((Path(output) / split / label).glob("*.jpg")))
+                  for label in ("present", "absent") if (Path(output) / split / label).exists()}
+        if counts:
+            print(f"{split}: {counts}")
+    print(f"{written}/{len(jobs)} images ready in {output}")
+    return Path(output)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train the board presence classifier for the cascade')
+    parser.add_argument('--dataset', default='../dataset', help='Detection dataset root (default: ../dataset)')
+    parser.add_argument('--output', default='../dataset_presence', help='Classification dataset root (default: ../dataset_presence)')
+    parser.add_argument('--model', default='yolo11n-cls.pt', help='Starting weights (default: yolo11n-cls.pt)')
+    parser.add_argument('--imgsz', type=int, default=128, help='Classifier input size (default: 128)')
+    parser.add_argument('--epochs', type=int, default=20, help='Training epochs (default: 20)')
+    parser.add_argument('--batch', type=int, default=64, help='Batch size (default: 64)')
+    parser.add_argument('--workers', type=int, default=8, help='Dataloader worker processes (default: 8)')
+    parser.add_argument('--project', default='../model/runs/classify', help='Run output directory (default: ../model/runs/classify)')
+    parser.add_argument('--name', default='presence', help='Run name (default: presence)')
+    parser.add_argument('--save', default='../model/presence.pt', help='Where to copy the best weights (default: ../model/presence.pt)')
+    parser.add_argument('--resume', action='store_true', help="Resume the run from its last.pt if one exists")
+    args = parser.parse_args()
+
+    data = build_presence_dataset(args.dataset, args.output, args.imgsz, args.workers)
+
+    last = last_checkpoint(args.project, args.name) if args.resume else None
+    if last is not None:
+        yolo = YOLO(str(last))
+        yolo.train(resume=True)
+    else:
+        yolo = YOLO(args.model)
+        yolo.train(
+            data=str(data),
+            epochs=args.epochs,
+            imgsz=args.imgsz,
+            batch=args.batch,
+            workers=args.workers,
+            device='cpu',
+            project=args.project,
+            name=args.name,
+            exist_ok=args.resume,
+            # Random crops and erasing can remove the board from a "present" image
+            scale=0.0,
+            erasing=0.0
+        )
+
+    best = Path(yolo.trainer.save_dir) / "weights" / "best.pt"
+    shutil.copy(best, args.save)
+    print(f"Presence classifier saved to {args.save}; run evalPresence.py to pick the cascade thresholds")